@@ -0,0 +1,289 @@
+"""
+Generador de Curvas Sintéticas de Atornillado
+
+Este módulo genera, a partir de una semilla, curvas realistas de ángulo y par con
+las tres fases de un atornillado (aproximación, asentamiento y rampa final de par)
+y anomalías NOT OK configurables. Las curvas se guardan con la misma disposición de
+hoja que esperan el despachador y `Entrenamiento_modelos.process_folder`, ya sea
+como .xlsx o directamente en el formato de la caché columnar (carpetas `*.curvas`),
+que es el camino adecuado para generar millones de curvas.
+
+Anomalías disponibles:
+    - caida_par: el par cae bruscamente durante la rampa final (rosca barrida).
+    - sin_asentamiento: unión blanda; el par final no llega al objetivo.
+    - sobrepar: pico de par por encima del objetivo al final del apriete.
+    - rosca_cruzada: par de arrastre alto y oscilante durante la aproximación.
+
+Uso:
+    python curvas_sinteticas.py datos_sinteticos --estaciones 4 --archivos 50 --procesos 20000
+    python curvas_sinteticas.py datos_despacho --perfil despacho --formato xlsx --procesos 200
+
+Imports:
+    - argparse: Librería para leer los argumentos de la línea de comandos.
+    - os: Librería para interactuar con el sistema operativo.
+    - datetime: Librería para generar las fechas de los procesos.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - pandas: Librería para escribir los archivos .xlsx.
+    - excel_cache: Formato de la caché columnar de curvas.
+
+Funciones:
+    - generate_curves: Genera las curvas de un conjunto de procesos.
+    - to_sheet: Construye la hoja con la disposición de un perfil.
+    - write_xlsx: Guarda un conjunto de curvas como archivo .xlsx.
+    - write_dataset: Genera una carpeta con una subcarpeta de archivos por estación.
+"""
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from excel_cache import CurveSet, write_curves
+
+ANOMALIES = ("caida_par", "sin_asentamiento", "sobrepar", "rosca_cruzada")
+
+# Etiquetas de la columna 1 de las exportaciones
+LABEL_OK = 0
+LABEL_NOK = 2
+
+# Límites de una hoja de Excel
+XLSX_MAX_ROWS = 1048576
+XLSX_MAX_COLUMNS = 16384
+
+# Procesos que se generan a la vez; acota la memoria de generación
+CHUNK_PROCESSES = 5000
+
+
+def _tightening_chunk(rng, n_processes, min_points, max_points, anomaly_codes):
+    """
+    Genera las curvas de ángulo y par de un bloque de procesos.
+
+    Args:
+        rng (np.random.Generator): Generador aleatorio.
+        n_processes (int): Número de procesos del bloque.
+        min_points (int): Puntos mínimos de cada curva.
+        max_points (int): Puntos máximos de cada curva.
+        anomaly_codes (np.ndarray): Anomalía de cada proceso (0 = OK, i = ANOMALIES[i - 1]).
+
+    Returns:
+        tuple: Matrices de ángulo y par de forma (n_procesos, max_puntos) con NaN al final.
+    """
+    lengths = rng.integers(min_points, max_points + 1, n_processes)
+    width = int(lengths.max())
+    u = np.arange(width)[None, :] / (lengths[:, None] - 1)
+    valid = u <= 1
+
+    # Ángulo creciente con velocidad de giro ligeramente irregular
+    steps = rng.gamma(20.0, 1 / 20.0, (n_processes, width))
+    steps[~valid] = 0
+    angulo = np.cumsum(steps, axis=1)
+    angulo *= rng.uniform(540, 1080, (n_processes, 1)) / angulo[np.arange(n_processes), lengths - 1][:, None]
+
+    def column(low, high):
+        return rng.uniform(low, high, (n_processes, 1))
+
+    snug_start, snug_width = column(0.55, 0.75), column(0.03, 0.08)
+    ramp_start = snug_start + snug_width
+    prevailing, snug_torque, target = column(0.2, 0.8), column(2.0, 4.0), column(18.0, 30.0)
+
+    # Aproximación: par de arrastre con una ligera oscilación de la rosca
+    oscillation = np.sin(2 * np.pi * u * column(8, 15))
+    par = prevailing * (1 + 0.1 * oscillation)
+    # Asentamiento: subida cuadrática hasta el par de asiento
+    par += (snug_torque - prevailing) * np.clip((u - snug_start) / snug_width, 0, 1) ** 2
+    # Rampa final: subida lineal hasta el par objetivo
+    ramp = np.clip((u - ramp_start) / (1 - ramp_start), 0, 1)
+    final_gain = np.ones((n_processes, 1))
+
+    codes = anomaly_codes[:, None]
+    final_gain[codes == 2] = rng.uniform(0.35, 0.6, int((codes == 2).sum()))
+    par += (target - snug_torque) * ramp * final_gain
+    # caida_par: el par cae a una fracción a partir de un punto de la rampa final
+    drop_at = ramp_start + (1 - ramp_start) * column(0.3, 0.9)
+    par = np.where((codes == 1) & (u > drop_at), par * column(0.25, 0.45), par)
+    # sobrepar: pico en el último 5 % del apriete
+    par += np.where(codes == 3, target * column(0.3, 0.6) * np.clip((u - 0.95) / 0.05, 0, 1), 0)
+    # rosca_cruzada: arrastre varias veces mayor y oscilante antes del asentamiento
+    par += np.where((codes == 4) & (u < snug_start), prevailing * column(2, 4) * (1 + 0.5 * oscillation), 0)
+
+    par += rng.normal(0, 0.05, par.shape) * (1 + 0.02 * par)
+    angulo[~valid] = np.nan
+    par[~valid] = np.nan
+    return angulo, par
+
+
+def generate_curves(n_processes, seed=0, nok_ratio=0.2, anomalies=ANOMALIES, min_points=600, max_points=1500,
+                    estacion="SINT", start=None, cycle_seconds=30.0, first_index=0):
+    """
+    Genera las curvas de un conjunto de procesos.
+
+    Args:
+        n_processes (int): Número de procesos (atornillados).
+        seed (int): Semilla del generador; la misma semilla produce las mismas curvas.
+        nok_ratio (float): Proporción de procesos NOT OK.
+        anomalies (tuple): Anomalías posibles de los procesos NOT OK.
+        min_points (int): Puntos mínimos de cada curva.
+        max_points (int): Puntos máximos de cada curva.
+        estacion (str): Estación, usada en los identificadores.
+        start (datetime): Fecha del primer proceso; por defecto 2024-01-01 06:00.
+        cycle_seconds (float): Segundos medios entre procesos consecutivos.
+        first_index (int): Número del primer proceso, para continuar una serie.
+
+    Returns:
+        CurveSet: Curvas alternando ángulo y par de cada proceso, etiqueta de cada curva
+        (0 OK, 2 NOT OK), y fecha e identificador de cada fila.
+
+    Raises:
+        ValueError: Si una anomalía no existe o los parámetros no son válidos.
+    """
+    unknown = set(anomalies) - set(ANOMALIES)
+    if unknown:
+        raise ValueError(f"Anomalías desconocidas: {', '.join(sorted(unknown))}. Use {', '.join(ANOMALIES)}.")
+    if not 0 <= nok_ratio <= 1 or (nok_ratio > 0 and not anomalies):
+        raise ValueError("La proporción NOT OK debe estar entre 0 y 1 y requiere al menos una anomalía.")
+    if not 2 <= min_points <= max_points:
+        raise ValueError("Los puntos por curva deben cumplir 2 <= min_points <= max_points.")
+
+    rng = np.random.default_rng(seed)
+    allowed = np.array([ANOMALIES.index(name) + 1 for name in anomalies], dtype=int)
+    nok = rng.random(n_processes) < nok_ratio
+    codes = np.zeros(n_processes, dtype=int)
+    if len(allowed):
+        codes[nok] = rng.choice(allowed, int(nok.sum()))
+
+    curvas = np.full((2 * n_processes, max_points), np.nan, dtype=np.float32)
+    for begin in range(0, n_processes, CHUNK_PROCESSES):
+        end = min(begin + CHUNK_PROCESSES, n_processes)
+        angulo, par = _tightening_chunk(rng, end - begin, min_points, max_points, codes[begin:end])
+        curvas[2 * begin:2 * end:2, :angulo.shape[1]] = angulo
+        curvas[2 * begin + 1:2 * end:2, :par.shape[1]] = par
+    # Recortar las columnas que ningún proceso llegó a usar
+    curvas = np.ascontiguousarray(curvas[:, :int((~np.isnan(curvas)).sum(axis=1).max(initial=0))])
+
+    start = start or datetime(2024, 1, 1, 6, 0, 0)
+    offsets = np.cumsum(rng.uniform(0.5, 1.5, n_processes) * cycle_seconds)
+    fechas = [(start + timedelta(seconds=float(s))).isoformat(sep=' ', timespec='seconds') for s in offsets]
+    identificadores = [f"{estacion}-{first_index + i:08d}" for i in range(n_processes)]
+    etiquetas = np.repeat(np.where(codes > 0, LABEL_NOK, LABEL_OK), 2).astype(np.float32)
+    return CurveSet(curvas, etiquetas, list(np.repeat(fechas, 2)), list(np.repeat(identificadores, 2)))
+
+
+def to_sheet(curve_set, profile, estacion="SINT"):
+    """
+    Construye la hoja con la disposición de un perfil de exportación.
+
+    Args:
+        curve_set (CurveSet): Curvas generadas.
+        profile (str): Perfil de la hoja (despacho o entrenamiento).
+        estacion (str): Valor de la columna de estación.
+
+    Returns:
+        DataFrame: Hoja sin encabezados, lista para `to_excel(header=False, index=False)`.
+    """
+    etiquetas = curve_set.etiquetas.astype(int)
+    columns = {0: curve_set.fechas, 1: etiquetas, 2: [estacion] * len(curve_set)}
+    if profile == "despacho":
+        columns[3] = curve_set.identificadores
+        columns[4] = np.where(etiquetas == LABEL_OK, "OK", "NOK")
+    elif profile != "entrenamiento":
+        raise ValueError(f"Perfil desconocido: {profile}.")
+    meta = pd.DataFrame(columns)
+    data = pd.DataFrame(curve_set.curvas)
+    return pd.concat([meta, data], axis=1, ignore_index=True)
+
+
+def write_xlsx(path, curve_set, profile, estacion="SINT"):
+    """
+    Guarda un conjunto de curvas como archivo .xlsx.
+
+    Args:
+        path (str): Ruta del archivo.
+        curve_set (CurveSet): Curvas generadas.
+        profile (str): Perfil de la hoja (despacho o entrenamiento).
+        estacion (str): Valor de la columna de estación.
+
+    Raises:
+        ValueError: Si las curvas no caben en una hoja de Excel.
+    """
+    if len(curve_set) > XLSX_MAX_ROWS or curve_set.curvas.shape[1] + 5 > XLSX_MAX_COLUMNS:
+        raise ValueError("Las curvas no caben en una hoja de Excel; use el formato de la caché o más archivos.")
+    to_sheet(curve_set, profile, estacion).to_excel(path, header=False, index=False)
+
+
+def write_dataset(root, n_stations=2, files_per_station=1, processes_per_file=1000, profile="entrenamiento",
+                  output_format="curvas", seed=0, **options):
+    """
+    Genera una carpeta con una subcarpeta de archivos por estación (`<raiz>/<estacion>/`).
+
+    Cada archivo usa una semilla derivada de la semilla global, la estación y su
+    número, por lo que el resultado es reproducible e independiente del orden en que
+    se generen los archivos. Las fechas continúan de un archivo al siguiente.
+
+    Args:
+        root (str): Carpeta raíz.
+        n_stations (int): Número de estaciones.
+        files_per_station (int): Archivos por estación.
+        processes_per_file (int): Procesos por archivo.
+        profile (str): Perfil de las curvas (despacho o entrenamiento).
+        output_format (str): "curvas" para la caché columnar o "xlsx".
+        seed (int): Semilla global.
+        **options: Parámetros adicionales de `generate_curves`.
+
+    Returns:
+        list: Rutas de los archivos generados.
+    """
+    if output_format not in ("curvas", "xlsx"):
+        raise ValueError(f"Formato desconocido: {output_format}. Use curvas o xlsx.")
+    if profile not in ("despacho", "entrenamiento"):
+        raise ValueError(f"Perfil desconocido: {profile}.")
+    start = options.pop("start", None) or datetime(2024, 1, 1, 6, 0, 0)
+    cycle_seconds = options.get("cycle_seconds", 30.0)
+    paths = []
+    for station_index in range(n_stations):
+        estacion = f"SINT{station_index + 1:02d}"
+        os.makedirs(os.path.join(root, estacion), exist_ok=True)
+        for file_index in range(files_per_station):
+            file_seed = np.random.SeedSequence([seed, station_index, file_index])
+            first_index = file_index * processes_per_file
+            curve_set = generate_curves(processes_per_file, seed=file_seed, estacion=estacion,
+                                        start=start + timedelta(seconds=first_index * cycle_seconds),
+                                        first_index=first_index, **options)
+            path = os.path.join(root, estacion, f"sintetico_{file_index:04d}.{output_format}")
+            if output_format == "xlsx":
+                write_xlsx(path, curve_set, profile, estacion)
+            else:
+                # Mismo contenido que deja clean_sheet: etiquetas solo en entrenamiento, identificadores solo en despacho
+                if profile == "despacho":
+                    curve_set.etiquetas = None
+                else:
+                    curve_set.identificadores = []
+                write_curves(path, curve_set, source=f"sintetico seed={seed} estacion={station_index} archivo={file_index}")
+            paths.append(path)
+            print(f"{path}: {processes_per_file} procesos")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera curvas sintéticas de atornillado.")
+    parser.add_argument("raiz", help="Carpeta de salida (una subcarpeta por estación).")
+    parser.add_argument("--estaciones", type=int, default=2, help="Número de estaciones.")
+    parser.add_argument("--archivos", type=int, default=1, help="Archivos por estación.")
+    parser.add_argument("--procesos", type=int, default=1000, help="Procesos por archivo.")
+    parser.add_argument("--perfil", choices=("entrenamiento", "despacho"), default="entrenamiento",
+                        help="Disposición de las hojas.")
+    parser.add_argument("--formato", choices=("curvas", "xlsx"), default="curvas", help="Formato de salida.")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla global.")
+    parser.add_argument("--nok", type=float, default=0.2, help="Proporción de procesos NOT OK.")
+    parser.add_argument("--anomalias", nargs="+", choices=ANOMALIES, default=list(ANOMALIES),
+                        help="Anomalías posibles de los procesos NOT OK.")
+    parser.add_argument("--min-puntos", type=int, default=600, help="Puntos mínimos de cada curva.")
+    parser.add_argument("--max-puntos", type=int, default=1500, help="Puntos máximos de cada curva.")
+    parser.add_argument("--ciclo", type=float, default=30.0, help="Segundos medios entre procesos.")
+    args = parser.parse_args()
+
+    write_dataset(args.raiz, n_stations=args.estaciones, files_per_station=args.archivos,
+                  processes_per_file=args.procesos, profile=args.perfil, output_format=args.formato,
+                  seed=args.semilla, nok_ratio=args.nok, anomalies=tuple(args.anomalias),
+                  min_points=args.min_puntos, max_points=args.max_puntos, cycle_seconds=args.ciclo)
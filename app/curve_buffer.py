@@ -0,0 +1,165 @@
+"""
+Búfer Circular de Curvas
+
+Este módulo guarda las curvas de ángulo y par del proceso en curso en arreglos
+float32 preasignados, sin crear un objeto de Python por cada punto.
+
+Imports:
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+
+Clases:
+    - CurveBuffer: Búfer circular de capacidad fija para las curvas de ángulo y par.
+
+Funciones:
+    - validate_window: Comprueba que una ventana se puede agregar a un búfer.
+"""
+
+import numpy as np
+
+OVERFLOW_POLICIES = ("overwrite", "drop", "error")
+
+
+def validate_window(angulo, par, free, overflow):
+    """
+    Comprueba que una ventana se puede agregar a un búfer, sin modificarlo.
+
+    Permite rechazar una ventana antes de vaciar o reemplazar el búfer que la recibiría.
+
+    Args:
+        angulo (array-like): Valores de ángulo de la ventana.
+        par (array-like): Valores de par de la ventana.
+        free (int): Puntos libres en el búfer de destino.
+        overflow (str): Política de desbordamiento del búfer.
+
+    Returns:
+        tuple: Arreglos float32 de ángulo y par.
+
+    Raises:
+        ValueError: Si ángulo y par no tienen la misma longitud.
+        OverflowError: Si la política es `error` y la ventana no cabe.
+    """
+    angulo = np.asarray(angulo, dtype=np.float32).ravel()
+    par = np.asarray(par, dtype=np.float32).ravel()
+    if angulo.shape != par.shape:
+        raise ValueError("Las ventanas de ángulo y par deben tener la misma longitud.")
+    if overflow == "error" and len(angulo) > free:
+        raise OverflowError(f"La curva supera la capacidad del búfer ({free} puntos libres).")
+    return angulo, par
+
+
+class CurveBuffer:
+    """
+    Búfer circular de capacidad fija para las curvas de ángulo y par.
+
+    Cuando el búfer se llena se aplica la política de desbordamiento:
+        - overwrite: se sobrescriben los puntos más antiguos.
+        - drop: se descartan los puntos nuevos que no caben.
+        - error: se lanza `OverflowError` sin modificar el búfer.
+
+    Cada punto recibe un número de secuencia creciente (`total` es el siguiente
+    número a asignar), que se conserva al vaciar el búfer para que los clientes
+    puedan pedir solo los puntos posteriores a un cursor.
+
+    Args:
+        capacity (int): Número máximo de puntos por curva.
+        overflow (str): Política de desbordamiento.
+        start_seq (int): Número de secuencia del primer punto.
+    """
+
+    def __init__(self, capacity=20000, overflow="overwrite", start_seq=0):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desbordamiento no válida: {overflow}. Opciones: {', '.join(OVERFLOW_POLICIES)}.")
+        self.capacity = capacity
+        self.overflow = overflow
+        self._angulo = np.empty(capacity, dtype=np.float32)
+        self._par = np.empty(capacity, dtype=np.float32)
+        self._start = 0
+        self._size = 0
+        self.total = start_seq
+
+    def __len__(self):
+        return self._size
+
+    def append(self, angulo, par):
+        """
+        Agrega una ventana de puntos al final de las curvas.
+
+        Args:
+            angulo (array-like): Valores de ángulo de la ventana.
+            par (array-like): Valores de par de la ventana.
+
+        Returns:
+            int: Número de puntos agregados.
+
+        Raises:
+            ValueError: Si ángulo y par no tienen la misma longitud.
+            OverflowError: Si la política es `error` y la ventana no cabe.
+        """
+        free = self.capacity - self._size
+        angulo, par = validate_window(angulo, par, free, self.overflow)
+
+        n = len(angulo)
+        if n > free:
+            if self.overflow == "drop":
+                n = free
+                angulo, par = angulo[:n], par[:n]
+            elif n > self.capacity:
+                # Solo los últimos `capacity` puntos pueden conservarse
+                angulo, par = angulo[-self.capacity:], par[-self.capacity:]
+                self._start = 0
+                self._size = 0
+                self.total += n - self.capacity
+                n = self.capacity
+        if n == 0:
+            return 0
+
+        overwritten = max(0, self._size + n - self.capacity)
+        end = (self._start + self._size) % self.capacity
+        first = min(n, self.capacity - end)
+        self._angulo[end:end + first] = angulo[:first]
+        self._par[end:end + first] = par[:first]
+        if first < n:
+            self._angulo[:n - first] = angulo[first:]
+            self._par[:n - first] = par[first:]
+
+        self._start = (self._start + overwritten) % self.capacity
+        self._size += n - overwritten
+        self.total += n
+        return n
+
+    def arrays(self):
+        """
+        Devuelve una copia ordenada de las curvas.
+
+        Returns:
+            tuple: Arreglos float32 de ángulo y par, del punto más antiguo al más reciente.
+        """
+        index = (self._start + np.arange(self._size)) % self.capacity
+        return self._angulo[index], self._par[index]
+
+    def since(self, seq):
+        """
+        Devuelve los puntos con número de secuencia mayor o igual a `seq`.
+
+        Args:
+            seq (int): Cursor del cliente.
+
+        Returns:
+            tuple: Arreglos de ángulo y par, y `True` si se perdieron puntos posteriores
+            al cursor porque ya fueron sobrescritos.
+        """
+        oldest = self.total - self._size
+        skip = max(0, min(seq, self.total) - oldest)
+        index = (self._start + np.arange(skip, self._size)) % self.capacity
+        return self._angulo[index], self._par[index], seq < oldest
+
+    def clear(self):
+        """
+        Vacía el búfer conservando la memoria preasignada.
+
+        Returns:
+            CurveBuffer: El mismo búfer, vacío.
+        """
+        self._start = 0
+        self._size = 0
+        return self
@@ -2,148 +2,155 @@
 Despachador de Datos
 
 Este script procesa un archivo Excel y envía los datos al servicio de datos
-para su predicción.
+para su predicción. El ritmo de envío es configurable (lo más rápido posible, tasa
+fija o la cadencia real de la línea según la columna fecha) y al terminar se muestra
+un resumen de latencias y rendimiento.
+
+Uso:
+    python despachador_datos.py <archivo.xlsx> --ventana 500 --modo fijo --tasa 1
+    python despachador_datos.py <archivo.xlsx> --modo real --velocidad 10
+    python despachador_datos.py <archivo.xlsx> --modo max --concurrencia 8 --repeticiones 5
+    python despachador_datos.py <archivo.xlsx> --modo max --formato binario
 
 Imports:
-    - pandas: Librería para manipulación de datos.
+    - argparse: Librería para leer los argumentos de la línea de comandos.
+    - json: Librería para mostrar el resumen.
     - requests: Librería para realizar solicitudes HTTP.
-    - time: Librería para manejo de tiempo.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - excel_cache: Caché columnar de los archivos Excel ya convertidos.
+    - windowing: Ventaneo vectorizado de las curvas.
+    - replay_engine: Motor de reproducción con ritmo controlado.
+    - payload: Formatos en que se pueden enviar las ventanas.
 
 Funciones:
     - check_server_status: Verifica el estado del servidor de datos.
     - prepare_data_for_prediction: Prepara los datos para la predicción.
     - process_excel_and_send_data: Procesa el archivo Excel y envía los datos.
 """
-import pandas as pd
+import argparse
+import json
 import requests
-import time
+import numpy as np
+from excel_cache import load_curves
+from windowing import window_curves
+from replay_engine import PACING_MODES, run_replay
+from payload import PAYLOAD_FORMATS
 
-def check_server_status():
+def check_server_status(base_url="http://localhost:8001"):
     """Verifica si el servidor está en funcionamiento enviando una solicitud GET.
 
+    Args:
+        base_url (str): URL del servicio de datos.
+
     Returns:
         bool: `True` si el servidor responde correctamente, `False` de lo contrario.
     """
     try:
-        response = requests.get("http://localhost:8001/health", timeout=5)
+        response = requests.get(f"{base_url}/health", timeout=5)
         return response.status_code == 200
     except Exception as e:
         print(f"Error al verificar el estado del servidor: {e}")
         return False
 
-def prepare_data_for_prediction(df, window_size):
+def prepare_data_for_prediction(curvas, window_size, stride=None):
     """Prepara los datos para la predicción.
 
     Args:
-        df (DataFrame): DataFrame con los datos.
+        curvas (np.ndarray): Curvas del archivo, alternando ángulo y par de cada proceso.
         window_size (int): Tamaño de la ventana de datos.
+        stride (int): Separación entre ventanas; por defecto `window_size`.
 
     Returns:
-        list: Lista de ventanas de datos y sus índices.
+        tuple: Matriz de ventanas [ángulo..., par...] y el índice del proceso de cada una.
     """
-    X = []
-    for i in range(0, df.shape[1], 2):
-        if i + 1 >= df.shape[1]:
-            break
-        angulo = df.iloc[:, i].dropna().astype(float).values
-        par = df.iloc[:, i + 1].dropna().astype(float).values
-        min_len = min(len(angulo), len(par))
-        if min_len > window_size:
-            for j in range(0, min_len - window_size + 1, window_size):
-                X.append(([angulo[j:j+window_size], par[j:j+window_size]], i))
-    return X
-
-def process_excel_and_send_data(file_path, window_size):
+    X, procesos, _ = window_curves(curvas, window_size, stride)
+    return X, procesos
+
+def process_excel_and_send_data(file_path, window_size, mode="fijo", rate=1.0, speed=1.0, concurrency=1,
+                                estacion="", repeat=1, base_url="http://localhost:8001", payload_format="json",
+                                verbose=True):
     """Procesa un archivo Excel y envía los datos procesados al servidor para predicción.
 
     Args:
         file_path (str): Ruta del archivo Excel a procesar.
         window_size (int): Tamaño de la ventana deslizante para procesamiento de datos.
+        mode (str): Ritmo de envío: max, fijo o real.
+        rate (float): Ventanas por segundo en el modo fijo.
+        speed (float): Factor de aceleración del modo real.
+        concurrency (int): Número de envíos concurrentes (cada uno con su estación).
+        estacion (str): Estación con la que se envían los datos.
+        repeat (int): Número de veces que se reproduce el archivo.
+        base_url (str): URL del servicio de datos.
+        payload_format (str): Formato de las ventanas: json, base64 o binario.
+        verbose (bool): Si se imprime cada envío.
+
+    Returns:
+        dict: Resumen de la reproducción, o `None` si no se pudo enviar nada.
     """
     print(f"Leyendo archivo Excel: {file_path}")
     try:
-        df = pd.read_excel(file_path, sheet_name='Sheet1', header=None)
+        curve_set = load_curves(file_path, "despacho")
     except Exception as e:
         print(f"Error al leer el archivo Excel: {e}")
-        return
-
-    print(f"Dimensiones originales del DataFrame: {df.shape}")
+        return None
 
     # Obtener identificadores y fechas
-    identificadores = df.iloc[:, 3].dropna().astype(str).tolist()
-    fechas = df.iloc[:, 0].dropna().astype(str).tolist()
-
-    # Eliminar columnas 1, 3 y 4
-    df = df.drop(df.columns[[1, 3, 4]], axis=1)
-    df = df.dropna(axis=1, how='all').dropna(how='all')
-    print(f"Dimensiones del DataFrame después de limpieza: {df.shape}")
-    
-    df_transposed = df.transpose().reset_index(drop=True)
-    
-    for col in df_transposed.columns:
-        df_transposed[col] = pd.to_numeric(df_transposed[col], errors='coerce')
-    df_transposed = df_transposed.dropna(how='all')
-    print(f"Dimensiones del DataFrame transpuesto: {df_transposed.shape}")
-
-    X = prepare_data_for_prediction(df_transposed, window_size)
+    identificadores = curve_set.identificadores
+    fechas = curve_set.fechas
+
+    print(f"Dimensiones de las curvas: {curve_set.curvas.shape}")
+
+    X, procesos = prepare_data_for_prediction(curve_set.curvas, window_size)
     print(f"Número de ventanas preparadas: {len(X)}")
     if len(X) == 0:
         print("No hay suficientes datos para procesar este archivo.")
-        return
+        return None
 
-    if not check_server_status():
+    if not check_server_status(base_url):
         print("El servidor no está respondiendo. Por favor, verifica que esté en ejecución.")
-        return
-
-    current_process = -1
-    samples_sent = 0
-
-    for index, (window, process_index) in enumerate(X):
-        if process_index != current_process:
-            current_process = process_index
-            reset = True
-            print(f"Preparando datos del atornillado {current_process // 2 + 1}")
-        else:
-            reset = False
-
-        angulo, par = window
-
-        # Usar el identificador y la fecha correspondientes
-        identificador = identificadores[process_index // 2]
-        fecha = fechas[process_index // 2]
-
-        json_data = {
-            "angulo": angulo.tolist(),
-            "par": par.tolist(),
-            "reset": reset,
-            "identificador": identificador,
-            "fecha": fecha  # Añadido campo de fecha
-        }
-
-        print(f"Enviando datos: reset={reset}, longitud angulo={len(angulo)}, longitud par={len(par)}, identificador={json_data['identificador']}, fecha={json_data['fecha']}")
-        try:
-            start_time = time.time()
-            response = requests.post("http://localhost:8001/data", json=json_data, timeout=60)
-            end_time = time.time()
-            print(f"Tiempo de respuesta del servidor: {end_time - start_time:.2f} segundos")
-            response.raise_for_status()
-            print(f"Respuesta del servidor: {response.text}")
-            samples_sent += 1
-        except requests.exceptions.Timeout:
-            print("Tiempo de espera agotado al enviar datos al servidor.")
-        except requests.exceptions.RequestException as e:
-            print(f"Error al enviar datos: {e}")
-            print(f"Contenido de la respuesta: {e.response.text if e.response else 'No hay respuesta'}")
-        
-        time.sleep(1)  # Pausa entre envíos
-
-    print(f"Proceso completado. Se enviaron {samples_sent} muestras.")
+        return None
+
+    if repeat > 1:
+        # Repetir el archivo como procesos nuevos para generar más carga. El desplazamiento
+        # es el número de procesos del archivo (uno por identificador), no el último con
+        # ventanas: los procesos finales demasiado cortos no generan ninguna
+        n_processes = len(identificadores)
+        procesos = np.concatenate([procesos + r * n_processes for r in range(repeat)])
+        X = np.concatenate([X] * repeat)
+        identificadores = list(identificadores) * repeat
+        fechas = list(fechas) * repeat
+
+    print(f"Enviando {len(X)} ventanas en modo {mode} con concurrencia {concurrency}")
+    stats = run_replay(X, procesos, identificadores, fechas, window_size, base_url=base_url, mode=mode,
+                       rate=rate, speed=speed, concurrency=concurrency, estacion=estacion,
+                       payload_format=payload_format, verbose=verbose)
+    summary = stats.summary()
+    print(f"Proceso completado. Se enviaron {summary['enviadas'] - summary['errores']} muestras.")
+    return summary
 
 if __name__ == "__main__":
-    window_size = 500  # Ajusta según corresponda
     excel_file_path = r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\src\new_data\4146_PF4_A218izq_T12\4_10-07.xlsx'
-    
-    print("Iniciando proceso de envío de datos...")
-    process_excel_and_send_data(excel_file_path, window_size)
-    print("Proceso finalizado.")
 
+    parser = argparse.ArgumentParser(description="Reproduce un archivo de atornillados contra el servicio de datos.")
+    parser.add_argument("archivo", nargs="?", default=excel_file_path, help="Archivo .xlsx (o carpeta .curvas) a reproducir.")
+    parser.add_argument("--ventana", type=int, default=500, help="Tamaño de la ventana de datos.")
+    parser.add_argument("--modo", choices=PACING_MODES, default="fijo", help="Ritmo de envío.")
+    parser.add_argument("--tasa", type=float, default=1.0, help="Ventanas por segundo en el modo fijo.")
+    parser.add_argument("--velocidad", type=float, default=1.0, help="Factor de aceleración del modo real.")
+    parser.add_argument("--concurrencia", type=int, default=1, help="Envíos concurrentes.")
+    parser.add_argument("--estacion", default="", help="Estación con la que se envían los datos.")
+    parser.add_argument("--repeticiones", type=int, default=1, help="Veces que se reproduce el archivo.")
+    parser.add_argument("--url", default="http://localhost:8001", help="URL del servicio de datos.")
+    parser.add_argument("--formato", choices=PAYLOAD_FORMATS, default="json", help="Formato de las ventanas.")
+    parser.add_argument("--silencioso", action="store_true", help="No imprime cada envío.")
+    args = parser.parse_args()
+
+    print("Iniciando proceso de envío de datos...")
+    summary = process_excel_and_send_data(args.archivo, args.ventana, mode=args.modo, rate=args.tasa,
+                                          speed=args.velocidad, concurrency=args.concurrencia,
+                                          estacion=args.estacion, repeat=args.repeticiones,
+                                          base_url=args.url, payload_format=args.formato,
+                                          verbose=not args.silencioso)
+    if summary is not None:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    print("Proceso finalizado.")
\ No newline at end of file
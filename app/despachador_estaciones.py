@@ -0,0 +1,295 @@
+"""
+Despachador de Estaciones
+
+Este script simula una planta completa: recorre una carpeta raíz con una subcarpeta
+por estación (`<raiz>/<estacion>/*.xlsx`, o carpetas `*.curvas` ya convertidas) y
+envía concurrentemente los datos de todas las estaciones al servicio de datos.
+
+Cada estación es un flujo lógico independiente que envía sus archivos y ventanas en
+orden, con `reset` al empezar cada atornillado. Si el servicio responde con errores
+o se vuelve lento, la estación reduce su ritmo (y reintenta la misma ventana en caso
+de error) y lo recupera poco a poco cuando las respuestas vuelven a ser rápidas. Un
+límite global de envíos simultáneos evita saturar el servicio.
+
+Uso:
+    python despachador_estaciones.py ../src/new_data --ventana 500 --tasa 1
+    python despachador_estaciones.py ../src/new_data --tasa 0 --max-envios 16
+    python despachador_estaciones.py ../src/new_data --tasa 0 --formato binario
+
+Imports:
+    - argparse: Librería para leer los argumentos de la línea de comandos.
+    - asyncio: Librería para ejecutar las estaciones de forma concurrente.
+    - json: Librería para mostrar el resumen.
+    - os: Librería para interactuar con el sistema operativo.
+    - time: Librería para manejo de tiempo.
+    - httpx: Cliente HTTP asíncrono.
+    - excel_cache: Caché columnar de los archivos Excel ya convertidos.
+    - windowing: Ventaneo vectorizado de las curvas.
+    - replay_engine: Estadísticas de latencia de los envíos.
+    - payload: Formato en que se envían las ventanas.
+
+Clases:
+    - StationStream: Flujo de envío de una estación con control de ritmo.
+
+Funciones:
+    - discover_stations: Encuentra las estaciones y sus archivos.
+    - dispatch_plant: Envía concurrentemente los datos de todas las estaciones.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from excel_cache import load_curves, source_files
+from windowing import window_curves
+from replay_engine import ReplayStats
+from payload import PAYLOAD_FORMATS, encode_request
+
+# Códigos que indican que el servicio está saturado o caído: se reintenta la ventana
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def discover_stations(root):
+    """
+    Encuentra las estaciones de una carpeta raíz y sus archivos.
+
+    Args:
+        root (str): Carpeta con una subcarpeta por estación.
+
+    Returns:
+        dict: Lista ordenada de archivos (.xlsx o carpetas .curvas) de cada estación.
+    """
+    stations = {}
+    for folder in sorted(os.scandir(root), key=lambda entry: entry.name):
+        if not folder.is_dir() or folder.name.startswith('.'):
+            continue
+        files = source_files(folder.path)
+        if files:
+            stations[folder.name] = files
+    return stations
+
+
+class StationStream:
+    """
+    Flujo de envío de una estación con control de ritmo.
+
+    El intervalo entre ventanas es `1 / rate` más un retraso adaptativo: ante un
+    error se duplica (y la ventana se reintenta), ante una respuesta lenta crece en
+    `slow_step` y ante una respuesta rápida se reduce a la mitad.
+
+    Args:
+        estacion (str): Nombre de la estación.
+        files (list): Archivos de la estación, en orden.
+        window_size (int): Tamaño de la ventana de datos.
+        rate (float): Ventanas por segundo de la estación; 0 para enviar sin pausa.
+        slow_threshold (float): Latencia en segundos a partir de la cual se frena.
+        slow_step (float): Segundos que se añaden al retraso por cada respuesta lenta.
+        max_backoff (float): Retraso adaptativo máximo en segundos.
+        max_retries (int): Reintentos de una ventana antes de darla por perdida.
+        payload_format (str): Formato de las ventanas (json, base64 o binario).
+        verbose (bool): Si se imprime cada envío.
+    """
+
+    def __init__(self, estacion, files, window_size, rate=1.0, slow_threshold=1.0, slow_step=0.1,
+                 max_backoff=30.0, max_retries=5, payload_format="json", verbose=False):
+        self.estacion = estacion
+        self.files = files
+        self.window_size = window_size
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.slow_threshold = slow_threshold
+        self.slow_step = slow_step
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.payload_format = payload_format
+        self.verbose = verbose
+        self.backoff = 0.0
+        self.retries = 0
+        self.dropped = 0
+        self.stats = ReplayStats()
+
+    def _adapt(self, latency, failed):
+        """
+        Ajusta el retraso adaptativo según el resultado de un envío.
+
+        Args:
+            latency (float): Latencia del envío en segundos.
+            failed (bool): Si el envío falló.
+        """
+        if failed:
+            self.backoff = min(self.max_backoff, max(2 * self.backoff, 0.1))
+        elif latency > self.slow_threshold:
+            self.backoff = min(self.max_backoff, self.backoff + self.slow_step)
+        else:
+            self.backoff /= 2
+            if self.backoff < 0.01:
+                self.backoff = 0.0
+
+    async def _send(self, client, limit, angulo, par, fields):
+        """
+        Envía una ventana, reintentándola mientras el servicio esté saturado.
+
+        Args:
+            client (httpx.AsyncClient): Cliente HTTP compartido.
+            limit (asyncio.Semaphore): Límite global de envíos simultáneos.
+            angulo (np.ndarray): Valores de ángulo de la ventana.
+            par (np.ndarray): Valores de par de la ventana.
+            fields (dict): Resto de campos de la ventana.
+
+        Returns:
+            bool: `True` si la ventana se entregó.
+        """
+        params, headers, body = encode_request(angulo, par, fields, self.payload_format)
+        for attempt in range(self.max_retries + 1):
+            scheduled = time.perf_counter()
+            async with limit:
+                sent_at = time.perf_counter()
+                try:
+                    response = await client.post("/data", params=params, content=body, headers=headers)
+                    status_code = response.status_code
+                except httpx.HTTPError as e:
+                    response, status_code = None, None
+                    if self.verbose:
+                        print(f"[{self.estacion}] Error al enviar datos: {e}")
+            latency = time.perf_counter() - sent_at
+            retry = response is None or status_code in RETRY_STATUS
+            ok = response is not None and response.is_success
+            self.stats.record(latency if ok else None, sent_at - scheduled, status_code)
+            self._adapt(latency, not ok)
+            if self.verbose:
+                print(f"[{self.estacion}] reset={fields['reset']} {status_code} en {latency * 1000:.1f} ms")
+            if ok or not retry:
+                return ok
+            self.retries += 1
+            delay = self.backoff
+            if response is not None and response.headers.get("retry-after", "").isdigit():
+                delay = max(delay, float(response.headers["retry-after"]))
+            await asyncio.sleep(delay)
+        return False
+
+    async def run(self, client, limit):
+        """
+        Envía en orden todas las ventanas de la estación.
+
+        Args:
+            client (httpx.AsyncClient): Cliente HTTP compartido.
+            limit (asyncio.Semaphore): Límite global de envíos simultáneos.
+        """
+        loop = asyncio.get_running_loop()
+        self.stats.started_at = time.perf_counter()
+        for file_path in self.files:
+            try:
+                # La lectura del Excel es bloqueante: se hace fuera del bucle de eventos
+                curve_set = await loop.run_in_executor(None, load_curves, file_path, "despacho")
+            except Exception as e:
+                print(f"[{self.estacion}] Error al leer {file_path}: {e}")
+                continue
+            X, procesos, _ = window_curves(curve_set.curvas, self.window_size)
+            identificadores, fechas = curve_set.identificadores, curve_set.fechas
+            print(f"[{self.estacion}] {os.path.basename(file_path)}: {len(X)} ventanas")
+
+            current_process, pending_reset = -1, False
+            next_send = time.perf_counter()
+            for i in range(len(X)):
+                process_index = int(procesos[i])
+                # Si la primera ventana de un atornillado se pierde, el reinicio pasa a la siguiente
+                reset = process_index != current_process or pending_reset
+                current_process = process_index
+
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                fields = {
+                    "reset": reset,
+                    "identificador": identificadores[process_index] if process_index < len(identificadores) else "",
+                    "fecha": fechas[process_index] if process_index < len(fechas) else "",
+                    "estacion": self.estacion,
+                }
+                delivered = await self._send(client, limit, X[i, :self.window_size], X[i, self.window_size:], fields)
+                pending_reset = reset and not delivered
+                if not delivered:
+                    self.dropped += 1
+                next_send = max(next_send + self.interval, time.perf_counter()) + self.backoff
+        self.stats.finished_at = time.perf_counter()
+
+    def summary(self):
+        """
+        Resume los envíos de la estación.
+
+        Returns:
+            dict: Resumen de latencias más los reintentos, las ventanas perdidas y el retraso final.
+        """
+        result = self.stats.summary()
+        result.update(reintentos=self.retries, perdidas=self.dropped, retraso_adaptativo_s=round(self.backoff, 3))
+        return result
+
+
+async def dispatch_plant(root, window_size, base_url="http://localhost:8001", rate=1.0, max_in_flight=8,
+                         stations=None, timeout=60, verbose=False, **stream_options):
+    """
+    Envía concurrentemente los datos de todas las estaciones de una carpeta raíz.
+
+    Args:
+        root (str): Carpeta con una subcarpeta por estación.
+        window_size (int): Tamaño de la ventana de datos.
+        base_url (str): URL del servicio de datos.
+        rate (float): Ventanas por segundo de cada estación; 0 para enviar sin pausa.
+        max_in_flight (int): Envíos simultáneos máximos entre todas las estaciones.
+        stations (list): Estaciones a simular; por defecto todas.
+        timeout (float): Tiempo máximo de cada envío en segundos.
+        verbose (bool): Si se imprime cada envío.
+        **stream_options: Parámetros adicionales de `StationStream`.
+
+    Returns:
+        dict: Resumen de cada estación y del total.
+    """
+    found = discover_stations(root)
+    if stations:
+        found = {name: files for name, files in found.items() if name in stations}
+    streams = [StationStream(name, files, window_size, rate=rate, verbose=verbose, **stream_options)
+               for name, files in found.items()]
+    print(f"Estaciones: {', '.join(found) or 'ninguna'}")
+
+    limit = asyncio.Semaphore(max(1, max_in_flight))
+    started_at = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=max(1, max_in_flight))) as client:
+        await asyncio.gather(*(stream.run(client, limit) for stream in streams))
+    duration = time.perf_counter() - started_at
+
+    summaries = {stream.estacion: stream.summary() for stream in streams}
+    sent = sum(summary["enviadas"] for summary in summaries.values())
+    return {
+        "estaciones": summaries,
+        "total": {
+            "enviadas": sent,
+            "errores": sum(summary["errores"] for summary in summaries.values()),
+            "perdidas": sum(summary["perdidas"] for summary in summaries.values()),
+            "duracion_s": round(duration, 3),
+            "ventanas_por_s": round(sent / duration, 2) if duration > 0 else 0.0,
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simula todas las estaciones de una carpeta contra el servicio de datos.")
+    parser.add_argument("raiz", help="Carpeta con una subcarpeta de archivos .xlsx por estación.")
+    parser.add_argument("--ventana", type=int, default=500, help="Tamaño de la ventana de datos.")
+    parser.add_argument("--tasa", type=float, default=1.0, help="Ventanas por segundo de cada estación (0 = sin pausa).")
+    parser.add_argument("--max-envios", type=int, default=8, help="Envíos simultáneos máximos entre todas las estaciones.")
+    parser.add_argument("--estaciones", nargs="*", help="Estaciones a simular; por defecto todas.")
+    parser.add_argument("--umbral-lento", type=float, default=1.0, help="Latencia (s) a partir de la cual una estación frena.")
+    parser.add_argument("--reintentos", type=int, default=5, help="Reintentos de una ventana antes de darla por perdida.")
+    parser.add_argument("--url", default="http://localhost:8001", help="URL del servicio de datos.")
+    parser.add_argument("--formato", choices=PAYLOAD_FORMATS, default="json", help="Formato de las ventanas.")
+    parser.add_argument("--verbose", action="store_true", help="Imprime cada envío.")
+    args = parser.parse_args()
+
+    summary = asyncio.run(dispatch_plant(args.raiz, args.ventana, base_url=args.url, rate=args.tasa,
+                                         max_in_flight=args.max_envios, stations=args.estaciones,
+                                         verbose=args.verbose, slow_threshold=args.umbral_lento,
+                                         max_retries=args.reintentos, payload_format=args.formato))
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
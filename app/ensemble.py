@@ -0,0 +1,77 @@
+"""
+Ensamble de Votación Suave con Modelos ya Entrenados
+
+Este módulo define un ensamble que promedia las probabilidades de modelos que ya
+fueron entrenados. A diferencia de `VotingClassifier` de scikit-learn, no clona ni
+vuelve a entrenar a sus miembros, por lo que el entrenamiento paga una sola vez por
+XGBoost y LightGBM. Expone la misma interfaz `predict`/`predict_proba` que usa
+model_service.
+
+Imports:
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+
+Clases:
+    - PrefitSoftVotingEnsemble: Ensamble de votación suave sobre modelos ya entrenados.
+"""
+
+import numpy as np
+
+
+class PrefitSoftVotingEnsemble:
+    """
+    Ensamble de votación suave sobre modelos ya entrenados.
+
+    Equivale a `VotingClassifier(voting='soft')` sin pesos: la probabilidad de cada
+    clase es el promedio de las probabilidades de los miembros y la predicción es la
+    clase de mayor probabilidad.
+
+    Args:
+        estimators (list): Pares (nombre, modelo) ya entrenados con las mismas clases.
+
+    Raises:
+        ValueError: Si no hay modelos o si no comparten las mismas clases.
+    """
+
+    def __init__(self, estimators):
+        if not estimators:
+            raise ValueError("El ensamble necesita al menos un modelo.")
+        self.estimators = list(estimators)
+        self.classes_ = np.asarray(self.estimators[0][1].classes_)
+        for name, estimator in self.estimators[1:]:
+            if not np.array_equal(np.asarray(estimator.classes_), self.classes_):
+                raise ValueError(f"El modelo {name} no tiene las mismas clases que el resto del ensamble.")
+
+    @property
+    def named_estimators_(self):
+        """
+        Devuelve los modelos del ensamble por nombre, como `VotingClassifier`.
+
+        Returns:
+            dict: Modelos indexados por nombre.
+        """
+        return dict(self.estimators)
+
+    def predict_proba(self, X):
+        """
+        Calcula la probabilidad promedio de cada clase.
+
+        Args:
+            X (np.ndarray): Matriz de forma (n_muestras, n_variables) ya escalada.
+
+        Returns:
+            np.ndarray: Probabilidades de forma (n_muestras, n_clases).
+        """
+        probs = [estimator.predict_proba(X) for _, estimator in self.estimators]
+        return np.mean(probs, axis=0)
+
+    def predict(self, X):
+        """
+        Predice la clase de mayor probabilidad promedio.
+
+        Args:
+            X (np.ndarray): Matriz de forma (n_muestras, n_variables) ya escalada.
+
+        Returns:
+            np.ndarray: Clase predicha de cada muestra.
+        """
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
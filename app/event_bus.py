@@ -0,0 +1,128 @@
+"""
+Bus de Eventos para Suscriptores en Tiempo Real
+
+Este módulo reparte los eventos del servicio de datos (ventanas nuevas, predicciones
+y reinicios de proceso) entre los clientes suscritos al canal de streaming.
+
+Imports:
+    - asyncio: Librería para programación asíncrona.
+    - json: Librería para serializar los eventos.
+
+Clases:
+    - Subscriber: Cola de eventos de un cliente.
+    - EventBus: Publica eventos a todos los suscriptores con control de contrapresión.
+
+Funciones:
+    - format_sse: Da formato de Server-Sent Events a un evento.
+"""
+
+import asyncio
+import json
+
+
+class Subscriber:
+    """
+    Cola de eventos de un cliente.
+
+    Atributos:
+        queue (asyncio.Queue): Eventos pendientes de enviar.
+        estacion (str): Estación a la que se suscribe el cliente, o `None` para todas.
+        dropped (bool): Indica si el cliente fue desconectado por ser demasiado lento.
+    """
+
+    def __init__(self, max_queue, estacion=None):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.estacion = estacion
+        self.dropped = False
+
+
+class EventBus:
+    """
+    Publica eventos a todos los suscriptores.
+
+    La publicación nunca bloquea: si la cola de un suscriptor está llena, ese
+    suscriptor se descarta y su flujo se cierra con un evento `dropped` para que
+    vuelva a conectarse y pida una instantánea. Debe usarse desde el bucle de eventos.
+
+    Args:
+        max_queue (int): Número máximo de eventos pendientes por suscriptor.
+    """
+
+    def __init__(self, max_queue=256):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self.dropped = 0
+
+    def subscribe(self, estacion=None):
+        """
+        Registra un nuevo suscriptor.
+
+        Args:
+            estacion (str): Estación de interés, o `None` para todas.
+
+        Returns:
+            Subscriber: Suscriptor registrado.
+        """
+        subscriber = Subscriber(self.max_queue, estacion)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        Elimina un suscriptor.
+
+        Args:
+            subscriber (Subscriber): Suscriptor a eliminar.
+        """
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event, estacion, payload):
+        """
+        Publica un evento a los suscriptores interesados.
+
+        Args:
+            event (str): Tipo de evento (ventana, prediccion o reset).
+            estacion (str): Estación que originó el evento.
+            payload (dict): Datos del evento.
+        """
+        if not self._subscribers:
+            return
+        message = format_sse(event, payload)
+        for subscriber in list(self._subscribers):
+            if subscriber.estacion is not None and subscriber.estacion != estacion:
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        """
+        Descarta un suscriptor lento y le deja solo el aviso de desconexión.
+
+        Args:
+            subscriber (Subscriber): Suscriptor a descartar.
+        """
+        self._subscribers.discard(subscriber)
+        subscriber.dropped = True
+        self.dropped += 1
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(format_sse("dropped", {"reason": "slow consumer"}))
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+def format_sse(event, payload):
+    """
+    Da formato de Server-Sent Events a un evento.
+
+    Args:
+        event (str): Tipo de evento.
+        payload (dict): Datos del evento.
+
+    Returns:
+        str: Mensaje listo para enviarse por el flujo.
+    """
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
@@ -0,0 +1,229 @@
+"""
+Caché Columnar de Exportaciones de Atornillado
+
+Este módulo convierte una sola vez cada archivo .xlsx de curvas de atornillado a un
+formato compacto en disco (arreglo float32 que se abre con mmap más una tabla de
+metadatos), de modo que las lecturas siguientes no vuelvan a interpretar el Excel.
+
+Cada entrada se identifica por el hash SHA-1 del contenido del archivo y el perfil
+de limpieza, por lo que se invalida sola cuando el archivo cambia.
+
+Imports:
+    - hashlib: Librería para calcular el hash del archivo.
+    - json: Librería para guardar los metadatos.
+    - os: Librería para interactuar con el sistema operativo.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - pandas: Librería para manipulación de datos.
+
+Clases:
+    - CurveSet: Curvas de un archivo y sus metadatos.
+
+Funciones:
+    - file_hash: Calcula el hash del contenido de un archivo.
+    - clean_sheet: Aplica la limpieza de un perfil a la hoja leída del Excel.
+    - write_curves: Guarda un conjunto de curvas en el formato de la caché.
+    - read_curves: Lee un conjunto de curvas guardado en el formato de la caché.
+    - load_curves: Lee las curvas de un archivo pasando por la caché.
+    - source_files: Lista los archivos de curvas de una carpeta.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 1
+
+# Perfiles de limpieza de cada tipo de exportación:
+#   - despacho: columnas 0 fecha, 1 etiqueta, 2 estación, 3 identificador, 4 resultado, 5+ datos.
+#   - entrenamiento: columnas 0 fecha, 1 etiqueta, 2 estación, 3+ datos; la etiqueta queda
+#     como primer valor de cada curva.
+PROFILES = {
+    "despacho": {"drop": [1, 3, 4], "label_row": False},
+    "entrenamiento": {"drop": [0, 2], "label_row": True},
+}
+
+
+class CurveSet:
+    """
+    Curvas de un archivo y sus metadatos.
+
+    Las filas de `curvas` alternan ángulo (filas pares) y par (filas impares) de cada
+    proceso, en el mismo orden que las columnas del DataFrame transpuesto que usaban
+    los scripts originales; los valores faltantes quedan como NaN.
+
+    Atributos:
+        curvas (np.ndarray): Matriz float32 de forma (n_curvas, n_puntos).
+        etiquetas (np.ndarray): Etiqueta de cada curva (perfil entrenamiento) o `None`.
+        fechas (list): Fechas de la columna 0 del Excel.
+        identificadores (list): Identificadores de la columna 3 del Excel.
+    """
+
+    def __init__(self, curvas, etiquetas=None, fechas=None, identificadores=None):
+        self.curvas = curvas
+        self.etiquetas = etiquetas
+        self.fechas = fechas or []
+        self.identificadores = identificadores or []
+
+    def __len__(self):
+        return len(self.curvas)
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """
+    Calcula el hash del contenido de un archivo.
+
+    Args:
+        file_path (str): Ruta del archivo.
+        chunk_size (int): Tamaño de los bloques de lectura.
+
+    Returns:
+        str: Hash SHA-1 en hexadecimal.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clean_sheet(df, profile):
+    """
+    Aplica la limpieza de un perfil a la hoja leída del Excel.
+
+    Reproduce los pasos de los scripts originales: eliminar columnas de metadatos,
+    descartar filas y columnas vacías, transponer y convertir a numérico.
+
+    Args:
+        df (DataFrame): Hoja leída con `pd.read_excel(..., header=None)`.
+        profile (str): Perfil de limpieza (despacho o entrenamiento).
+
+    Returns:
+        CurveSet: Curvas y metadatos del archivo.
+    """
+    settings = PROFILES[profile]
+    fechas = df.iloc[:, 0].dropna().astype(str).tolist()
+    identificadores = df.iloc[:, 3].dropna().astype(str).tolist() if profile == "despacho" else []
+
+    df = df.drop(df.columns[settings["drop"]], axis=1)
+    df = df.dropna(axis=1, how='all').dropna(how='all')
+    df_transposed = df.transpose().reset_index(drop=True)
+    df_transposed = df_transposed.apply(pd.to_numeric, errors='coerce').dropna(how='all')
+
+    curvas = df_transposed.to_numpy(dtype=np.float32).T
+    etiquetas = None
+    if settings["label_row"]:
+        etiquetas = curvas[:, 0].copy()
+        curvas = curvas[:, 1:]
+    return CurveSet(np.ascontiguousarray(curvas), etiquetas, fechas, identificadores)
+
+
+def write_curves(directory, curve_set, source=None):
+    """
+    Guarda un conjunto de curvas en el formato de la caché.
+
+    Args:
+        directory (str): Carpeta de destino.
+        curve_set (CurveSet): Curvas y metadatos a guardar.
+        source (str): Archivo de origen, guardado como referencia.
+    """
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'curvas.npy'), curve_set.curvas)
+    if curve_set.etiquetas is not None:
+        np.save(os.path.join(directory, 'etiquetas.npy'), curve_set.etiquetas)
+    meta = {
+        "version": CACHE_VERSION,
+        "source": source,
+        "fechas": curve_set.fechas,
+        "identificadores": curve_set.identificadores,
+    }
+    # El archivo de metadatos se escribe al final y marca la entrada como completa
+    tmp_path = os.path.join(directory, 'meta.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+
+def read_curves(directory, mmap=True):
+    """
+    Lee un conjunto de curvas guardado en el formato de la caché.
+
+    Args:
+        directory (str): Carpeta de la entrada.
+        mmap (bool): Si las curvas se abren con mmap en lugar de copiarse a memoria.
+
+    Returns:
+        CurveSet: Curvas y metadatos, o `None` si la entrada no existe o está incompleta.
+    """
+    meta_path = os.path.join(directory, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    mmap_mode = 'r' if mmap else None
+    curvas = np.load(os.path.join(directory, 'curvas.npy'), mmap_mode=mmap_mode)
+    etiquetas_path = os.path.join(directory, 'etiquetas.npy')
+    etiquetas = np.load(etiquetas_path) if os.path.exists(etiquetas_path) else None
+    return CurveSet(curvas, etiquetas, meta["fechas"], meta["identificadores"])
+
+
+def load_curves(file_path, profile, cache_dir=None, mmap=True):
+    """
+    Lee las curvas de un archivo pasando por la caché.
+
+    Si `file_path` es una carpeta con el formato de la caché (por ejemplo `*.curvas`)
+    se lee directamente. Si es un .xlsx, se busca la entrada de su hash y, si no
+    existe, se lee el Excel, se limpia y se guarda en la caché.
+
+    Args:
+        file_path (str): Ruta del archivo .xlsx o de la carpeta de curvas.
+        profile (str): Perfil de limpieza (despacho o entrenamiento).
+        cache_dir (str): Carpeta de la caché; por defecto `EXCEL_CACHE_DIR` o `.cache_curvas`
+            junto al archivo.
+        mmap (bool): Si las curvas se abren con mmap en lugar de copiarse a memoria.
+
+    Returns:
+        CurveSet: Curvas y metadatos del archivo.
+    """
+    if os.path.isdir(file_path):
+        curve_set = read_curves(file_path, mmap=mmap)
+        if curve_set is None:
+            raise FileNotFoundError(f"La carpeta {file_path} no contiene curvas convertidas.")
+        return curve_set
+
+    if cache_dir is None:
+        cache_dir = os.environ.get("EXCEL_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(file_path)), '.cache_curvas')
+    entry = os.path.join(cache_dir, f"{file_hash(file_path)}_{profile}")
+    curve_set = read_curves(entry, mmap=mmap)
+    if curve_set is not None:
+        return curve_set
+
+    df = pd.read_excel(file_path, sheet_name='Sheet1', header=None)
+    curve_set = clean_sheet(df, profile)
+    write_curves(entry, curve_set, source=os.path.abspath(file_path))
+    return read_curves(entry, mmap=mmap)
+
+
+def source_files(folder_path):
+    """
+    Lista los archivos de curvas de una carpeta.
+
+    Incluye las exportaciones .xlsx y las carpetas `*.curvas` que ya están en el
+    formato de la caché (por ejemplo, las del generador de curvas sintéticas), y
+    omite los archivos ocultos y los temporales de Excel (`~$`).
+
+    Args:
+        folder_path (str): Carpeta a recorrer.
+
+    Returns:
+        list: Rutas ordenadas por nombre.
+    """
+    return [
+        entry.path for entry in sorted(os.scandir(folder_path), key=lambda entry: entry.name)
+        if not entry.name.startswith(('.', '~$'))
+        and ((entry.is_file() and entry.name.endswith('.xlsx')) or (entry.is_dir() and entry.name.endswith('.curvas')))
+    ]
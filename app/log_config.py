@@ -0,0 +1,150 @@
+"""
+Configuración de Logs de los Servicios
+
+Este módulo reemplaza los `print` de los servicios por logs con nivel. Los mensajes
+se pasan a un hilo de escritura mediante una cola, de modo que ninguna solicitud
+espera a que se escriba en la consola, y cada tipo de mensaje se limita a un número
+máximo por intervalo para que un error repetido en cada ventana no inunde la salida.
+
+Variables de entorno:
+    - LOG_LEVEL: Nivel mínimo (DEBUG, INFO, WARNING, ERROR); por defecto INFO.
+    - LOG_RATE_LIMIT: Mensajes de un mismo tipo por intervalo; 0 desactiva el límite.
+    - LOG_RATE_INTERVAL: Duración del intervalo en segundos.
+
+Imports:
+    - atexit: Librería para vaciar la cola al terminar el proceso.
+    - logging: Librería de logs estándar.
+    - logging.handlers: Manejadores con cola para escribir en segundo plano.
+    - os: Librería para interactuar con el sistema operativo.
+    - queue: Librería de colas seguras entre hilos.
+    - threading: Librería para manejar hilos.
+    - time: Librería para manejo de tiempo.
+
+Clases:
+    - RateLimitFilter: Limita los mensajes de un mismo tipo por intervalo.
+
+Funciones:
+    - get_logger: Devuelve un logger configurado para los servicios.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT", "10"))
+LOG_RATE_INTERVAL = float(os.environ.get("LOG_RATE_INTERVAL", "10"))
+
+_handler = None
+_handler_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita los mensajes de un mismo tipo por intervalo.
+
+    El tipo de un mensaje es su plantilla sin formatear (por ejemplo
+    `"Error en la predicción: %s"`) y su nivel. Al empezar un intervalo nuevo, el
+    primer mensaje indica cuántos se omitieron en el anterior.
+
+    Args:
+        limit (int): Mensajes permitidos de cada tipo por intervalo; 0 sin límite.
+        interval (float): Duración del intervalo en segundos.
+    """
+
+    def __init__(self, limit=LOG_RATE_LIMIT, interval=LOG_RATE_INTERVAL):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.limit <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            started_at, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started_at >= self.interval:
+                if suppressed:
+                    record.msg = f"{record.msg} (se omitieron {suppressed} mensajes similares)"
+                started_at, count, suppressed = now, 0, 0
+            count += 1
+            allowed = count <= self.limit
+            self._windows[key] = (started_at, count, suppressed + (not allowed))
+        return allowed
+
+
+class _BackgroundHandler(logging.handlers.QueueHandler):
+    """
+    Manejador que encola los mensajes y los escribe desde un hilo en segundo plano.
+
+    El hilo de escritura se inicia en el primer mensaje de cada proceso, por lo que
+    los workers creados con `fork` (que no heredan los hilos) tienen el suyo.
+
+    Args:
+        target (logging.Handler): Manejador que escribe los mensajes.
+    """
+
+    def __init__(self, target):
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        super().enqueue(record)
+
+    def _start_listener(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Cola nueva: la heredada puede contener mensajes del proceso padre
+            self.queue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(self.queue, self.target)
+            listener.start()
+            # Escribir los mensajes pendientes al terminar el proceso
+            atexit.register(listener.stop)
+            self._pid = os.getpid()
+
+
+def _queue_handler():
+    """
+    Devuelve el manejador con cola compartido por todos los loggers de los servicios.
+
+    Returns:
+        logging.Handler: Manejador que encola los mensajes para el hilo de escritura.
+    """
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            output = logging.StreamHandler()
+            output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+            _handler = _BackgroundHandler(output)
+        return _handler
+
+
+def get_logger(name):
+    """
+    Devuelve un logger configurado para los servicios.
+
+    Args:
+        name (str): Nombre del logger, normalmente el del módulo.
+
+    Returns:
+        logging.Logger: Logger con nivel, límite de frecuencia y escritura en segundo plano.
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.setLevel(LOG_LEVEL)
+        logger.addFilter(RateLimitFilter())
+        logger.addHandler(_queue_handler())
+        logger.propagate = False
+    return logger
@@ -4,6 +4,7 @@ Iniciador de Servicios
 Este script inicia los servicios de predicción, datos y la aplicación de visualización.
 
 Imports:
+    - argparse: Librería para leer los argumentos de la línea de comandos.
     - multiprocessing: Librería para manejar procesos en paralelo.
     - subprocess: Librería para ejecutar comandos del sistema.
     - time: Librería para manejo de tiempo.
@@ -12,8 +13,13 @@ Imports:
 
 Funciones:
     - start_streamlit_service: Inicia el servicio de Streamlit.
+
+Uso:
+    python main.py             # model_service y prediction_service en procesos separados
+    python main.py --embedded  # un solo proceso: prediction_service calcula las predicciones
 """
 
+import argparse
 import multiprocessing
 from model_service import start_service as start_prediction_service
 from prediction_service import start_service as start_data_service
@@ -27,15 +33,27 @@ def start_streamlit_service():
     subprocess.run(["streamlit", "run", "visualization_service.py"])
 
 if __name__ == "__main__":
-    # Iniciar el servicio de predicción
-    p1 = multiprocessing.Process(target=start_prediction_service)
-    p1.start()
-    print("Servicio de Predicción iniciado en http://localhost:8000")
+    parser = argparse.ArgumentParser(description="Inicia los servicios de predicción, datos y visualización.")
+    parser.add_argument("--embedded", action="store_true",
+                        help="Calcula las predicciones dentro del servicio de datos, sin el salto HTTP a model_service.")
+    args = parser.parse_args()
+
+    processes = []
+    if not args.embedded:
+        # Iniciar el servicio de predicción
+        p1 = multiprocessing.Process(target=start_prediction_service)
+        p1.start()
+        processes.append(p1)
+        print("Servicio de Predicción iniciado en http://localhost:8000")
 
     # Iniciar el servicio de datos
-    p2 = multiprocessing.Process(target=start_data_service)
+    p2 = multiprocessing.Process(target=start_data_service, kwargs={"embedded": args.embedded})
     p2.start()
-    print("Servicio de Datos iniciado en http://localhost:8001")
+    processes.append(p2)
+    if args.embedded:
+        print("Servicio de Datos con predicción embebida iniciado en http://localhost:8001 (modelo en /model)")
+    else:
+        print("Servicio de Datos iniciado en http://localhost:8001")
 
     # Esperar un momento para asegurarse de que los servicios estén corriendo
     time.sleep(5)
@@ -43,9 +61,9 @@ if __name__ == "__main__":
     # Iniciar el servicio de Streamlit
     p3 = multiprocessing.Process(target=start_streamlit_service)
     p3.start()
+    processes.append(p3)
     print("Servicio de Streamlit iniciado")
 
     # Mantener el script principal activo
-    p1.join()
-    p2.join()
-    p3.join()
+    for process in processes:
+        process.join()
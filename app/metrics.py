@@ -0,0 +1,409 @@
+"""
+Métricas en Formato Prometheus
+
+Este módulo define contadores e histogramas con etiquetas y los expone con el
+formato de texto de Prometheus (versión 0.0.4), sin dependencias adicionales. Las
+métricas se registran en un registro global del proceso, de modo que en el modo
+embebido `/metrics` de prediction_service incluye también las de model_service.
+
+Con varios workers (`MODEL_SERVICE_WORKERS` > 1) cada proceso lleva sus propias
+métricas y `/metrics` devuelve las del worker que atiende la consulta.
+
+Imports:
+    - bisect: Librería para ubicar cada observación en su intervalo.
+    - threading: Librería para proteger las métricas entre hilos.
+    - time: Librería para medir las solicitudes.
+
+Clases:
+    - Counter: Contador monotónico con etiquetas.
+    - Histogram: Histograma acumulado con etiquetas.
+    - MetricsRegistry: Conjunto de métricas de un proceso.
+    - MetricsMiddleware: Middleware ASGI que mide las solicitudes HTTP.
+
+Funciones:
+    - counter: Crea o devuelve un contador del registro global.
+    - histogram: Crea o devuelve un histograma del registro global.
+    - route_path: Devuelve la ruta de una solicitud relativa a su aplicación.
+"""
+
+import bisect
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Intervalos por defecto: de 0.5 ms a 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Intervalos de tamaño de solicitud: de 1 KiB a 4 MiB
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(7))
+
+
+def _escape(value):
+    """
+    Escapa el valor de una etiqueta.
+
+    Args:
+        value: Valor de la etiqueta.
+
+    Returns:
+        str: Valor con las barras, comillas y saltos de línea escapados.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    """
+    Da formato a las etiquetas de una muestra.
+
+    Args:
+        names (tuple): Nombres de las etiquetas.
+        values (tuple): Valores de las etiquetas.
+        extra (tuple): Etiqueta adicional (nombre, valor), como `le` en los histogramas.
+
+    Returns:
+        str: Etiquetas entre llaves, o cadena vacía si no hay.
+    """
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    """
+    Da formato a un valor numérico.
+
+    Args:
+        value (float): Valor.
+
+    Returns:
+        str: Valor con la representación de Prometheus.
+    """
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """
+    Contador monotónico con etiquetas.
+
+    Args:
+        name (str): Nombre de la métrica.
+        documentation (str): Descripción de la métrica.
+        labelnames (tuple): Nombres de las etiquetas.
+    """
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        """
+        Incrementa el contador.
+
+        Args:
+            amount (float): Cantidad a sumar.
+            **labels: Valor de cada etiqueta.
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        """
+        Devuelve el valor actual del contador.
+
+        Args:
+            **labels: Valor de cada etiqueta.
+
+        Returns:
+            float: Valor acumulado.
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def samples(self):
+        """
+        Devuelve las líneas de las muestras del contador.
+
+        Returns:
+            list: Líneas en formato de texto de Prometheus.
+        """
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """
+    Histograma acumulado con etiquetas.
+
+    Args:
+        name (str): Nombre de la métrica.
+        documentation (str): Descripción de la métrica.
+        labelnames (tuple): Nombres de las etiquetas.
+        buckets (tuple): Límites superiores de los intervalos, en orden creciente.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        Registra una observación.
+
+        Args:
+            value (float): Valor observado (segundos o bytes).
+            **labels: Valor de cada etiqueta.
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """
+        Mide la duración de un bloque `with`.
+
+        Args:
+            **labels: Valor de cada etiqueta.
+
+        Returns:
+            _Timer: Contexto que registra la duración al salir.
+        """
+        return _Timer(self, labels)
+
+    def samples(self):
+        """
+        Devuelve las líneas de las muestras del histograma.
+
+        Returns:
+            list: Líneas en formato de texto de Prometheus.
+        """
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    """
+    Contexto que registra en un histograma la duración de un bloque.
+
+    Args:
+        histogram (Histogram): Histograma de destino.
+        labels (dict): Valor de cada etiqueta.
+    """
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started_at, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas de un proceso.
+
+    Además de las métricas registradas admite funciones que generan muestras en el
+    momento de la consulta, para exponer estadísticas que ya lleva otro componente
+    (por ejemplo, el registro de modelos).
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Registra una métrica, o devuelve la ya registrada con el mismo nombre.
+
+        Args:
+            metric (Counter | Histogram): Métrica a registrar.
+
+        Returns:
+            Counter | Histogram: Métrica registrada.
+
+        Raises:
+            ValueError: Si ya existe una métrica de otro tipo con el mismo nombre.
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(f"La métrica {metric.name} ya existe con otro tipo o etiquetas.")
+        return existing
+
+    def add_collector(self, name, kind, documentation, collect):
+        """
+        Registra una métrica cuyas muestras se generan al consultar.
+
+        Args:
+            name (str): Nombre de la métrica.
+            kind (str): Tipo de Prometheus (gauge o counter).
+            documentation (str): Descripción de la métrica.
+            collect (callable): Función que devuelve una lista de pares (etiquetas, valor).
+        """
+        with self._lock:
+            self._collectors.append((name, kind, documentation, collect))
+
+    def render(self):
+        """
+        Devuelve todas las métricas en formato de texto de Prometheus.
+
+        Returns:
+            str: Exposición de las métricas.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for name, kind, documentation, collect in collectors:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collect():
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, documentation, labelnames=()):
+    """
+    Crea o devuelve un contador del registro global.
+
+    Args:
+        name (str): Nombre de la métrica.
+        documentation (str): Descripción de la métrica.
+        labelnames (tuple): Nombres de las etiquetas.
+
+    Returns:
+        Counter: Contador registrado.
+    """
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    """
+    Crea o devuelve un histograma del registro global.
+
+    Args:
+        name (str): Nombre de la métrica.
+        documentation (str): Descripción de la métrica.
+        labelnames (tuple): Nombres de las etiquetas.
+        buckets (tuple): Límites superiores de los intervalos.
+
+    Returns:
+        Histogram: Histograma registrado.
+    """
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def route_path(scope):
+    """
+    Devuelve la ruta de una solicitud relativa a su aplicación.
+
+    En una aplicación montada (como model_service bajo `/model` en el modo embebido)
+    `scope["path"]` incluye el prefijo del montaje, que se guarda en `root_path`.
+
+    Args:
+        scope (dict): Scope ASGI de la solicitud.
+
+    Returns:
+        str: Ruta sin el prefijo del montaje.
+    """
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        return path[len(root_path):] or "/"
+    return path
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide la duración y el tamaño de las solicitudes HTTP.
+
+    Solo mide las rutas indicadas, para que las etiquetas no crezcan sin límite con
+    rutas arbitrarias. Es un middleware ASGI puro: no envuelve la respuesta ni copia
+    el cuerpo, por lo que su costo por solicitud es mínimo.
+
+    Args:
+        app: Aplicación ASGI.
+        service (str): Nombre del servicio, usado como etiqueta.
+        paths (tuple): Rutas a medir.
+    """
+
+    def __init__(self, app, service, paths):
+        self.app = app
+        self.service = service
+        self.paths = set(paths)
+        self.requests = counter("ffp_http_requests_total", "Solicitudes HTTP atendidas.",
+                                ("service", "path", "status"))
+        self.duration = histogram("ffp_http_request_duration_seconds", "Duración de las solicitudes HTTP.",
+                                  ("service", "path"))
+        self.size = histogram("ffp_http_request_size_bytes", "Tamaño del cuerpo de las solicitudes HTTP.",
+                              ("service", "path"), buckets=SIZE_BUCKETS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or route_path(scope) not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        path = route_path(scope)
+        started_at = time.perf_counter()
+        status = {"code": 500}
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
+                self.size.observe(int(value), service=self.service, path=path)
+                break
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.duration.observe(time.perf_counter() - started_at, service=self.service, path=path)
+            self.requests.inc(service=self.service, path=path, status=status["code"])
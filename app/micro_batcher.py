@@ -0,0 +1,188 @@
+"""
+Agrupador de Solicitudes de Predicción
+
+Este módulo agrupa solicitudes de predicción concurrentes dirigidas al mismo modelo
+para evaluarlas en una sola llamada sobre una matriz de varias filas.
+
+Imports:
+    - queue: Librería de colas seguras entre hilos.
+    - threading: Librería para manejar hilos.
+    - time: Librería para manejo de tiempo.
+    - concurrent.futures.Future: Resultado diferido de cada solicitud.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+
+Clases:
+    - MicroBatcher: Agrupa filas por modelo y las predice en lotes.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Límites superiores de los intervalos del histograma de retardo en cola (milisegundos)
+DELAY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100)
+
+
+class _Item:
+    """
+    Fila pendiente de predicción.
+
+    Atributos:
+        row (np.ndarray): Fila de datos sin escalar.
+        future (Future): Resultado diferido de la fila.
+        enqueued_at (float): Momento en que la fila entró en la cola.
+    """
+    __slots__ = ("row", "future", "enqueued_at")
+
+    def __init__(self, row):
+        self.row = row
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Agrupa filas de predicción concurrentes por modelo.
+
+    Cada modelo tiene su propia cola y un hilo que espera como máximo `max_wait`
+    segundos desde la llegada de la primera fila, o hasta reunir `max_batch_size`
+    filas, y luego llama a `predict_fn` con todas ellas. Si la cola de un modelo pasa
+    `idle_timeout` segundos sin filas (por ejemplo, porque se cambió de modelo), su hilo
+    termina; la siguiente fila de ese modelo crea uno nuevo.
+
+    Args:
+        predict_fn (callable): Función `predict_fn(key, matriz)` que devuelve etiquetas y probabilidades.
+        max_batch_size (int): Número máximo de filas por lote.
+        max_wait (float): Tiempo máximo de espera en segundos para completar un lote.
+        idle_timeout (float): Segundos sin filas tras los cuales termina el hilo de un modelo.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait=0.005, idle_timeout=60.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.idle_timeout = idle_timeout
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._batch_sizes = {}
+        self._delay_buckets = [0] * (len(DELAY_BUCKETS_MS) + 1)
+        self._delay_sum = 0.0
+        self._delay_max = 0.0
+        self._rows = 0
+        self._batches = 0
+
+    def submit(self, key, row):
+        """
+        Encola una fila y espera su resultado.
+
+        Args:
+            key (tuple): Identificador del modelo (model_folder, model_name, window_size).
+            row (np.ndarray): Fila de datos de forma (2 * window_size,).
+
+        Returns:
+            tuple: Etiqueta predicha y probabilidad de la clase NOT OK.
+        """
+        item = _Item(row)
+        self._enqueue(key, item)
+        return item.future.result()
+
+    def _enqueue(self, key, item):
+        """
+        Encola una fila en la cola del modelo, creando su hilo de trabajo si no existe.
+
+        La fila se encola con el candado adquirido para que el hilo no pueda retirar
+        la cola por inactividad entre que se obtiene y se usa.
+
+        Args:
+            key (tuple): Identificador del modelo.
+            item (_Item): Fila pendiente.
+        """
+        with self._lock:
+            pending = self._queues.get(key)
+            if pending is None:
+                pending = queue.Queue()
+                self._queues[key] = pending
+                worker = threading.Thread(target=self._worker, args=(key, pending), daemon=True)
+                worker.start()
+            pending.put(item)
+
+    def _worker(self, key, pending):
+        """
+        Reúne lotes de la cola de un modelo y los predice.
+
+        Args:
+            key (tuple): Identificador del modelo.
+            pending (queue.Queue): Cola de filas pendientes.
+        """
+        while True:
+            try:
+                batch = [pending.get(timeout=self.idle_timeout)]
+            except queue.Empty:
+                with self._lock:
+                    if pending.empty():
+                        del self._queues[key]
+                        return
+                continue
+            deadline = batch[0].enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(pending.get(timeout=timeout) if timeout > 0 else pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._record(batch, time.monotonic())
+            try:
+                labels, probs = self.predict_fn(key, np.vstack([item.row for item in batch]))
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+            for i, item in enumerate(batch):
+                item.future.set_result((labels[i], probs[i]))
+
+    def _record(self, batch, started_at):
+        """
+        Registra el tamaño del lote y el retardo en cola de cada fila.
+
+        Args:
+            batch (list): Filas del lote.
+            started_at (float): Momento en que comienza la predicción del lote.
+        """
+        with self._lock:
+            size = len(batch)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._batches += 1
+            self._rows += size
+            for item in batch:
+                delay_ms = (started_at - item.enqueued_at) * 1000
+                self._delay_sum += delay_ms
+                self._delay_max = max(self._delay_max, delay_ms)
+                index = next((i for i, bound in enumerate(DELAY_BUCKETS_MS) if delay_ms <= bound), len(DELAY_BUCKETS_MS))
+                self._delay_buckets[index] += 1
+
+    def stats(self):
+        """
+        Devuelve el histograma de tamaños de lote y el retardo en cola.
+
+        Returns:
+            dict: Configuración, histograma de tamaños de lote y estadísticas de retardo.
+        """
+        with self._lock:
+            labels = [f"<={bound}" for bound in DELAY_BUCKETS_MS] + [f">{DELAY_BUCKETS_MS[-1]}"]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "active_queues": len(self._queues),
+                "batches": self._batches,
+                "rows": self._rows,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "queue_delay_ms": {
+                    "mean": self._delay_sum / self._rows if self._rows else 0.0,
+                    "max": self._delay_max,
+                    "histogram": dict(zip(labels, self._delay_buckets)),
+                },
+            }
@@ -0,0 +1,311 @@
+"""
+Paquete de Inferencia en un Solo Archivo
+
+Este módulo define el formato `.bundle`, que reúne en un único artefacto todo lo
+necesario para servir un modelo: el scaler, el ensemble serializado, el motor de
+árboles compilado, el tamaño de ventana, la disposición de las variables, las
+métricas de entrenamiento y un hash del contenido. Sustituye la convención de
+nombres que emparejaba `ensemble_{w}.pkl` con `scaler_{w}.pkl`.
+
+Disposición del archivo:
+    - 8 bytes: identificador del formato (`FFPBNDL1`).
+    - 8 bytes: longitud del manifiesto (entero little-endian sin signo).
+    - Manifiesto JSON con la descripción y la posición de cada bloque.
+    - Bloques de datos alineados a 64 bytes a partir del primer múltiplo de 64 tras
+      el manifiesto: arreglos NumPy crudos y el ensemble serializado con joblib. Las
+      posiciones del manifiesto son relativas al inicio de esta sección.
+
+Los arreglos se abren con `np.memmap`, de modo que varios procesos que sirven el
+mismo modelo comparten las páginas del sistema operativo en lugar de copiarlas.
+
+Imports:
+    - hashlib: Librería para calcular el hash del contenido.
+    - io: Librería para serializar el ensemble en memoria.
+    - json: Librería para leer y escribir el manifiesto.
+    - os: Librería para interactuar con el sistema operativo.
+    - struct: Librería para codificar la cabecera binaria.
+    - datetime: Librería para registrar la fecha de creación.
+    - joblib: Librería para serializar el ensemble.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - tree_engine: Motor de inferencia de árboles en NumPy.
+
+Clases:
+    - ModelBundle: Paquete de inferencia cargado.
+
+Funciones:
+    - write_bundle: Escribe un paquete de inferencia.
+    - read_manifest: Lee solo el manifiesto de un paquete.
+    - load_bundle: Carga y valida un paquete de inferencia.
+    - bundle_from_pickles: Crea un paquete a partir de los pickles de un modelo.
+"""
+
+import hashlib
+import io
+import json
+import os
+import struct
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from tree_engine import ENGINE_FIELDS, TreeEngine, compile_ensemble
+
+BUNDLE_MAGIC = b"FFPBNDL1"
+BUNDLE_VERSION = 1
+ALIGNMENT = 64
+
+
+class ModelBundle:
+    """
+    Paquete de inferencia cargado.
+
+    El ensemble serializado solo se deserializa la primera vez que se pide `model`,
+    por lo que quien usa el motor compilado no paga ese costo.
+
+    Atributos:
+        path (str): Ruta del paquete.
+        manifest (dict): Manifiesto del paquete.
+        data_start (int): Posición del inicio de la sección de datos.
+        window_size (int): Tamaño de la ventana de datos.
+        arrays (dict): Arreglos del paquete abiertos con mmap.
+        engine (TreeEngine): Motor compilado, o `None` si el paquete no lo incluye.
+    """
+
+    def __init__(self, path, manifest, data_start, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.data_start = data_start
+        self.window_size = manifest["window_size"]
+        self.arrays = arrays
+        self.engine = None
+        if manifest.get("engine"):
+            fields = {field: arrays[f"engine_{field}"] for field in ENGINE_FIELDS}
+            self.engine = TreeEngine(**fields)
+        self._model = None
+
+    @property
+    def model(self):
+        """
+        Devuelve el ensemble y el scaler de scikit-learn del paquete.
+
+        Returns:
+            tuple: Ensemble y scaler deserializados.
+        """
+        if self._model is None:
+            blob = self.manifest["blobs"]["model"]
+            with open(self.path, 'rb') as f:
+                f.seek(self.data_start + blob["offset"])
+                payload = joblib.load(io.BytesIO(f.read(blob["nbytes"])))
+            self._model = (payload["model"], payload["scaler"])
+        return self._model
+
+
+def _align(position):
+    """
+    Redondea una posición al siguiente múltiplo de la alineación.
+
+    Args:
+        position (int): Posición en bytes.
+
+    Returns:
+        int: Posición alineada.
+    """
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_bundle(path, model, scaler, window_size, metrics=None, engine=None):
+    """
+    Escribe un paquete de inferencia.
+
+    El archivo se escribe primero con un nombre temporal y se reemplaza al final,
+    por lo que un servicio nunca ve un paquete a medio escribir.
+
+    Args:
+        path (str): Ruta del archivo .bundle.
+        model: Ensemble entrenado.
+        scaler: StandardScaler ajustado en el entrenamiento.
+        window_size (int): Tamaño de la ventana de datos.
+        metrics (dict): Métricas de entrenamiento a guardar en el manifiesto.
+        engine (TreeEngine): Motor compilado, o `None` para no incluirlo.
+
+    Returns:
+        dict: Manifiesto escrito.
+    """
+    arrays = {
+        "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+    }
+    if engine is not None:
+        for field in ENGINE_FIELDS:
+            arrays[f"engine_{field}"] = np.ascontiguousarray(engine.classes_ if field == "classes" else getattr(engine, field))
+    buffer = io.BytesIO()
+    joblib.dump({"model": model, "scaler": scaler}, buffer)
+    blobs = {name: array.tobytes() for name, array in arrays.items()}
+    blobs["model"] = buffer.getvalue()
+
+    layout, position = {}, 0
+    for name, data in blobs.items():
+        position = _align(position)
+        layout[name] = {"offset": position, "nbytes": len(data)}
+        if name in arrays:
+            layout[name].update(dtype=arrays[name].dtype.str, shape=list(arrays[name].shape))
+        position += len(data)
+
+    digest = hashlib.sha256()
+    for name, data in blobs.items():
+        digest.update(data)
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "window_size": int(window_size),
+        "feature_layout": {
+            "n_features": 2 * int(window_size),
+            "segments": [
+                {"name": "angulo", "start": 0, "length": int(window_size)},
+                {"name": "par", "start": int(window_size), "length": int(window_size)},
+            ],
+        },
+        "classes": np.asarray(model.classes_).tolist(),
+        "model_type": type(model).__name__,
+        "engine": engine is not None,
+        "metrics": metrics or {},
+        "content_sha256": digest.hexdigest(),
+        "blobs": layout,
+    }
+
+    header = json.dumps(manifest, separators=(',', ':')).encode('utf-8')
+    data_start = _align(16 + len(header))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(BUNDLE_MAGIC + struct.pack('<Q', len(header)) + header)
+        for name, data in blobs.items():
+            f.write(b'\0' * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_manifest(path, with_data_start=False):
+    """
+    Lee solo el manifiesto de un paquete.
+
+    Args:
+        path (str): Ruta del archivo .bundle.
+        with_data_start (bool): Si también se devuelve el inicio de la sección de datos.
+
+    Returns:
+        dict: Manifiesto del paquete (y la posición de los datos si se pide).
+
+    Raises:
+        ValueError: Si el archivo no es un paquete válido.
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(16)
+        if len(prefix) != 16 or prefix[:8] != BUNDLE_MAGIC:
+            raise ValueError(f"{path} no es un paquete de inferencia.")
+        (header_size,) = struct.unpack('<Q', prefix[8:])
+        manifest = json.loads(f.read(header_size).decode('utf-8'))
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"El paquete {path} tiene una versión de formato no compatible.")
+    if with_data_start:
+        return manifest, _align(16 + header_size)
+    return manifest
+
+
+def load_bundle(path, window_size=None, verify=False):
+    """
+    Carga y valida un paquete de inferencia.
+
+    La validación estructural (formato, tamaño de ventana, tamaños de los bloques y
+    de las variables) es inmediata; la verificación del hash lee el archivo completo
+    y solo se hace si se pide.
+
+    Args:
+        path (str): Ruta del archivo .bundle.
+        window_size (int): Tamaño de ventana esperado, o `None` para no comprobarlo.
+        verify (bool): Si se comprueba el hash del contenido.
+
+    Returns:
+        ModelBundle: Paquete cargado con los arreglos abiertos con mmap.
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe.
+        ValueError: Si el paquete está dañado o no corresponde al tamaño de ventana.
+    """
+    manifest, data_start = read_manifest(path, with_data_start=True)
+    if window_size is not None and manifest["window_size"] != int(window_size):
+        raise ValueError(f"El paquete {path} es de ventana {manifest['window_size']}, no de {window_size}.")
+
+    file_size = os.path.getsize(path)
+    for name, blob in manifest["blobs"].items():
+        if data_start + blob["offset"] + blob["nbytes"] > file_size:
+            raise ValueError(f"El paquete {path} está truncado (bloque {name}).")
+
+    arrays = {}
+    for name, blob in manifest["blobs"].items():
+        if "dtype" not in blob:
+            continue
+        shape = tuple(blob["shape"])
+        if blob["nbytes"] == 0:
+            arrays[name] = np.empty(shape, dtype=blob["dtype"])
+        else:
+            # Vista ndarray sobre el mapeo: evita el costo de la subclase memmap en cada operación
+            arrays[name] = np.memmap(path, dtype=blob["dtype"], mode='r', offset=data_start + blob["offset"], shape=shape).view(np.ndarray)
+    if len(arrays["scaler_mean"]) != manifest["feature_layout"]["n_features"]:
+        raise ValueError(f"El scaler del paquete {path} no coincide con la disposición de variables.")
+
+    if verify:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for blob in manifest["blobs"].values():
+                f.seek(data_start + blob["offset"])
+                digest.update(f.read(blob["nbytes"]))
+        if digest.hexdigest() != manifest["content_sha256"]:
+            raise ValueError(f"El hash del paquete {path} no coincide con su contenido.")
+
+    return ModelBundle(path, manifest, data_start, arrays)
+
+
+def bundle_from_pickles(model_path, scaler_path, window_size, bundle_path=None, metrics=None):
+    """
+    Crea un paquete a partir de los pickles de un modelo ya entrenado.
+
+    Args:
+        model_path (str): Ruta del ensemble serializado.
+        scaler_path (str): Ruta del scaler serializado.
+        window_size (int): Tamaño de la ventana de datos.
+        bundle_path (str): Ruta del paquete; por defecto la del modelo con extensión .bundle.
+        metrics (dict): Métricas de entrenamiento a guardar en el manifiesto.
+
+    Returns:
+        str: Ruta del paquete escrito.
+    """
+    bundle_path = bundle_path or f"{os.path.splitext(model_path)[0]}.bundle"
+    model, scaler = joblib.load(model_path), joblib.load(scaler_path)
+    try:
+        engine = compile_ensemble(model, scaler)
+    except ValueError:
+        engine = None
+    write_bundle(bundle_path, model, scaler, window_size, metrics, engine)
+    return bundle_path
+
+
+if __name__ == "__main__":
+    import argparse
+    import re
+
+    # Convertir a paquetes todos los modelos existentes de una carpeta de modelos
+    parser = argparse.ArgumentParser(description="Convierte los pickles ensemble_{w}/scaler_{w} en paquetes .bundle.")
+    parser.add_argument("models_dir", help="Carpeta con una subcarpeta de modelos por estación.")
+    args = parser.parse_args()
+
+    for folder in sorted(os.scandir(args.models_dir), key=lambda entry: entry.name):
+        if not folder.is_dir():
+            continue
+        for file_name in sorted(os.listdir(folder.path)):
+            match = re.fullmatch(r'ensemble_(\d+)\.pkl', file_name)
+            scaler_path = os.path.join(folder.path, f"scaler_{match.group(1)}.pkl") if match else None
+            if scaler_path and os.path.exists(scaler_path):
+                print(bundle_from_pickles(os.path.join(folder.path, file_name), scaler_path, int(match.group(1))))
@@ -0,0 +1,323 @@
+"""
+Registro de Modelos en Memoria
+
+Este módulo mantiene en memoria los modelos y scalers ya cargados para que las
+predicciones no tengan que leer ni deserializar los archivos .pkl en cada solicitud.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - threading: Librería para sincronizar el acceso concurrente.
+    - time: Librería para manejo de tiempo.
+    - collections.OrderedDict: Diccionario ordenado usado para la política LRU.
+
+Clases:
+    - ModelRegistry: Caché LRU de modelos con límite de memoria y recarga por cambios en disco.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    """
+    Entrada del registro.
+
+    Atributos:
+        value: Objeto cargado (por ejemplo, la tupla modelo y scaler).
+        paths (list): Archivos de los que depende la entrada.
+        signature (tuple): Firma (mtime, tamaño) de los archivos al momento de la carga.
+        size (int): Tamaño estimado en bytes.
+        checked_at (float): Último momento en que se verificó la firma.
+    """
+    __slots__ = ("value", "paths", "signature", "size", "checked_at")
+
+    def __init__(self, value, paths, signature, size, checked_at):
+        self.value = value
+        self.paths = paths
+        self.signature = signature
+        self.size = size
+        self.checked_at = checked_at
+
+
+def file_signature(paths):
+    """
+    Calcula la firma de un conjunto de archivos.
+
+    Args:
+        paths (list): Rutas de los archivos.
+
+    Returns:
+        tuple: Pares (mtime en nanosegundos, tamaño en bytes) de cada archivo.
+
+    Raises:
+        FileNotFoundError: Si alguno de los archivos no existe.
+    """
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class ModelRegistry:
+    """
+    Caché LRU de modelos cargados en memoria.
+
+    Cada entrada se identifica por la clave (model_folder, model_name, window_size).
+    El tamaño de cada entrada se estima con el tamaño de sus archivos en disco; cuando
+    se supera `max_entries` o `max_bytes` se descartan las entradas menos usadas.
+    La firma de los archivos se revisa como máximo cada `check_interval` segundos,
+    de modo que en régimen estable las solicitudes no tocan el disco. Las entradas
+    fijadas con `pin` (el modelo activo y el anterior) nunca se desalojan.
+
+    Args:
+        loader (callable): Función `loader(*key)` que carga y devuelve el objeto.
+        resolve_paths (callable): Función `resolve_paths(*key)` con las rutas de los archivos.
+        max_entries (int): Número máximo de entradas.
+        max_bytes (int): Memoria máxima estimada en bytes (0 desactiva el límite).
+        check_interval (float): Segundos entre verificaciones de cambios en disco.
+    """
+
+    def __init__(self, loader, resolve_paths, max_entries=8, max_bytes=0, check_interval=2.0):
+        self.loader = loader
+        self.resolve_paths = resolve_paths
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Candado de carga de cada clave y número de hilos que lo usan
+        self._key_locks = {}
+        self._pinned = set()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def get(self, model_folder, model_name, window_size):
+        """
+        Devuelve el objeto cargado para la clave, cargándolo si es necesario.
+
+        Args:
+            model_folder (str): Carpeta del modelo.
+            model_name (str): Nombre del modelo.
+            window_size (int): Tamaño de la ventana de datos.
+
+        Returns:
+            object: Objeto devuelto por `loader`.
+
+        Raises:
+            FileNotFoundError: Si los archivos del modelo no existen.
+        """
+        key = (model_folder, model_name, window_size)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry.value
+
+        key_lock = self._acquire_key_lock(key)
+        try:
+            with key_lock:
+                # Otro hilo pudo haber cargado la entrada mientras se esperaba el candado
+                entry = self._lookup(key, count=False)
+                if entry is not None:
+                    return entry.value
+
+                # La firma se toma antes de cargar: si el archivo se reemplaza durante la
+                # carga, la firma guardada es la del contenido viejo y se recarga después
+                paths = self.resolve_paths(*key)
+                try:
+                    signature = file_signature(paths)
+                except FileNotFoundError:
+                    # El cargador informa qué archivo falta
+                    signature = None
+                value = self.loader(*key)
+                if signature is None:
+                    signature = file_signature(paths)
+                size = sum(size for _, size in signature)
+                self._store(key, _Entry(value, paths, signature, size, time.monotonic()))
+                return value
+        finally:
+            self._release_key_lock(key)
+
+    def _lookup(self, key, count=True):
+        """
+        Busca una entrada vigente y actualiza su posición LRU.
+
+        Args:
+            key (tuple): Clave de la entrada.
+            count (bool): Si se deben actualizar los contadores de aciertos y fallos.
+
+        Returns:
+            _Entry: Entrada vigente o `None` si no existe o los archivos cambiaron.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return None
+
+            now = time.monotonic()
+            if now - entry.checked_at >= self.check_interval:
+                try:
+                    current = file_signature(entry.paths)
+                except FileNotFoundError:
+                    current = None
+                if current != entry.signature:
+                    self._remove(key)
+                    self.reloads += 1
+                    if count:
+                        self.misses += 1
+                    return None
+                entry.checked_at = now
+
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry
+
+    def _store(self, key, entry):
+        """
+        Guarda una entrada y aplica la política de desalojo.
+
+        Args:
+            key (tuple): Clave de la entrada.
+            entry (_Entry): Entrada a guardar.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                oldest = next((k for k in self._entries if k != key and k not in self._pinned), None)
+                if oldest is None:
+                    break
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        """
+        Elimina una entrada. Debe llamarse con el candado adquirido.
+
+        Args:
+            key (tuple): Clave de la entrada.
+        """
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _acquire_key_lock(self, key):
+        """
+        Devuelve el candado de carga de una clave y registra un hilo más que lo usa.
+
+        Todos los hilos que cargan la misma clave a la vez reciben el mismo candado.
+        Cada llamada debe acompañarse de `_release_key_lock`.
+
+        Args:
+            key (tuple): Clave de la entrada.
+
+        Returns:
+            threading.Lock: Candado de la clave.
+        """
+        with self._lock:
+            item = self._key_locks.get(key)
+            if item is None:
+                item = self._key_locks[key] = [threading.Lock(), 0]
+            item[1] += 1
+            return item[0]
+
+    def _release_key_lock(self, key):
+        """
+        Registra que un hilo dejó de usar el candado de carga de una clave.
+
+        El candado se descarta cuando ningún hilo lo usa, para que las claves ya
+        cargadas o que no se pudieron cargar no acumulen candados.
+
+        Args:
+            key (tuple): Clave de la entrada.
+        """
+        with self._lock:
+            item = self._key_locks[key]
+            item[1] -= 1
+            if item[1] == 0:
+                del self._key_locks[key]
+
+    def pin(self, model_folder, model_name, window_size):
+        """
+        Evita que una entrada sea desalojada.
+
+        Args:
+            model_folder (str): Carpeta del modelo.
+            model_name (str): Nombre del modelo.
+            window_size (int): Tamaño de la ventana de datos.
+        """
+        with self._lock:
+            self._pinned.add((model_folder, model_name, window_size))
+
+    def unpin(self, model_folder, model_name, window_size):
+        """
+        Permite de nuevo desalojar una entrada fijada.
+
+        Args:
+            model_folder (str): Carpeta del modelo.
+            model_name (str): Nombre del modelo.
+            window_size (int): Tamaño de la ventana de datos.
+        """
+        with self._lock:
+            self._pinned.discard((model_folder, model_name, window_size))
+
+    def discard(self, model_folder, model_name, window_size):
+        """
+        Elimina una entrada y su fijación, por ejemplo si no superó la validación.
+
+        Args:
+            model_folder (str): Carpeta del modelo.
+            model_name (str): Nombre del modelo.
+            window_size (int): Tamaño de la ventana de datos.
+        """
+        key = (model_folder, model_name, window_size)
+        with self._lock:
+            self._pinned.discard(key)
+            if key in self._entries:
+                self._remove(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        """
+        Elimina todas las entradas del registro.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Devuelve las estadísticas del registro.
+
+        Returns:
+            dict: Aciertos, fallos, recargas, desalojos, entradas y memoria estimada.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "entries": [
+                    {"model_folder": k[0], "model_name": k[1], "window_size": k[2], "bytes": e.size,
+                     "pinned": k in self._pinned}
+                    for k, e in self._entries.items()
+                ],
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
@@ -10,21 +10,107 @@ Imports:
     - numpy: Librería para manejo de matrices y operaciones numéricas.
     - joblib: Librería para cargar modelos serializados.
     - os: Librería para interactuar con el sistema operativo.
+    - time: Librería para medir los tiempos de carga.
+    - model_registry: Registro en memoria de los modelos cargados.
+    - micro_batcher: Agrupador opcional de solicitudes concurrentes.
+    - ensemble: Ensamble de votación suave que usan los modelos serializados.
+    - tree_engine: Motor de inferencia de árboles en NumPy.
+    - model_bundle: Paquetes de inferencia en un solo archivo.
+    - prefork_server: Servidor multiproceso con precarga.
+    - timing: Tiempos por etapa en la cabecera Server-Timing.
+    - metrics: Métricas en formato Prometheus.
+    - log_config: Logs con nivel y límite de frecuencia.
+    - profiling: Perfilado por muestreo de las solicitudes lentas.
+    - payload: Formatos compactos de las ventanas (base64 y binario).
 
 Funciones:
+    - model_paths: Devuelve las rutas del modelo y del scaler.
+    - limit_model_threads: Limita los hilos de inferencia de los modelos de boosting.
     - load_model_and_scaler: Carga el modelo de predicción y el scaler.
+    - timed_load_model: Carga un modelo registrando su tiempo de carga.
+    - get_model_and_scaler: Obtiene el modelo y el scaler desde el registro en memoria.
+    - predict_matrix: Escala y predice un conjunto de ventanas en una sola llamada.
+    - predict_key_batch: Predice un lote agrupado de filas de un mismo modelo.
     - predict: Realiza una predicción utilizando el modelo y los datos proporcionados.
+    - predict_window: Realiza la predicción de una ventana sin pasar por HTTP.
+    - predict_batch: Realiza predicciones para varias ventanas en una sola solicitud.
+    - validation_batch: Genera un lote fijo de ventanas sintéticas para validar un modelo.
+    - warm_model: Carga, valida y calienta un modelo.
+    - unpin: Permite que el registro vuelva a desalojar un modelo.
+    - on_all_workers: Ejecuta una función en todos los workers del servicio.
+    - load_model: Carga, valida y calienta un modelo antes de que empiece a recibir ventanas.
+    - unpin_model: Permite que el registro vuelva a desalojar un modelo.
+    - model_cache_stats: Devuelve las estadísticas del registro de modelos.
+    - batching_stats: Devuelve las estadísticas del agrupador de solicitudes.
+    - metrics_endpoint: Devuelve las métricas en formato Prometheus.
+    - list_profiles: Lista los perfiles de solicitudes capturados.
+    - download_profile: Descarga un perfil capturado.
     - read_root: Ruta raíz de prueba.
+    - parse_preload: Interpreta la lista de modelos a precargar.
+    - preload_models: Carga en el registro los modelos activos antes de atender solicitudes.
     - start_service: Inicia el servidor de FastAPI.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Response
+from fastapi.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel
+from typing import List, Optional
 import numpy as np
 import joblib
 import os
+import time
+from model_registry import ModelRegistry
+from micro_batcher import MicroBatcher
+# Los modelos entrenados son PrefitSoftVotingEnsemble; su módulo debe poder importarse al cargarlos
+import ensemble
+from tree_engine import compile_ensemble
+from model_bundle import load_bundle
+from prefork_server import broadcast, is_worker, serve_prefork
+from timing import add_timing_middleware, stage
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, counter, histogram
+from log_config import get_logger
+import profiling
+from payload import WindowArray, body_parser, openapi_body
+
+MODELS_DIR = os.environ.get("MODELS_DIR", r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos')
+
+# Motor de inferencia: "sklearn" usa los pickles tal cual; "numpy" usa el motor de árboles compilado
+MODEL_ENGINE = os.environ.get("MODEL_ENGINE", "sklearn")
+
+# Comprobar el hash completo de los paquetes .bundle al cargarlos
+MODEL_BUNDLE_VERIFY = os.environ.get("MODEL_BUNDLE_VERIFY", "0") == "1"
+
+# Modo multiproceso: número de workers, hilos de XGBoost/LightGBM por worker (0 = núcleos / workers),
+# fijación de cada worker a sus núcleos y modelos a precargar ("carpeta/modelo[:ventana],...")
+MODEL_SERVICE_WORKERS = int(os.environ.get("MODEL_SERVICE_WORKERS", "1"))
+MODEL_SERVICE_THREADS_PER_WORKER = (int(os.environ.get("MODEL_SERVICE_THREADS_PER_WORKER", "0"))
+                                    or max(1, (os.cpu_count() or 1) // max(1, MODEL_SERVICE_WORKERS)))
+MODEL_SERVICE_PIN_CORES = os.environ.get("MODEL_SERVICE_PIN_CORES", "1") == "1"
+MODEL_SERVICE_PRELOAD = os.environ.get("MODEL_SERVICE_PRELOAD", "")
+
+# Ventanas sintéticas con las que se valida un modelo al cargarlo con /load_model
+VALIDATION_WINDOWS = int(os.environ.get("MODEL_VALIDATION_WINDOWS", "8"))
+
+# Devolver la duración de cada etapa de /predict y /predict_batch en la cabecera Server-Timing
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
 
 app = FastAPI()
+if SERVER_TIMING:
+    add_timing_middleware(app)
+app.add_middleware(MetricsMiddleware, service="model_service", paths=("/predict", "/predict_batch"))
+if profiling.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware, service="model_service",
+                       paths=("/predict", "/predict_batch", "/load_model"))
+
+logger = get_logger("model_service")
+
+MODEL_LOAD_SECONDS = histogram("ffp_model_load_seconds", "Tiempo de carga de un modelo desde el disco.", ("model",))
+SCALER_TRANSFORM_SECONDS = histogram("ffp_scaler_transform_seconds", "Tiempo de escalado de un lote de ventanas.")
+MODEL_PREDICT_SECONDS = histogram("ffp_model_predict_seconds", "Tiempo de predicción de un lote de ventanas.")
+MODEL_PREDICTIONS = counter("ffp_model_predictions_total", "Ventanas predichas por modelo y resultado.",
+                            ("model", "prediction"))
+MODEL_ERRORS = counter("ffp_model_errors_total", "Solicitudes de predicción rechazadas por modelo y motivo.",
+                       ("model", "reason"))
 
 class PredictionRequest(BaseModel):
     """
@@ -34,22 +120,107 @@ class PredictionRequest(BaseModel):
         model_folder (str): Carpeta del modelo.
         model_name (str): Nombre del modelo.
         window_size (int): Tamaño de la ventana de datos.
-        angulo (list): Lista de valores de ángulo.
-        par (list): Lista de valores de par.
+        angulo (np.ndarray): Valores de ángulo; llegan como lista de números o texto base64.
+        par (np.ndarray): Valores de par; llegan como lista de números o texto base64.
     """
     model_folder: str
     model_name: str
     window_size: int
-    angulo: list
-    par: list
+    angulo: WindowArray
+    par: WindowArray
 
     class Config:
         protected_namespaces = ()
 
+class BatchPredictionRequest(BaseModel):
+    """
+    Modelo de solicitud de predicción por lotes.
+
+    Atributos:
+        model_folder (str): Carpeta del modelo.
+        model_name (str): Nombre del modelo.
+        window_size (int): Tamaño de la ventana de datos.
+        angulo (list): Ventanas de ángulo, una por fila (lista de números o texto base64).
+        par (list): Ventanas de par, una por fila (lista de números o texto base64).
+        identificadores (list): Identificadores opcionales de cada ventana.
+    """
+    model_folder: str
+    model_name: str
+    window_size: int
+    angulo: List[WindowArray]
+    par: List[WindowArray]
+    identificadores: Optional[List[str]] = None
+
+    class Config:
+        protected_namespaces = ()
+
+class ModelLoadRequest(BaseModel):
+    """
+    Modelo de solicitud de carga anticipada de un modelo.
+
+    Atributos:
+        model_folder (str): Carpeta del modelo.
+        model_name (str): Nombre del modelo.
+        window_size (int): Tamaño de la ventana de datos.
+        pin (bool): Si el modelo se fija en el registro para que no se desaloje.
+    """
+    model_folder: str
+    model_name: str
+    window_size: int
+    pin: bool = True
+
+    class Config:
+        protected_namespaces = ()
+
+def model_paths(model_folder, model_name, window_size):
+    """
+    Devuelve las rutas del modelo y del scaler.
+
+    Si existe el paquete `{model_name}.bundle` se devuelve solo su ruta.
+
+    Args:
+        model_folder (str): Carpeta del modelo.
+        model_name (str): Nombre del modelo.
+        window_size (int): Tamaño de la ventana de datos.
+
+    Returns:
+        list: Rutas del modelo y del scaler, o del paquete.
+    """
+    bundle_path = os.path.join(MODELS_DIR, model_folder, f'{model_name}.bundle')
+    if os.path.exists(bundle_path):
+        return [bundle_path]
+    model_path = os.path.join(MODELS_DIR, model_folder, f'{model_name}.pkl')
+    scaler_path = os.path.join(MODELS_DIR, model_folder, f'scaler_{window_size}.pkl')
+    return [model_path, scaler_path]
+
+def limit_model_threads(model):
+    """
+    Limita los hilos de inferencia de los modelos de boosting del ensemble.
+
+    Solo actúa en el modo multiproceso, para que los workers no compitan entre sí
+    por los núcleos.
+
+    Args:
+        model: Modelo de predicción o ensemble.
+
+    Returns:
+        Modelo con el número de hilos ajustado.
+    """
+    if MODEL_SERVICE_WORKERS <= 1:
+        return model
+    for member in getattr(model, 'named_estimators_', {'modelo': model}).values():
+        if hasattr(member, 'get_params') and 'n_jobs' in member.get_params():
+            member.set_params(n_jobs=MODEL_SERVICE_THREADS_PER_WORKER)
+    return model
+
 def load_model_and_scaler(model_folder, model_name, window_size):
     """
     Carga el modelo de predicción y el scaler.
 
+    Con el motor numpy se devuelve un TreeEngine (que ya incluye el escalado) y el
+    scaler es `None`. Si el modelo no tiene motor compilado, se compila al cargarlo.
+    Los paquetes .bundle se validan contra `window_size` en la misma carga.
+
     Args:
         model_folder (str): Carpeta del modelo.
         model_name (str): Nombre del modelo.
@@ -60,55 +231,521 @@ def load_model_and_scaler(model_folder, model_name, window_size):
 
     Raises:
         FileNotFoundError: Si el modelo o el scaler no existen.
+        ValueError: Si el paquete está dañado o es de otro tamaño de ventana.
     """
-    model_path = os.path.join(r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos', model_folder, f'{model_name}.pkl')
-    scaler_path = os.path.join(r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos', model_folder, f'scaler_{window_size}.pkl')
+    paths = model_paths(model_folder, model_name, window_size)
+    if paths[0].endswith('.bundle'):
+        logger.info("Bundle path: %s", paths[0])
+        bundle = load_bundle(paths[0], window_size, verify=MODEL_BUNDLE_VERIFY)
+        if MODEL_ENGINE == "numpy" and bundle.engine is not None:
+            return bundle.engine, None
+        model, scaler = bundle.model
+        return limit_model_threads(model), scaler
+    model_path, scaler_path = paths
 
     # Añadir logs para verificar las rutas
-    print(f"Model path: {model_path}")
-    print(f"Scaler path: {scaler_path}")
+    logger.info("Model path: %s", model_path)
+    logger.info("Scaler path: %s", scaler_path)
 
     if not os.path.exists(model_path):
-        print(f"Model file not found at path: {model_path}")
+        logger.warning("Model file not found at path: %s", model_path)
         raise FileNotFoundError("El modelo especificado no existe.")
 
     if not os.path.exists(scaler_path):
-        print(f"Scaler file not found at path: {scaler_path}")
+        logger.warning("Scaler file not found at path: %s", scaler_path)
         raise FileNotFoundError("El scaler especificado no existe.")
 
     model = joblib.load(model_path)
     scaler = joblib.load(scaler_path)
-    return model, scaler
+    if MODEL_ENGINE == "numpy":
+        try:
+            return compile_ensemble(model, scaler), None
+        except ValueError as e:
+            logger.warning("No se pudo compilar el modelo %s, se usa scikit-learn: %s", model_path, e)
+    return limit_model_threads(model), scaler
+
+def timed_load_model(model_folder, model_name, window_size):
+    """
+    Carga un modelo registrando su tiempo de carga en las métricas.
+
+    Args:
+        model_folder (str): Carpeta del modelo.
+        model_name (str): Nombre del modelo.
+        window_size (int): Tamaño de la ventana de datos.
+
+    Returns:
+        tuple: Modelo de predicción y scaler.
+    """
+    with MODEL_LOAD_SECONDS.time(model=f"{model_folder}/{model_name}"):
+        return load_model_and_scaler(model_folder, model_name, window_size)
 
-@app.post("/predict")
-def predict(request: PredictionRequest):
+registry = ModelRegistry(
+    timed_load_model,
+    model_paths,
+    max_entries=int(os.environ.get("MODEL_CACHE_MAX_ENTRIES", "8")),
+    max_bytes=int(float(os.environ.get("MODEL_CACHE_MAX_MB", "0")) * 1024 * 1024),
+    check_interval=float(os.environ.get("MODEL_CACHE_CHECK_INTERVAL", "2.0")),
+)
+
+def get_model_and_scaler(model_folder, model_name, window_size):
+    """
+    Obtiene el modelo y el scaler desde el registro en memoria.
+
+    Solo se leen los archivos del disco la primera vez, tras un desalojo o cuando
+    los archivos cambian.
+
+    Args:
+        model_folder (str): Carpeta del modelo.
+        model_name (str): Nombre del modelo.
+        window_size (int): Tamaño de la ventana de datos.
+
+    Returns:
+        tuple: Modelo de predicción y scaler.
+
+    Raises:
+        FileNotFoundError: Si el modelo o el scaler no existen.
+    """
+    return registry.get(model_folder, model_name, window_size)
+
+def predict_matrix(model, scaler, data_array):
+    """
+    Escala y predice un conjunto de ventanas en una sola llamada.
+
+    Args:
+        model: Modelo de predicción.
+        scaler: Scaler ajustado en el entrenamiento, o `None` si el modelo ya incluye el escalado.
+        data_array (np.ndarray): Matriz de forma (n_ventanas, 2 * window_size).
+
+    Returns:
+        tuple: Etiquetas predichas y probabilidad de la clase NOT OK de cada ventana.
+    """
+    started_at = time.perf_counter()
+    scaled_data = data_array if scaler is None else scaler.transform(data_array)
+    scaled_at = time.perf_counter()
+    SCALER_TRANSFORM_SECONDS.observe(scaled_at - started_at)
+    stage("scale")
+    if hasattr(model, "predict_proba"):
+        probs = model.predict_proba(scaled_data)
+        labels = np.asarray(model.classes_)[np.argmax(probs, axis=1)]
+        probs = probs[:, -1]
+    else:
+        labels = model.predict(scaled_data)
+        probs = (labels != 0).astype(float)
+    MODEL_PREDICT_SECONDS.observe(time.perf_counter() - scaled_at)
+    stage("predict")
+    return labels, probs
+
+def predict_key_batch(key, data_array):
+    """
+    Predice un lote agrupado de filas de un mismo modelo.
+
+    Args:
+        key (tuple): Identificador del modelo (model_folder, model_name, window_size).
+        data_array (np.ndarray): Matriz de forma (n_ventanas, 2 * window_size).
+
+    Returns:
+        tuple: Etiquetas predichas y probabilidad de la clase NOT OK de cada ventana.
+    """
+    model, scaler = get_model_and_scaler(*key)
+    return predict_matrix(model, scaler, data_array)
+
+# Agrupación opcional de solicitudes /predict concurrentes dirigidas al mismo modelo
+batcher = None
+if os.environ.get("MICRO_BATCH_ENABLED", "0") == "1":
+    batcher = MicroBatcher(
+        predict_key_batch,
+        max_batch_size=int(os.environ.get("MICRO_BATCH_MAX_SIZE", "32")),
+        max_wait=float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", "5")) / 1000,
+        idle_timeout=float(os.environ.get("MICRO_BATCH_IDLE_TIMEOUT", "60")),
+    )
+
+@app.post("/predict", openapi_extra=openapi_body(PredictionRequest))
+def predict(request: PredictionRequest = Depends(body_parser(PredictionRequest))):
     """
     Realiza una predicción utilizando el modelo y los datos proporcionados.
 
+    Además del JSON acepta el formato binario de `payload`: cuerpo
+    `application/octet-stream` con el ángulo y el par en float32 y `model_folder`,
+    `model_name` y `window_size` como parámetros de la URL.
+
     Args:
         request (PredictionRequest): Solicitud de predicción con los datos y configuración del modelo.
 
     Returns:
         dict: Resultado de la predicción.
     """
+    stage("decode")
+    model_label = f"{request.model_folder}/{request.model_name}"
     try:
-        model, scaler = load_model_and_scaler(request.model_folder, request.model_name, request.window_size)
+        return predict_window(request.model_folder, request.model_name, request.window_size, request.angulo, request.par)
     except FileNotFoundError as e:
+        MODEL_ERRORS.inc(model=model_label, reason="not_found")
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        MODEL_ERRORS.inc(model=model_label, reason="invalid")
+        raise HTTPException(status_code=400, detail=str(e))
+
+def predict_window(model_folder, model_name, window_size, angulo, par):
+    """
+    Realiza la predicción de una ventana sin pasar por HTTP.
+
+    Es la lógica de `/predict`; prediction_service la llama directamente en el modo
+    embebido para evitar la serialización JSON y el salto por la red local.
+
+    Args:
+        model_folder (str): Carpeta del modelo.
+        model_name (str): Nombre del modelo.
+        window_size (int): Tamaño de la ventana de datos.
+        angulo (array-like): Valores de ángulo.
+        par (array-like): Valores de par.
+
+    Returns:
+        dict: Resultado de la predicción y probabilidad de la clase NOT OK.
+
+    Raises:
+        FileNotFoundError: Si el modelo o el scaler no existen.
+        ValueError: Si los datos no tienen el tamaño de la ventana.
+    """
+    model, scaler = get_model_and_scaler(model_folder, model_name, window_size)
+    stage("lookup")
 
     # Verificar que los datos tengan el tamaño correcto
-    if len(request.angulo) != request.window_size or len(request.par) != request.window_size:
-        raise HTTPException(status_code=400, detail=f"El tamaño de los datos de ángulo y par debe ser {request.window_size}.")
+    if len(angulo) != window_size or len(par) != window_size:
+        raise ValueError(f"El tamaño de los datos de ángulo y par debe ser {window_size}.")
 
-    # Convertir los datos en un numpy array y escalarlo
-    data_array = np.array(request.angulo + request.par).reshape(1, -1)
-    scaled_data = scaler.transform(data_array)
+    # Convertir los datos en un numpy array, escalarlo y realizar la predicción
+    data_array = np.concatenate([np.asarray(angulo, dtype=float), np.asarray(par, dtype=float)]).reshape(1, -1)
+    if batcher is not None:
+        pred, prob = batcher.submit((model_folder, model_name, window_size), data_array[0])
+        stage("predict")
+    else:
+        preds, probs = predict_matrix(model, scaler, data_array)
+        pred, prob = preds[0], probs[0]
+    result = 'OK' if pred == 0 else 'NOT OK'
+    MODEL_PREDICTIONS.inc(model=f"{model_folder}/{model_name}", prediction=result)
 
-    # Realizar la predicción
-    pred = model.predict(scaled_data)
-    result = 'OK' if pred[0] == 0 else 'NOT OK'
+    return {"prediction": result, "probability": float(prob)}
+
+@app.post("/predict_batch")
+def predict_batch(request: BatchPredictionRequest):
+    """
+    Realiza predicciones para varias ventanas en una sola solicitud.
 
-    return {"prediction": result}
+    Las ventanas pueden pertenecer a distintos procesos e identificadores; todas se
+    escalan y predicen con una única llamada vectorizada y se devuelven en el mismo orden.
+
+    Args:
+        request (BatchPredictionRequest): Solicitud con las ventanas y configuración del modelo.
+
+    Returns:
+        dict: Lista de predicciones con etiqueta y probabilidad de cada ventana.
+    """
+    stage("decode")
+    model_label = f"{request.model_folder}/{request.model_name}"
+    try:
+        model, scaler = get_model_and_scaler(request.model_folder, request.model_name, request.window_size)
+        stage("lookup")
+    except FileNotFoundError as e:
+        MODEL_ERRORS.inc(model=model_label, reason="not_found")
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        MODEL_ERRORS.inc(model=model_label, reason="invalid")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    n_windows = len(request.angulo)
+    if len(request.par) != n_windows:
+        raise HTTPException(status_code=400, detail="El número de ventanas de ángulo y par debe coincidir.")
+    if request.identificadores is not None and len(request.identificadores) != n_windows:
+        raise HTTPException(status_code=400, detail="El número de identificadores debe coincidir con el número de ventanas.")
+    if n_windows == 0:
+        return {"predictions": []}
+
+    try:
+        angulo = np.asarray(request.angulo, dtype=float)
+        par = np.asarray(request.par, dtype=float)
+    except ValueError:
+        angulo = par = None
+    if angulo is None or angulo.shape != (n_windows, request.window_size) or par.shape != (n_windows, request.window_size):
+        MODEL_ERRORS.inc(model=model_label, reason="invalid")
+        raise HTTPException(status_code=400, detail=f"Cada ventana de ángulo y par debe tener tamaño {request.window_size}.")
+
+    data_array = np.hstack([angulo, par])
+    preds, probs = predict_matrix(model, scaler, data_array)
+    n_not_ok = int(np.count_nonzero(preds != 0))
+    MODEL_PREDICTIONS.inc(n_windows - n_not_ok, model=model_label, prediction='OK')
+    MODEL_PREDICTIONS.inc(n_not_ok, model=model_label, prediction='NOT OK')
+
+    identificadores = request.identificadores or [None] * n_windows
+    predictions = [
+        {"prediction": 'OK' if pred == 0 else 'NOT OK', "probability": float(prob), "identificador": identificador}
+        for pred, prob, identificador in zip(preds, probs, identificadores)
+    ]
+    return {"predictions": predictions}
+
+def validation_batch(window_size, n_windows=VALIDATION_WINDOWS):
+    """
+    Genera un lote fijo de ventanas sintéticas para validar un modelo recién cargado.
+
+    Args:
+        window_size (int): Tamaño de la ventana de datos.
+        n_windows (int): Número de ventanas del lote.
+
+    Returns:
+        np.ndarray: Matriz de forma (n_windows, 2 * window_size).
+    """
+    ramp = np.linspace(0.0, 1.0, window_size)
+    factors = np.linspace(0.0, 2.0, n_windows)[:, None]
+    angulo = 360.0 * ramp * factors
+    par = 10.0 * ramp ** 2 * factors
+    return np.hstack([angulo, par])
+
+def warm_model(model_folder, model_name, window_size, pin=True):
+    """
+    Carga un modelo, lo valida con un lote sintético y lo deja listo para predecir.
+
+    Es la primera fase del cambio de modelo: cuando termina, la primera ventana real
+    ya no paga la carga ni la primera ejecución. Si la validación falla, el modelo
+    se descarta del registro.
+
+    Args:
+        model_folder (str): Carpeta del modelo.
+        model_name (str): Nombre del modelo.
+        window_size (int): Tamaño de la ventana de datos.
+        pin (bool): Si el modelo se fija en el registro para que no se desaloje.
+
+    Returns:
+        dict: Tiempos de carga, de la primera ejecución y de una predicción individual.
+
+    Raises:
+        FileNotFoundError: Si el modelo o el scaler no existen.
+        ValueError: Si el modelo no se puede cargar o no supera la validación.
+    """
+    key = (model_folder, model_name, window_size)
+    cached = key in registry
+    start = time.perf_counter()
+    model, scaler = get_model_and_scaler(model_folder, model_name, window_size)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    batch = validation_batch(window_size)
+    try:
+        start = time.perf_counter()
+        labels, probs = predict_matrix(model, scaler, batch)
+        warmup_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        predict_matrix(model, scaler, batch[:1])
+        predict_ms = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        registry.discard(*key)
+        raise ValueError(f"El modelo no pudo predecir el lote de validación: {e}")
+
+    probs = np.asarray(probs, dtype=float)
+    if probs.shape != (len(batch),) or not np.all(np.isfinite(probs)) or probs.min() < 0 or probs.max() > 1:
+        registry.discard(*key)
+        raise ValueError("El modelo devolvió probabilidades no válidas en el lote de validación.")
+
+    if pin:
+        registry.pin(*key)
+    return {
+        "model_folder": model_folder,
+        "model_name": model_name,
+        "window_size": window_size,
+        "cached": cached,
+        "engine": type(model).__name__,
+        "load_ms": round(load_ms, 3),
+        "warmup_ms": round(warmup_ms, 3),
+        "predict_ms": round(predict_ms, 3),
+        "validation": {"windows": len(batch), "not_ok": int(np.sum(labels != 0)),
+                       "probability_min": float(probs.min()), "probability_max": float(probs.max())},
+    }
+
+def unpin(model_folder, model_name, window_size):
+    """
+    Permite que el registro vuelva a desalojar un modelo.
+
+    Args:
+        model_folder (str): Carpeta del modelo.
+        model_name (str): Nombre del modelo.
+        window_size (int): Tamaño de la ventana de datos.
+    """
+    registry.unpin(model_folder, model_name, window_size)
+
+def on_all_workers(func, *args, keep=None, forget=None):
+    """
+    Ejecuta una función en todos los workers del servicio.
+
+    En el modo multiproceso cada worker tiene su propio registro de modelos, así que
+    cargar, fijar o liberar un modelo solo en el worker que recibe la solicitud dejaría
+    a los demás sin cambios. La orden se reparte con `broadcast` del servidor prefork;
+    `keep` y `forget` mantienen el conjunto de modelos fijados que se vuelve a cargar
+    en un worker que se reinicia.
+
+    Args:
+        func (callable): Función de nivel de módulo a ejecutar.
+        *args: Argumentos de la función.
+        keep: Clave que la orden agrega al estado de los workers nuevos.
+        forget: Clave que se retira de ese estado.
+
+    Returns:
+        list: Resultado de la función en cada worker.
+
+    Raises:
+        HTTPException: Si hay varios workers pero no se pueden alcanzar todos (sin `fork`).
+    """
+    if MODEL_SERVICE_WORKERS <= 1:
+        return [func(*args)]
+    if not is_worker():
+        raise HTTPException(status_code=501, detail=(
+            "Con MODEL_SERVICE_WORKERS > 1 los modelos solo se pueden cargar o liberar en todos los "
+            "workers con el servidor prefork (fork). Use MODEL_SERVICE_WORKERS=1 en este sistema."))
+    return broadcast(func, *args, keep=keep, forget=forget)
+
+@app.post("/load_model")
+def load_model(request: ModelLoadRequest):
+    """
+    Carga, valida y calienta un modelo antes de que empiece a recibir ventanas.
+
+    En el modo multiproceso el modelo se carga y se fija en todos los workers; los
+    tiempos devueltos son los del primero.
+
+    Args:
+        request (ModelLoadRequest): Modelo a cargar.
+
+    Returns:
+        dict: Tiempos de carga, resultado de la validación y número de workers.
+    """
+    try:
+        key = (request.model_folder, request.model_name, request.window_size)
+        results = on_all_workers(warm_model, *key, request.pin, keep=key if request.pin else None)
+        return {**results[0], "workers": len(results)}
+    except HTTPException:
+        raise
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"No todos los workers cargaron el modelo: {e}")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"No se pudo cargar el modelo: {e}")
+
+@app.post("/unpin_model")
+def unpin_model(request: ModelLoadRequest):
+    """
+    Permite que el registro vuelva a desalojar un modelo que dejó de estar en uso.
+
+    En el modo multiproceso el modelo se libera en todos los workers.
+
+    Args:
+        request (ModelLoadRequest): Modelo a liberar.
+
+    Returns:
+        dict: Mensaje de confirmación.
+    """
+    key = (request.model_folder, request.model_name, request.window_size)
+    try:
+        on_all_workers(unpin, *key, forget=key)
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"No todos los workers liberaron el modelo: {e}")
+    return {"message": "Model unpinned"}
+
+@app.get("/model_cache")
+def model_cache_stats():
+    """
+    Devuelve las estadísticas del registro de modelos.
+
+    Returns:
+        dict: Proceso que responde, aciertos, fallos, recargas, desalojos y entradas cargadas.
+    """
+    return {"pid": os.getpid(), **registry.stats()}
+
+@app.get("/batching_stats")
+def batching_stats():
+    """
+    Devuelve las estadísticas del agrupador de solicitudes.
+
+    Returns:
+        dict: Histograma de tamaños de lote y retardo en cola, o aviso si está desactivado.
+    """
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+def _registry_samples(field):
+    """
+    Devuelve un contador del registro de modelos como muestra de métricas.
+
+    Args:
+        field (str): Campo de `registry.stats()`.
+
+    Returns:
+        list: Una muestra sin etiquetas.
+    """
+    return [({}, registry.stats()[field])]
+
+for field, kind, documentation in (
+    ("hits", "counter", "Consultas al registro de modelos resueltas en memoria."),
+    ("misses", "counter", "Consultas al registro de modelos que cargaron el modelo del disco."),
+    ("reloads", "counter", "Recargas de modelos cuyos archivos cambiaron."),
+    ("evictions", "counter", "Modelos desalojados del registro."),
+    ("bytes", "gauge", "Memoria estimada de los modelos cargados."),
+):
+    REGISTRY.add_collector(f"ffp_model_cache_{field}" + ("_total" if kind == "counter" else ""), kind, documentation,
+                           lambda field=field: _registry_samples(field))
+REGISTRY.add_collector("ffp_model_cache_entries", "gauge", "Modelos cargados en el registro.",
+                       lambda: [({}, len(registry.stats()["entries"]))])
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """
+    Devuelve las métricas del proceso en formato de texto de Prometheus.
+
+    Returns:
+        Response: Histogramas de carga, escalado y predicción, contadores de
+        predicciones, errores y del registro de modelos, y métricas HTTP.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/profiles")
+def list_profiles():
+    """
+    Lista los perfiles de solicitudes capturados por este servicio.
+
+    Se capturan con PROFILE_SAMPLE_PERCENT o PROFILE_SLOW_MS; sin ellos la lista está vacía.
+
+    Returns:
+        dict: Configuración del perfilado y resumen de cada perfil, del más reciente al más antiguo.
+    """
+    return {
+        "enabled": profiling.PROFILING_ENABLED,
+        "sample_percent": profiling.PROFILE_SAMPLE_PERCENT,
+        "slow_ms": profiling.PROFILE_SLOW_MS,
+        "profiles": profiling.store.list(service="model_service"),
+    }
+
+@app.get("/profiles/{name}")
+def download_profile(name: str, format: str = "json"):
+    """
+    Descarga un perfil capturado.
+
+    Args:
+        name (str): Nombre del perfil devuelto por `/profiles`.
+        format (str): "json" para el perfil completo o "folded" para las pilas en
+            formato colapsado (flamegraph.pl, speedscope).
+
+    Returns:
+        FileResponse | PlainTextResponse: Contenido del perfil.
+    """
+    if format == "folded":
+        folded = profiling.store.folded(name)
+        if folded is not None:
+            return PlainTextResponse(folded)
+    elif format == "json":
+        path = profiling.store.path(name)
+        if path is not None:
+            return FileResponse(path, media_type="application/json", filename=name)
+    else:
+        raise HTTPException(status_code=400, detail="El formato debe ser 'json' o 'folded'.")
+    raise HTTPException(status_code=404, detail=f"No existe el perfil {name}.")
 
 @app.get("/")
 def read_root():
@@ -120,9 +757,58 @@ def read_root():
     """
     return {"message": "FastAPI Prediction Service is running"}
 
+def parse_preload(spec):
+    """
+    Interpreta la lista de modelos a precargar.
+
+    Args:
+        spec (str): Modelos separados por comas con el formato "carpeta/modelo[:ventana]";
+            si se omite la ventana se toma del final del nombre (ensemble_{w}).
+
+    Returns:
+        list: Tuplas (model_folder, model_name, window_size).
+
+    Raises:
+        ValueError: Si algún elemento no tiene el formato esperado.
+    """
+    keys = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        path, _, window = item.partition(':')
+        model_folder, _, model_name = path.partition('/')
+        if not model_folder or not model_name:
+            raise ValueError(f"Modelo a precargar no válido: {item}")
+        keys.append((model_folder, model_name, int(window or model_name.split('_')[-1])))
+    return keys
+
+def preload_models():
+    """
+    Carga en el registro los modelos activos antes de atender solicitudes.
+
+    En el modo multiproceso se ejecuta una sola vez antes de crear los workers, que
+    heredan los modelos ya cargados.
+    """
+    for key in parse_preload(MODEL_SERVICE_PRELOAD):
+        start = time.perf_counter()
+        try:
+            registry.get(*key)
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning("No se pudo precargar %s/%s: %s", key[0], key[1], e)
+            continue
+        logger.info("Modelo precargado %s/%s en %.0f ms", key[0], key[1], (time.perf_counter() - start) * 1000)
+
 def start_service():
     """
     Inicia el servidor de FastAPI.
+
+    Con `MODEL_SERVICE_WORKERS` mayor que 1 se inician varios procesos que comparten
+    el puerto y los modelos precargados.
     """
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if MODEL_SERVICE_WORKERS <= 1:
+        import uvicorn
+        preload_models()
+        uvicorn.run(app, host="0.0.0.0", port=8000)
+        return
+
+    serve_prefork(app, port=8000, workers=MODEL_SERVICE_WORKERS, threads_per_worker=MODEL_SERVICE_THREADS_PER_WORKER,
+                  preload=preload_models, pin_cores=MODEL_SERVICE_PIN_CORES,
+                  import_string="model_service:app")
@@ -0,0 +1,214 @@
+"""
+Codificación Compacta de las Ventanas
+
+Este módulo define los formatos en que los clientes pueden enviar las ventanas de
+ángulo y par a `/data` (prediction_service) y a `/predict` (model_service), además del
+JSON con listas de números de siempre:
+
+    - base64: en el mismo JSON, cada campo es un texto base64 con los valores como
+      float32 little-endian. Evita crear un objeto float de Python por punto.
+    - binario: cuerpo `application/octet-stream` con los valores float32
+      little-endian del ángulo seguidos de los del par (misma longitud), y el resto
+      de campos como parámetros de la URL. No hay JSON que interpretar.
+
+En los tres casos los campos de la ventana llegan al endpoint como arreglos de NumPy.
+Los datos de los atornillados ya son float32 desde el origen (caché de Excel, ventanas
+y búfer de curvas), por lo que los formatos compactos no pierden precisión.
+
+Imports:
+    - base64: Librería para codificar los arreglos en texto.
+    - json: Librería para el formato JSON.
+    - typing: Tipos de los campos de la ventana.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - fastapi: Errores de validación y lectura del cuerpo de la solicitud.
+    - pydantic: Validación de los campos de la ventana.
+
+Funciones:
+    - encode_array: Codifica un arreglo como texto base64 de float32.
+    - decode_array: Decodifica un texto base64 de float32.
+    - pack_window: Codifica una ventana en el formato binario.
+    - unpack_window: Decodifica una ventana del formato binario.
+    - encode_request: Prepara el cuerpo de una solicitud en el formato indicado.
+    - body_parser: Crea la dependencia que lee una solicitud en cualquier formato.
+    - openapi_body: Documenta los formatos aceptados en el esquema OpenAPI.
+"""
+
+import base64
+import json
+from typing import Annotated, List, Union
+import numpy as np
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError, WrapValidator
+
+BINARY_CONTENT_TYPE = "application/octet-stream"
+PAYLOAD_FORMATS = ("json", "base64", "binario")
+WIRE_DTYPE = np.dtype("<f4")
+
+
+def encode_array(values):
+    """
+    Codifica un arreglo como texto base64 de float32 little-endian.
+
+    Args:
+        values (array-like): Valores a codificar.
+
+    Returns:
+        str: Texto base64.
+    """
+    return base64.b64encode(np.asarray(values, dtype=WIRE_DTYPE).tobytes()).decode("ascii")
+
+
+def decode_array(text):
+    """
+    Decodifica un texto base64 de float32 little-endian.
+
+    Args:
+        text (str): Texto base64.
+
+    Returns:
+        np.ndarray: Arreglo float32.
+
+    Raises:
+        ValueError: Si el texto no es base64 válido o su longitud no es múltiplo de 4 bytes.
+    """
+    try:
+        raw = base64.b64decode(text, validate=True)
+    except ValueError:
+        raise ValueError("El texto no es base64 válido.")
+    if len(raw) % WIRE_DTYPE.itemsize:
+        raise ValueError("La longitud de los datos no es múltiplo de 4 bytes (float32).")
+    return np.frombuffer(raw, dtype=WIRE_DTYPE)
+
+
+def _validate_window(value, handler):
+    """
+    Convierte un campo de la ventana en un arreglo de NumPy.
+
+    Los arreglos (formato binario) se aceptan tal cual; el resto se valida como lista
+    de números o texto base64.
+    """
+    if isinstance(value, np.ndarray):
+        return value
+    value = handler(value)
+    if isinstance(value, str):
+        return decode_array(value)
+    return np.asarray(value, dtype=float)
+
+
+# Campo de una ventana: lista de números o texto base64, que se entrega como arreglo
+WindowArray = Annotated[Union[List[float], str], WrapValidator(_validate_window)]
+
+
+def pack_window(angulo, par):
+    """
+    Codifica una ventana en el formato binario.
+
+    Args:
+        angulo (array-like): Valores de ángulo.
+        par (array-like): Valores de par, de la misma longitud.
+
+    Returns:
+        bytes: float32 little-endian del ángulo seguidos de los del par.
+    """
+    return np.concatenate([np.asarray(angulo, dtype=WIRE_DTYPE), np.asarray(par, dtype=WIRE_DTYPE)]).tobytes()
+
+
+def unpack_window(body):
+    """
+    Decodifica una ventana del formato binario.
+
+    Args:
+        body (bytes): Cuerpo de la solicitud.
+
+    Returns:
+        tuple: Arreglos float32 de ángulo y par.
+
+    Raises:
+        ValueError: Si el cuerpo no contiene dos series float32 de la misma longitud.
+    """
+    if len(body) % (2 * WIRE_DTYPE.itemsize):
+        raise ValueError("El cuerpo debe contener el ángulo y el par como float32 de la misma longitud.")
+    values = np.frombuffer(body, dtype=WIRE_DTYPE)
+    half = len(values) // 2
+    return values[:half], values[half:]
+
+
+def encode_request(angulo, par, fields, payload_format="json"):
+    """
+    Prepara el cuerpo de una solicitud con una ventana en el formato indicado.
+
+    Devuelve los argumentos comunes a `requests` y `httpx`: parámetros de la URL,
+    cabeceras y cuerpo ya codificado (`data=` en requests, `content=` en httpx).
+
+    Args:
+        angulo (array-like): Valores de ángulo.
+        par (array-like): Valores de par.
+        fields (dict): Resto de campos de la solicitud.
+        payload_format (str): "json", "base64" o "binario".
+
+    Returns:
+        tuple: Parámetros de la URL (o None), cabeceras y cuerpo en bytes.
+
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    if payload_format == "binario":
+        params = {key: str(value).lower() if isinstance(value, bool) else value for key, value in fields.items()}
+        return params, {"Content-Type": BINARY_CONTENT_TYPE}, pack_window(angulo, par)
+    if payload_format == "base64":
+        body = {"angulo": encode_array(angulo), "par": encode_array(par), **fields}
+    elif payload_format == "json":
+        body = {"angulo": np.asarray(angulo, dtype=float).tolist(), "par": np.asarray(par, dtype=float).tolist(), **fields}
+    else:
+        raise ValueError(f"Formato desconocido: {payload_format}. Use uno de {PAYLOAD_FORMATS}.")
+    return None, {"Content-Type": "application/json"}, json.dumps(body, separators=(",", ":")).encode()
+
+
+def body_parser(model):
+    """
+    Crea la dependencia de FastAPI que lee una solicitud en cualquiera de los formatos.
+
+    El JSON (con listas o base64) se valida directamente desde los bytes, sin pasar por
+    objetos intermedios de Python. Los errores se devuelven como el 422 habitual; en el
+    formato binario no incluyen el valor recibido, que contiene los arreglos de la
+    ventana y no se puede convertir a JSON.
+
+    Args:
+        model (type): Modelo de pydantic de la solicitud.
+
+    Returns:
+        callable: Dependencia que devuelve la solicitud validada.
+    """
+    async def parse(request: Request):
+        body = await request.body()
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        binary = content_type == BINARY_CONTENT_TYPE
+        try:
+            if binary:
+                angulo, par = unpack_window(body)
+                return model.model_validate({**request.query_params, "angulo": angulo, "par": par})
+            return model.model_validate_json(body)
+        except ValidationError as e:
+            errors = [{**error, "loc": ("body", *error["loc"])}
+                      for error in e.errors(include_url=False, include_context=False, include_input=not binary)]
+            raise RequestValidationError(errors, body=None if binary else body)
+        except ValueError as e:
+            raise RequestValidationError([{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}])
+    return parse
+
+
+def openapi_body(model):
+    """
+    Documenta los formatos aceptados en el esquema OpenAPI de un endpoint.
+
+    Args:
+        model (type): Modelo de pydantic de la solicitud JSON.
+
+    Returns:
+        dict: Valor para el argumento `openapi_extra` de la ruta.
+    """
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": model.model_json_schema()},
+        BINARY_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    }}}
@@ -1,24 +1,157 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, ConfigDict
-import requests
+from typing import Optional
+import asyncio
+import httpx
+import os
+import time
+from session_store import SessionStore
+from event_bus import EventBus
+from timing import add_timing_middleware, merge_server_timing, stage
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, counter, histogram
+from log_config import get_logger
+import profiling
+from payload import BINARY_CONTENT_TYPE, WindowArray, body_parser, openapi_body, pack_window
 
-app = FastAPI()
+MODEL_SERVICE_URL = os.environ.get("MODEL_SERVICE_URL", "http://localhost:8000")
+# Tiempos de espera (segundos) y límites del pool de conexiones hacia model_service
+MODEL_SERVICE_TIMEOUT = float(os.environ.get("MODEL_SERVICE_TIMEOUT", "10"))
+MODEL_SERVICE_CONNECT_TIMEOUT = float(os.environ.get("MODEL_SERVICE_CONNECT_TIMEOUT", "2"))
+MODEL_SERVICE_MAX_CONNECTIONS = int(os.environ.get("MODEL_SERVICE_MAX_CONNECTIONS", "20"))
+MODEL_SERVICE_MAX_KEEPALIVE = int(os.environ.get("MODEL_SERVICE_MAX_KEEPALIVE", "10"))
+# Si está activo, /data responde de inmediato y la predicción se adjunta al terminar
+ASYNC_PREDICTION = os.environ.get("ASYNC_PREDICTION", "0") == "1"
+# Si está activo, las predicciones se calculan en este mismo proceso sin llamar a model_service por HTTP
+EMBEDDED_MODEL = os.environ.get("EMBEDDED_MODEL", "0") == "1"
+# Límites del almacén de sesiones por estación
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "64"))
+SESSION_IDLE_TIMEOUT = float(os.environ.get("SESSION_IDLE_TIMEOUT", "3600"))
+SESSION_MAX_POINTS = int(os.environ.get("SESSION_MAX_POINTS", "20000"))
+SESSION_OVERFLOW = os.environ.get("SESSION_OVERFLOW", "overwrite")
+# Eventos pendientes por suscriptor de /stream antes de descartarlo, y segundos entre latidos
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", "256"))
+STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", "15"))
+# Segundos máximos para que model_service cargue y valide un modelo nuevo
+MODEL_LOAD_TIMEOUT = float(os.environ.get("MODEL_LOAD_TIMEOUT", "60"))
+# Devolver la duración de cada etapa de /data en la cabecera Server-Timing
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+
+http_client = None
+model_service = None
+pending_tasks = set()
+window_seq = 0
+
+@asynccontextmanager
+async def lifespan(app):
+    """Crea el cliente HTTP compartido al iniciar y lo cierra al detener el servicio.
+
+    Args:
+        app (FastAPI): Aplicación de FastAPI.
+    """
+    global http_client
+    http_client = httpx.AsyncClient(
+        base_url=MODEL_SERVICE_URL,
+        timeout=httpx.Timeout(MODEL_SERVICE_TIMEOUT, connect=MODEL_SERVICE_CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=MODEL_SERVICE_MAX_CONNECTIONS, max_keepalive_connections=MODEL_SERVICE_MAX_KEEPALIVE),
+    )
+    try:
+        yield
+    finally:
+        if pending_tasks:
+            await asyncio.gather(*pending_tasks, return_exceptions=True)
+        await http_client.aclose()
+        http_client = None
+
+app = FastAPI(lifespan=lifespan)
+if SERVER_TIMING:
+    add_timing_middleware(app)
+app.add_middleware(MetricsMiddleware, service="prediction_service", paths=("/data", "/get_data"))
+if profiling.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware, service="prediction_service",
+                       paths=("/data", "/update_model"))
+
+logger = get_logger("prediction_service")
+
+FORWARD_SECONDS = histogram("ffp_forward_seconds", "Duración de la solicitud de predicción a model_service.", ("mode",))
+PREDICTIONS = counter("ffp_predictions_total", "Predicciones por estación, modelo y resultado (OK, NOT OK o Error).",
+                      ("estacion", "model", "prediction"))
+PREDICTION_ERRORS = counter("ffp_prediction_errors_total", "Predicciones fallidas por estación, modelo y motivo.",
+                            ("estacion", "model", "reason"))
+REGISTRY.add_collector("ffp_pending_predictions", "gauge", "Predicciones asíncronas en curso.",
+                       lambda: [({}, len(pending_tasks))])
+# Estaciones con etiqueta propia en las métricas; el resto se agrupa en "other"
+metric_stations = set()
+
+def station_label(estacion):
+    """Devuelve la etiqueta de estación de las métricas de predicción.
+
+    Las estaciones las eligen los clientes, así que solo las primeras `MAX_SESSIONS`
+    tienen etiqueta propia; las que llegan después (por ejemplo, tras desalojar una
+    sesión) se cuentan como "other" para que el número de series no crezca sin límite.
+
+    Args:
+        estacion (str): Estación de la ventana.
+
+    Returns:
+        str: Estación o "other".
+    """
+    if estacion not in metric_stations:
+        if len(metric_stations) >= MAX_SESSIONS:
+            return "other"
+        metric_stations.add(estacion)
+    return estacion
+
+def model_label(json_data):
+    """Devuelve la etiqueta de modelo de las métricas de predicción.
+
+    Solo tienen etiqueta propia el modelo activo y el anterior, que `/update_model`
+    ya aceptó; cualquier otro se cuenta como "other".
+
+    Args:
+        json_data (dict): Configuración del modelo de la ventana.
+
+    Returns:
+        str: "carpeta/modelo" u "other".
+    """
+    info = {key: json_data[key] for key in ("model_folder", "model_name", "window_size")}
+    if info["model_name"] and info in (model_info, previous_model_info):
+        return f"{info['model_folder']}/{info['model_name']}"
+    return "other"
+
+def enable_embedded_model():
+    """Activa el modo embebido cargando model_service en este mismo proceso.
+
+    Las rutas de model_service se montan bajo `/model` para que los clientes
+    externos sigan teniendo acceso a ellas sin un segundo servidor.
+    """
+    global EMBEDDED_MODEL, model_service
+    if model_service is not None:
+        return
+    import model_service as embedded_service
+    model_service = embedded_service
+    EMBEDDED_MODEL = True
+    app.mount("/model", model_service.app)
 
 class DataRequest(BaseModel):
     """Modelo para los datos recibidos en el endpoint de datos.
 
     Attributes:
-        angulo (list): Lista de valores de ángulo.
-        par (list): Lista de valores de par.
+        angulo (np.ndarray): Valores de ángulo; llegan como lista de números o texto base64.
+        par (np.ndarray): Valores de par; llegan como lista de números o texto base64.
         reset (bool): Indicador de reinicio del proceso.
         identificador (str): Identificador del proceso.
         fecha (str): Fecha asociada al proceso.
+        estacion (str): Estación de atornillado que envía los datos.
     """
-    angulo: list
-    par: list
+    angulo: WindowArray
+    par: WindowArray
     reset: bool
     identificador: str
     fecha: str  # Nuevo campo para la fecha
+    estacion: str = ""
 
 class ModelUpdateRequest(BaseModel):
     """Modelo para la solicitud de actualización de modelo.
@@ -33,73 +166,364 @@ class ModelUpdateRequest(BaseModel):
     model_name: str
     window_size: int
 
-data = {"angulo": [], "par": [], "prediction": "", "reset": False, "identificador": "", "fecha": ""}
+sessions = SessionStore(max_sessions=MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT,
+                        max_points=SESSION_MAX_POINTS, overflow=SESSION_OVERFLOW)
+events = EventBus(max_queue=STREAM_QUEUE_SIZE)
 model_info = {"model_folder": "", "model_name": "", "window_size": 0}
+# Modelo activo antes del último cambio; sigue cargado para poder volver a él al instante
+previous_model_info = None
+model_switch_lock = asyncio.Lock()
+
+async def warm_model(info):
+    """Pide a model_service que cargue, valide y caliente un modelo.
+
+    Args:
+        info (dict): Carpeta, nombre y tamaño de ventana del modelo.
+
+    Returns:
+        dict: Tiempos de carga y resultado de la validación.
+
+    Raises:
+        HTTPException: Si el modelo no existe, no supera la validación o model_service no responde.
+    """
+    if EMBEDDED_MODEL:
+        try:
+            return await run_in_threadpool(model_service.warm_model, **info)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        response = await http_client.post("/load_model", json=info, timeout=MODEL_LOAD_TIMEOUT)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"model_service no respondió al cargar el modelo: {e}")
+    if response.status_code != 200:
+        try:
+            detail = response.json().get("detail", response.text)
+        except ValueError:
+            detail = response.text
+        raise HTTPException(status_code=response.status_code if response.status_code < 500 else 502, detail=detail)
+    return response.json()
+
+async def release_model(info):
+    """Permite que model_service desaloje un modelo que ya no es el activo ni el anterior.
+
+    Args:
+        info (dict): Carpeta, nombre y tamaño de ventana del modelo.
+    """
+    if EMBEDDED_MODEL:
+        model_service.registry.unpin(info["model_folder"], info["model_name"], info["window_size"])
+        return
+    try:
+        await http_client.post("/unpin_model", json=info)
+    except httpx.HTTPError as e:
+        logger.warning("No se pudo liberar el modelo %s: %s", info['model_name'], e)
 
 @app.post("/update_model")
 async def update_model(request: ModelUpdateRequest):
-    """Actualiza la información del modelo con los datos proporcionados.
+    """Cambia el modelo activo en dos fases.
+
+    Primero model_service carga el modelo nuevo, lo valida con un lote de prueba y lo
+    calienta; solo si todo sale bien se cambia el modelo activo, de forma atómica. Si
+    falla, el modelo activo no cambia. El modelo anterior sigue cargado para poder
+    volver a él con `/rollback_model`.
 
     Args:
         request (ModelUpdateRequest): Datos de la solicitud de actualización del modelo.
 
     Returns:
-        dict: Mensaje de confirmación de actualización.
+        dict: Mensaje de confirmación, modelo activo, modelo anterior y tiempos de carga.
+    """
+    global model_info, previous_model_info
+    new_info = request.dict()
+    async with model_switch_lock:
+        timings = await warm_model(new_info)
+        dropped = None
+        if new_info != model_info:
+            dropped = previous_model_info
+            previous_model_info = model_info if model_info["model_name"] else None
+            model_info = new_info
+    if dropped is not None and dropped not in (model_info, previous_model_info):
+        await release_model(dropped)
+    return {"message": "Model information updated successfully", "model": model_info,
+            "previous_model": previous_model_info, "timings": timings}
+
+@app.post("/rollback_model")
+async def rollback_model():
+    """Vuelve al modelo activo antes del último cambio.
+
+    El modelo anterior sigue cargado en model_service, por lo que el cambio es inmediato.
+
+    Returns:
+        dict: Mensaje de confirmación, modelo activo y modelo anterior.
     """
-    global model_info
-    model_info = request.dict()
-    return {"message": "Model information updated successfully"}
+    global model_info, previous_model_info
+    async with model_switch_lock:
+        if previous_model_info is None:
+            raise HTTPException(status_code=409, detail="No hay un modelo anterior al que volver.")
+        model_info, previous_model_info = previous_model_info, model_info
+    return {"message": "Model rolled back successfully", "model": model_info, "previous_model": previous_model_info}
 
-@app.post("/data")
-async def receive_data(request: DataRequest):
+@app.get("/model_info")
+async def get_model_info():
+    """Devuelve el modelo activo y el anterior.
+
+    Returns:
+        dict: Modelo activo y modelo anterior.
+    """
+    return {"model": model_info, "previous_model": previous_model_info}
+
+@app.post("/data", openapi_extra=openapi_body(DataRequest))
+async def receive_data(request: DataRequest = Depends(body_parser(DataRequest))):
     """Recibe datos de ángulo y par, los procesa y solicita una predicción.
 
+    Además del JSON acepta el formato binario de `payload`: cuerpo
+    `application/octet-stream` con el ángulo y el par en float32 y el resto de
+    campos como parámetros de la URL.
+
     Args:
         request (DataRequest): Datos de ángulo, par y otros detalles del proceso.
 
     Returns:
         dict: Mensaje de confirmación de recepción de datos.
     """
-    global data
+    global window_seq
+    stage("decode")
+    # Copia local del modelo activo: un cambio de modelo concurrente no mezcla campos
+    current_model = model_info
+    try:
+        session = sessions.append(request.estacion, request.angulo, request.par, request.reset,
+                                  request.identificador, request.fecha)
+    except OverflowError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     if request.reset:
-        data = {"angulo": [], "par": [], "prediction": "", "reset": True, "identificador": request.identificador, "fecha": request.fecha}
-    data["angulo"].extend(request.angulo)
-    data["par"].extend(request.par)
-    data["reset"] = request.reset
-    data["identificador"] = request.identificador
-    data["fecha"] = request.fecha  # Actualizar fecha
+        events.publish("reset", session.estacion, {
+            "estacion": session.estacion, "identificador": request.identificador,
+            "fecha": request.fecha, "seq": session.start_seq,
+        })
+    # Convertir la ventana a listas solo si hay suscriptores que la reciban
+    if events:
+        events.publish("ventana", session.estacion, {
+            "estacion": session.estacion, "identificador": request.identificador, "fecha": request.fecha,
+            "angulo": request.angulo.tolist(), "par": request.par.tolist(), "seq": session.buffer.total,
+        })
 
     json_data = {
-        "model_folder": model_info["model_folder"],
-        "model_name": model_info["model_name"],
-        "window_size": model_info["window_size"],
+        "model_folder": current_model["model_folder"],
+        "model_name": current_model["model_name"],
+        "window_size": current_model["window_size"],
         "angulo": request.angulo,
         "par": request.par
     }
 
+    window_seq += 1
+    stage("session")
+    if ASYNC_PREDICTION:
+        task = asyncio.create_task(attach_prediction(session, window_seq, json_data))
+        pending_tasks.add(task)
+        task.add_done_callback(pending_tasks.discard)
+    else:
+        await attach_prediction(session, window_seq, json_data)
+
+    return {"message": "Data received"}
+
+async def request_prediction(json_data, estacion=""):
+    """Solicita una predicción a model_service con el cliente HTTP compartido.
+
+    La ventana se envía en el formato binario de `payload`. En el modo embebido la
+    predicción se calcula en un hilo del pool de este mismo proceso, sin serializarla.
+
+    Args:
+        json_data (dict): Configuración del modelo y ventana de ángulo y par.
+        estacion (str): Estación de la ventana, para las métricas.
+
+    Returns:
+        str: Predicción recibida o "Error" si la solicitud falla.
+    """
+    labels = {"estacion": station_label(estacion), "model": model_label(json_data)}
+    started_at = time.perf_counter()
+    if EMBEDDED_MODEL:
+        try:
+            result = await run_in_threadpool(model_service.predict_window, **json_data)
+        except Exception as e:
+            # Igual que en el modo HTTP, cualquier fallo de la inferencia se informa como "Error"
+            PREDICTION_ERRORS.inc(**labels, reason=type(e).__name__)
+            logger.warning("Error en la predicción: %s: %s", type(e).__name__, e)
+            return "Error"
+        finally:
+            FORWARD_SECONDS.observe(time.perf_counter() - started_at, mode="embedded")
+        logger.debug("Predicción recibida: %s", result['prediction'])
+        return result["prediction"]
+
     try:
-        response = requests.post("http://localhost:8000/predict", json=json_data)
+        params = {key: json_data[key] for key in ("model_folder", "model_name", "window_size")}
+        response = await http_client.post("/predict", params=params, content=pack_window(json_data["angulo"], json_data["par"]),
+                                          headers={"Content-Type": BINARY_CONTENT_TYPE})
+        FORWARD_SECONDS.observe(time.perf_counter() - started_at, mode="http")
+        stage("forward")
+        # Las etapas de model_service se descuentan de "forward", que queda con la red
+        merge_server_timing("forward", "model", response.headers.get("server-timing"))
         if response.status_code == 200:
-            data["prediction"] = response.json().get("prediction")
-            print(f"Predicción recibida: {data['prediction']}")
-        else:
-            data["prediction"] = "Error"
-            print(f"Error en la predicción: {response.status_code}")
-    except requests.exceptions.RequestException as e:
-        data["prediction"] = "Error"
-        print(f"Error en la solicitud: {str(e)}")
+            prediction = response.json().get("prediction")
+            logger.debug("Predicción recibida: %s", prediction)
+            return prediction
+        PREDICTION_ERRORS.inc(**labels, reason=str(response.status_code))
+        logger.warning("Error en la predicción: %s", response.status_code)
+    except httpx.HTTPError as e:
+        FORWARD_SECONDS.observe(time.perf_counter() - started_at, mode="http")
+        PREDICTION_ERRORS.inc(**labels, reason=type(e).__name__)
+        logger.warning("Error en la solicitud: %s", e)
+    return "Error"
 
-    return {"message": "Data received"}
+async def attach_prediction(session, seq, json_data):
+    """Solicita la predicción de una ventana y la guarda en la sesión de su estación.
+
+    Args:
+        session (Session): Sesión del proceso al que pertenece la ventana.
+        seq (int): Número de secuencia de la ventana.
+        json_data (dict): Configuración del modelo y ventana de ángulo y par.
+    """
+    prediction = await request_prediction(json_data, session.estacion)
+    PREDICTIONS.inc(estacion=station_label(session.estacion), model=model_label(json_data), prediction=prediction)
+    if sessions.set_prediction(session, seq, prediction):
+        events.publish("prediccion", session.estacion, {
+            "estacion": session.estacion, "identificador": session.identificador, "prediction": prediction,
+        })
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Devuelve las métricas del proceso en formato de texto de Prometheus.
+
+    En el modo embebido incluye también las métricas de model_service.
+
+    Returns:
+        Response: Histogramas de reenvío y de solicitudes, y contadores de predicciones y errores.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/profiles")
+async def list_profiles():
+    """Lista los perfiles de solicitudes capturados por este servicio.
+
+    En el modo embebido los de model_service están en `/model/profiles`.
+
+    Returns:
+        dict: Configuración del perfilado y resumen de cada perfil, del más reciente al más antiguo.
+    """
+    profiles = await run_in_threadpool(profiling.store.list, "prediction_service")
+    return {
+        "enabled": profiling.PROFILING_ENABLED,
+        "sample_percent": profiling.PROFILE_SAMPLE_PERCENT,
+        "slow_ms": profiling.PROFILE_SLOW_MS,
+        "profiles": profiles,
+    }
+
+@app.get("/profiles/{name}")
+async def download_profile(name: str, format: str = "json"):
+    """Descarga un perfil capturado.
+
+    Args:
+        name (str): Nombre del perfil devuelto por `/profiles`.
+        format (str): "json" para el perfil completo o "folded" para las pilas en
+            formato colapsado (flamegraph.pl, speedscope).
+
+    Returns:
+        FileResponse | PlainTextResponse: Contenido del perfil.
+    """
+    if format == "folded":
+        folded = await run_in_threadpool(profiling.store.folded, name)
+        if folded is not None:
+            return PlainTextResponse(folded)
+    elif format == "json":
+        path = profiling.store.path(name)
+        if path is not None:
+            return FileResponse(path, media_type="application/json", filename=name)
+    else:
+        raise HTTPException(status_code=400, detail="El formato debe ser 'json' o 'folded'.")
+    raise HTTPException(status_code=404, detail=f"No existe el perfil {name}.")
+
+EMPTY_DATA = {"angulo": [], "par": [], "prediction": "", "reset": False, "identificador": "", "fecha": "", "estacion": "", "seq": 0}
 
 @app.get("/get_data")
-async def get_data():
+async def get_data(estacion: Optional[str] = None, since: Optional[int] = None, since_estacion: Optional[str] = None):
     """Devuelve los datos actuales almacenados en el servidor.
 
+    Sin `since` devuelve una instantánea completa del proceso en curso, con el cursor
+    `seq` para las consultas siguientes. Con `since=<seq>` devuelve solo los puntos
+    recibidos después de ese cursor y la predicción actual; si entre tanto comenzó un
+    nuevo proceso, devuelve el proceso completo con `reset=True`.
+
+    Sin `estacion` se usa la estación que recibió datos más recientemente; con
+    `estacion=*` se devuelven las instantáneas de todas las estaciones.
+
+    Cada estación numera sus puntos por separado, así que el cursor solo vale para la
+    estación que lo emitió (el campo `estacion` de la respuesta), que se indica en
+    `since_estacion`. Si la estación consultada es otra, o si se consulta la más
+    reciente sin `since_estacion`, se devuelve el proceso completo con `reset=True`.
+    Si `truncated` es verdadero, se perdieron puntos posteriores al cursor y el
+    cliente debe pedir una instantánea completa.
+
+    Args:
+        estacion (str): Estación a consultar, `*` para todas.
+        since (int): Cursor devuelto por la consulta anterior.
+        since_estacion (str): Estación que emitió el cursor.
+
     Returns:
-        dict: Datos actuales de ángulo, par, predicción, identificador y fecha.
+        dict: Datos de ángulo, par, predicción, identificador, fecha y cursor.
     """
-    global data
-    return data
+    if estacion == "*":
+        return {"sesiones": sessions.all()}
+    if since is not None:
+        result = sessions.changes_since(estacion, since, since_estacion)
+    elif estacion is None:
+        result = sessions.latest()
+    else:
+        result = sessions.get(estacion)
+    if result is None:
+        if estacion is None:
+            return dict(EMPTY_DATA)
+        raise HTTPException(status_code=404, detail=f"No hay datos de la estación {estacion}.")
+    return result
+
+@app.get("/stream")
+async def stream(request: Request, estacion: Optional[str] = None):
+    """Envía en tiempo real las ventanas, predicciones y reinicios de proceso.
+
+    Usa Server-Sent Events con los eventos `reset`, `ventana` y `prediccion`. Si el
+    cliente no consume los eventos a tiempo se le envía `dropped` y se cierra el
+    flujo; el cliente debe reconectarse y pedir una instantánea a `/get_data`.
+
+    Args:
+        request (Request): Solicitud HTTP, usada para detectar desconexiones.
+        estacion (str): Estación de interés; sin valor se envían todas.
+
+    Returns:
+        StreamingResponse: Flujo de eventos en formato text/event-stream.
+    """
+    subscriber = events.subscribe(estacion)
+
+    async def event_stream():
+        try:
+            yield ": conectado\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield message
+                if subscriber.dropped and subscriber.queue.empty():
+                    break
+        finally:
+            events.unsubscribe(subscriber)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.get("/health")
 async def health_check():
@@ -111,6 +535,16 @@ async def health_check():
     return {"status": "ok"}
 
 
-def start_service():
+if EMBEDDED_MODEL:
+    enable_embedded_model()
+
+def start_service(embedded=False):
+    """Inicia el servidor de FastAPI.
+
+    Args:
+        embedded (bool): Si es `True`, calcula las predicciones en este mismo proceso.
+    """
+    if embedded:
+        enable_embedded_model()
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8001)
\ No newline at end of file
@@ -0,0 +1,309 @@
+"""
+Servidor Multiproceso con Precarga
+
+Este módulo ejecuta una aplicación FastAPI en varios procesos que comparten un mismo
+socket. En Linux el proceso principal abre el socket, ejecuta la precarga (por
+ejemplo, los modelos activos) y después crea los workers con `fork`, de modo que
+todos heredan los modelos ya cargados y comparten sus páginas de memoria mientras no
+se modifiquen. Cada worker puede fijarse a un grupo de núcleos.
+
+Cada worker mantiene dos tuberías con el proceso principal. Con `broadcast` un worker
+pide que una función se ejecute en todos los workers (por ejemplo, cargar y fijar un
+modelo nuevo); el proceso principal la reenvía a cada uno, reúne los resultados y los
+devuelve. Un worker que no responde a tiempo se informa como fallido. Las órdenes
+marcadas con `keep` forman el estado vigente (por ejemplo, los modelos fijados) hasta
+que otra orden lo retira con `forget`; solo ese estado se repite en los workers que
+se crean de nuevo para reemplazar a uno que terminó.
+
+En sistemas sin `fork` (Windows) se recurre a los workers de uvicorn, que importan la
+aplicación en cada proceso; los paquetes .bundle, abiertos con mmap, siguen
+compartiendo sus páginas entre procesos. En ese modo no hay `broadcast`.
+
+Imports:
+    - multiprocessing: Librería para crear los procesos worker.
+    - os: Librería para interactuar con el sistema operativo.
+    - signal: Librería para atender las señales de terminación.
+    - socket: Librería para abrir el socket compartido.
+    - threading: Librería para atender las órdenes del proceso principal.
+    - time: Librería para el tiempo máximo de respuesta de los workers.
+    - threadpoolctl: Librería para limitar los hilos de BLAS y OpenMP de cada worker.
+    - uvicorn: Servidor ASGI.
+
+Funciones:
+    - core_groups: Reparte los núcleos disponibles entre los workers.
+    - is_worker: Indica si el proceso es un worker de `serve_prefork`.
+    - broadcast: Ejecuta una función en todos los workers.
+    - serve_prefork: Ejecuta una aplicación en varios procesos con precarga.
+"""
+
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from multiprocessing.connection import wait
+
+import uvicorn
+from threadpoolctl import threadpool_limits
+
+# Conexión de este worker con el proceso principal para pedir un broadcast (None fuera de un worker)
+_parent = None
+_parent_lock = threading.Lock()
+
+
+def core_groups(workers, threads_per_worker):
+    """
+    Reparte los núcleos disponibles entre los workers.
+
+    Args:
+        workers (int): Número de workers.
+        threads_per_worker (int): Núcleos asignados a cada worker.
+
+    Returns:
+        list: Conjunto de núcleos de cada worker, o `None` si el sistema no permite fijarlos.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    cores = sorted(os.sched_getaffinity(0))
+    size = max(1, threads_per_worker)
+    return [{cores[(i * size + j) % len(cores)] for j in range(size)} for i in range(workers)]
+
+
+def is_worker():
+    """
+    Indica si el proceso actual es un worker creado por `serve_prefork` con `fork`.
+
+    Returns:
+        bool: True si el proceso puede usar `broadcast`.
+    """
+    return _parent is not None
+
+
+def broadcast(func, *args, keep=None, forget=None):
+    """
+    Ejecuta una función en todos los workers, incluido el que la pide.
+
+    La función y sus argumentos se envían por pickle, por lo que deben poder
+    serializarse (funciones de nivel de módulo y valores simples).
+
+    Args:
+        func (callable): Función a ejecutar.
+        *args: Argumentos de la función.
+        keep: Clave con la que la orden pasa a formar parte del estado que se repite en
+            los workers nuevos, si se completa en todos; reemplaza a la orden anterior
+            con la misma clave.
+        forget: Clave de una orden del estado que deja de repetirse.
+
+    Returns:
+        list: Resultado de la función en cada worker.
+
+    Raises:
+        RuntimeError: Si el proceso no es un worker de `serve_prefork`.
+        TimeoutError: Si algún worker no respondió a tiempo.
+        Exception: La primera excepción lanzada por la función en algún worker.
+    """
+    if _parent is None:
+        raise RuntimeError("broadcast solo está disponible en los workers de serve_prefork.")
+    with _parent_lock:
+        _parent.send((func, args, keep, forget))
+        replies = _parent.recv()
+    for ok, value in replies:
+        if not ok:
+            raise value
+    return [value for _, value in replies]
+
+
+def _serve_commands(conn):
+    """
+    Ejecuta en el worker las órdenes que reenvía el proceso principal.
+
+    Args:
+        conn (Connection): Tubería de órdenes del worker.
+    """
+    while True:
+        try:
+            command_id, func, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = (command_id, True, func(*args))
+        except Exception as e:
+            reply = (command_id, False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # El resultado o la excepción no se pudieron serializar
+            conn.send((command_id, False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+_command_ids = iter(range(1, 2 ** 63))
+
+
+def _run_everywhere(conns, func, args, timeout):
+    """
+    Reenvía una orden a los workers desde el proceso principal y reúne sus respuestas.
+
+    Los workers que ya terminaron se omiten; el supervisor los reemplaza. Un worker
+    que no responde en `timeout` segundos se informa como fallido, y su respuesta
+    tardía se descarta en la orden siguiente gracias al identificador de cada orden.
+
+    Args:
+        conns (list): Tuberías de órdenes de los workers.
+        func (callable): Función a ejecutar.
+        args (tuple): Argumentos de la función.
+        timeout (float): Segundos máximos de espera de todas las respuestas.
+
+    Returns:
+        list: Pares (éxito, resultado o excepción) de cada worker que respondió o expiró.
+    """
+    command_id = next(_command_ids)
+    sent = []
+    for conn in conns:
+        try:
+            conn.send((command_id, func, args))
+            sent.append(conn)
+        except OSError:
+            continue
+    deadline = time.monotonic() + timeout
+    replies = []
+    for conn in sent:
+        try:
+            while True:
+                if not conn.poll(max(0.0, deadline - time.monotonic())):
+                    replies.append((False, TimeoutError(f"Un worker no respondió en {timeout:g} s.")))
+                    break
+                reply_id, ok, value = conn.recv()
+                if reply_id == command_id:
+                    replies.append((ok, value))
+                    break
+        except (EOFError, OSError):
+            continue
+    return replies
+
+
+def _run_worker(app, sock, cores, threads, log_level, commands, requests):
+    """
+    Ejecuta uvicorn dentro de un worker sobre el socket heredado.
+
+    Los hilos de BLAS y OpenMP se limitan aquí con threadpoolctl: el worker hereda las
+    librerías ya inicializadas por el proceso principal, así que variables como
+    OMP_NUM_THREADS ya no tienen efecto.
+
+    Args:
+        app: Aplicación ASGI.
+        sock (socket.socket): Socket compartido ya en escucha.
+        cores (set): Núcleos a los que se fija el worker, o `None`.
+        threads (int): Hilos de BLAS y OpenMP del worker.
+        log_level (str): Nivel de log de uvicorn.
+        commands (Connection): Tubería por la que el proceso principal envía órdenes.
+        requests (Connection): Tubería por la que el worker pide un broadcast.
+    """
+    global _parent
+    _parent = requests
+    threading.Thread(target=_serve_commands, args=(commands,), daemon=True).start()
+    if cores:
+        os.sched_setaffinity(0, cores)
+    threadpool_limits(limits=max(1, threads))
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def serve_prefork(app, host="0.0.0.0", port=8000, workers=2, threads_per_worker=1,
+                  preload=None, pin_cores=True, import_string=None, log_level="info", broadcast_timeout=50.0):
+    """
+    Ejecuta una aplicación en varios procesos con precarga.
+
+    El proceso principal supervisa a los workers: si uno termina inesperadamente se
+    crea otro en su lugar, y al recibir SIGINT o SIGTERM los detiene a todos. También
+    atiende las solicitudes de `broadcast` de los workers.
+
+    Args:
+        app: Aplicación ASGI.
+        host (str): Dirección de escucha.
+        port (int): Puerto de escucha.
+        workers (int): Número de procesos worker.
+        threads_per_worker (int): Núcleos por worker (para fijarlos y limitar hilos).
+        preload (callable): Función que se ejecuta una vez antes de crear los workers.
+        pin_cores (bool): Si cada worker se fija a su grupo de núcleos.
+        import_string (str): Ruta "modulo:app" para los workers de uvicorn cuando no hay `fork`.
+        log_level (str): Nivel de log de uvicorn.
+        broadcast_timeout (float): Segundos máximos de espera de los workers en un `broadcast`.
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        # Sin fork cada worker es un intérprete nuevo que importa la aplicación por su
+        # cuenta, así que las variables de entorno sí limitan sus hilos
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(var, str(max(1, threads_per_worker)))
+        uvicorn.run(import_string, host=host, port=port, workers=workers, log_level=log_level)
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    if preload is not None:
+        preload()
+
+    groups = core_groups(workers, threads_per_worker) if pin_cores else None
+    context = multiprocessing.get_context("fork")
+
+    # Estado vigente (órdenes con `keep` no retiradas), para repetirlo en los workers que se reemplazan
+    state = {}
+
+    def spawn(index, replay=()):
+        cores = groups[index] if groups else None
+        commands, worker_commands = context.Pipe()
+        requests, worker_requests = context.Pipe()
+        process = context.Process(target=_run_worker, daemon=True,
+                                  args=(app, sock, cores, threads_per_worker, log_level,
+                                        worker_commands, worker_requests))
+        process.start()
+        # Sin estas copias, la muerte del worker se detecta como EOF en las tuberías
+        worker_commands.close()
+        worker_requests.close()
+        for func, args in replay:
+            _run_everywhere([commands], func, args, broadcast_timeout)
+        return process, commands, requests
+
+    processes, commands, requests = map(list, zip(*(spawn(i) for i in range(workers))))
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        while not stopping:
+            for conn in wait(requests, timeout=0.5):
+                try:
+                    func, args, keep, forget = conn.recv()
+                except (EOFError, OSError):
+                    continue
+                replies = _run_everywhere(commands, func, args, broadcast_timeout)
+                if forget is not None:
+                    state.pop(forget, None)
+                if keep is not None and all(ok for ok, _ in replies):
+                    state.pop(keep, None)
+                    state[keep] = (func, args)
+                try:
+                    conn.send(replies)
+                except OSError:
+                    continue
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    print(f"Worker {process.pid} terminó con código {process.exitcode}; se reinicia.")
+                    commands[i].close()
+                    requests[i].close()
+                    processes[i], commands[i], requests[i] = spawn(i, list(state.values()))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=10)
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        sock.close()
@@ -0,0 +1,383 @@
+"""
+Perfilado por Muestreo de las Solicitudes
+
+Este módulo captura perfiles de las solicitudes lentas o de una fracción aleatoria de
+ellas, para ver en qué se fue el tiempo (carga del modelo, validación del JSON,
+escalado o el propio ensamble) cuando la latencia se dispara en la línea.
+
+El perfilado es por muestreo de pilas: mientras hay solicitudes perfiladas en curso,
+un hilo toma la pila de todos los hilos del proceso cada `PROFILE_INTERVAL_MS`
+milisegundos. Se usa en lugar de cProfile porque los endpoints síncronos de
+model_service se ejecutan en hilos del pool, que cProfile no ve desde el middleware,
+y porque su costo no depende de cuántas funciones se llamen. Las solicitudes
+concurrentes comparten las muestras; el perfil indica cuántas había.
+
+Cada perfil se guarda como JSON con los metadatos de la solicitud, las pilas en
+formato "colapsado" (compatible con flamegraph.pl y speedscope) y las funciones con
+más muestras. El directorio se rota conservando los `PROFILE_MAX_FILES` más recientes.
+
+Variables de entorno:
+    - PROFILE_SAMPLE_PERCENT: Porcentaje de solicitudes perfiladas al azar (0 desactiva).
+    - PROFILE_SLOW_MS: Guarda el perfil de toda solicitud que supere esta latencia
+      (0 desactiva). Implica muestrear todas las solicitudes de las rutas indicadas:
+      mientras haya alguna en curso el hilo de muestreo toma el GIL y recorre las
+      pilas de todos los hilos (`sys._current_frames()`) en cada intervalo.
+    - PROFILE_INTERVAL_MS: Intervalo entre muestras en milisegundos. Por defecto 5,
+      o 20 si solo está activo PROFILE_SLOW_MS, para que el muestreo permanente de la
+      línea no le quite a cada solicitud el GIL cada 5 ms; una solicitud de 100 ms
+      sigue dejando unas 5 muestras.
+    - PROFILE_DIR: Directorio donde se guardan los perfiles.
+    - PROFILE_MAX_FILES: Número máximo de perfiles conservados.
+
+Imports:
+    - asyncio: Librería para guardar los perfiles sin bloquear el bucle de eventos.
+    - collections: Contadores de pilas.
+    - datetime: Librería para la fecha de los perfiles.
+    - json: Librería para guardar los perfiles.
+    - os: Librería para interactuar con el sistema operativo.
+    - random: Librería para elegir las solicitudes perfiladas.
+    - re: Librería para validar los nombres de los perfiles.
+    - sys: Librería para leer las pilas de los hilos.
+    - threading: Librería para manejar hilos.
+    - time: Librería para manejo de tiempo.
+    - metrics: Ruta de la solicitud relativa a la aplicación montada.
+
+Clases:
+    - StackSampler: Hilo que reparte muestras de pilas entre los perfiles en curso.
+    - ProfileStore: Directorio rotativo de perfiles.
+    - ProfilingMiddleware: Middleware ASGI que perfila las solicitudes.
+
+Funciones:
+    - frame_stack: Convierte la pila de un hilo en una línea colapsada.
+"""
+
+import asyncio
+import collections
+import datetime
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from metrics import route_path
+
+PROFILE_SAMPLE_PERCENT = float(os.environ.get("PROFILE_SAMPLE_PERCENT", "0"))
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS",
+                                            "20" if PROFILE_SAMPLE_PERCENT <= 0 and PROFILE_SLOW_MS > 0 else "5"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "50"))
+PROFILING_ENABLED = PROFILE_SAMPLE_PERCENT > 0 or PROFILE_SLOW_MS > 0
+
+# Funciones en las que un hilo está esperando trabajo; sus muestras no aportan nada
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("handlers.py", "dequeue"),
+}
+PROFILE_NAME = re.compile(r"^[\w.-]+\.json$")
+TOP_FUNCTIONS = 20
+
+
+def frame_stack(frame, thread_name):
+    """
+    Convierte la pila de un hilo en una línea colapsada.
+
+    Args:
+        frame (frame): Marco más interno del hilo.
+        thread_name (str): Nombre del hilo, usado como raíz de la pila.
+
+    Returns:
+        str | None: Funciones de la raíz a la hoja separadas por `;`, o None si el hilo
+        está esperando trabajo.
+    """
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+        return None
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(f"thread:{thread_name}")
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    Hilo que reparte muestras de pilas entre los perfiles en curso.
+
+    El hilo solo toma muestras mientras hay al menos un perfil activo, así que con el
+    perfilado configurado pero sin solicitudes no consume CPU.
+
+    Args:
+        interval (float): Segundos entre muestras.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        """
+        Abre un perfil nuevo que recibe las muestras hasta llamar a `stop`.
+
+        Returns:
+            collections.Counter: Muestras de cada pila colapsada.
+        """
+        stacks = collections.Counter()
+        with self._lock:
+            # Un worker creado con fork no hereda el hilo de muestreo
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+            self._profiles[id(stacks)] = stacks
+        self._wakeup.set()
+        return stacks
+
+    def stop(self, stacks):
+        """
+        Cierra un perfil.
+
+        Args:
+            stacks (collections.Counter): Perfil devuelto por `start`.
+
+        Returns:
+            int: Perfiles que seguían abiertos, incluido este; indica cuántas
+            solicitudes compartieron muestras.
+        """
+        with self._lock:
+            concurrent = len(self._profiles)
+            self._profiles.pop(id(stacks), None)
+        return concurrent
+
+    def _run(self):
+        """
+        Bucle del hilo: espera a que haya perfiles y toma una muestra por intervalo.
+        """
+        own_ident = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._profiles
+                if idle:
+                    self._wakeup.clear()
+            if idle:
+                self._wakeup.wait()
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sample = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = frame_stack(frame, names.get(ident, ident))
+                if stack is not None:
+                    sample.append(stack)
+            with self._lock:
+                for stacks in self._profiles.values():
+                    stacks.update(sample)
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """
+    Directorio rotativo de perfiles.
+
+    Args:
+        directory (str): Directorio de los perfiles; se crea al guardar el primero.
+        max_files (int): Perfiles conservados; al superarlo se borran los más antiguos.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, service, metadata, stacks):
+        """
+        Guarda un perfil y rota el directorio.
+
+        Args:
+            service (str): Servicio que atendió la solicitud.
+            metadata (dict): Datos de la solicitud (ruta, estado, duración, motivo...).
+            stacks (collections.Counter): Muestras de cada pila colapsada.
+
+        Returns:
+            str: Nombre del archivo guardado.
+        """
+        self_counts = collections.Counter()
+        total_counts = collections.Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                self_counts[frames[-1]] += count
+            for name in set(frames):
+                total_counts[name] += count
+        stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        name = f"{service}-{stamp}-{os.getpid()}.json"
+        profile = {
+            **metadata,
+            "service": service,
+            "pid": os.getpid(),
+            "samples": sum(stacks.values()),
+            "self": self_counts.most_common(TOP_FUNCTIONS),
+            "inclusive": total_counts.most_common(TOP_FUNCTIONS),
+            "stacks": dict(stacks),
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8") as file:
+                json.dump(profile, file, ensure_ascii=False)
+            self._rotate()
+        return name
+
+    def _rotate(self):
+        """
+        Borra los perfiles más antiguos por encima de `max_files`.
+        """
+        names = sorted(self._names(), key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+        for name in names[:max(len(names) - self.max_files, 0)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _names(self):
+        """
+        Devuelve los nombres de los perfiles del directorio.
+
+        Returns:
+            list: Nombres de archivo válidos.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return [name for name in os.listdir(self.directory) if PROFILE_NAME.match(name)]
+
+    def list(self, service=None):
+        """
+        Devuelve el resumen de los perfiles guardados, del más reciente al más antiguo.
+
+        Args:
+            service (str): Si se indica, solo los perfiles de ese servicio.
+
+        Returns:
+            list: Nombre, servicio, ruta, estado, duración, motivo y fecha de cada perfil.
+        """
+        summaries = []
+        for name in self._names():
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as file:
+                    profile = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if service is not None and profile.get("service") != service:
+                continue
+            summaries.append({"name": name, **{key: profile.get(key) for key in (
+                "service", "method", "path", "status", "duration_ms", "reason", "started_at", "samples")}})
+        return sorted(summaries, key=lambda summary: summary["started_at"] or "", reverse=True)
+
+    def path(self, name):
+        """
+        Devuelve la ruta de un perfil guardado.
+
+        Args:
+            name (str): Nombre del perfil.
+
+        Returns:
+            str | None: Ruta del archivo, o None si el nombre no es válido o no existe.
+        """
+        if not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def folded(self, name):
+        """
+        Devuelve las pilas de un perfil en formato colapsado.
+
+        Args:
+            name (str): Nombre del perfil.
+
+        Returns:
+            str | None: Una línea "pila muestras" por pila, o None si no existe.
+        """
+        path = self.path(name)
+        if path is None:
+            return None
+        with open(path, encoding="utf-8") as file:
+            stacks = json.load(file).get("stacks", {})
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+
+
+sampler = StackSampler()
+store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila las solicitudes.
+
+    Una solicitud se perfila si sale elegida al azar (`sample_percent`) o, con
+    `slow_ms` activado, se perfilan todas y solo se guardan las que superan el umbral.
+    El perfil se guarda fuera del bucle de eventos después de enviar la respuesta.
+
+    Args:
+        app: Aplicación ASGI.
+        service (str): Nombre del servicio.
+        paths (tuple): Rutas a perfilar.
+        sample_percent (float): Porcentaje de solicitudes perfiladas al azar.
+        slow_ms (float): Umbral de latencia en milisegundos; 0 lo desactiva.
+    """
+
+    def __init__(self, app, service, paths, sample_percent=PROFILE_SAMPLE_PERCENT, slow_ms=PROFILE_SLOW_MS):
+        self.app = app
+        self.service = service
+        self.paths = set(paths)
+        self.sample_percent = sample_percent
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or route_path(scope) not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        sampled = random.random() * 100 < self.sample_percent
+        if not sampled and self.slow_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started_at = datetime.datetime.now().isoformat(timespec="milliseconds")
+        start = time.perf_counter()
+        stacks = sampler.start()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            concurrent = sampler.stop(stacks)
+            duration_ms = (time.perf_counter() - start) * 1000
+            slow = self.slow_ms > 0 and duration_ms >= self.slow_ms
+            if sampled or slow:
+                metadata = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status["code"],
+                    "duration_ms": round(duration_ms, 3),
+                    "reason": "slow" if slow else "sample",
+                    "started_at": started_at,
+                    "interval_ms": sampler.interval * 1000,
+                    "concurrent": concurrent,
+                }
+                await asyncio.get_running_loop().run_in_executor(None, store.save, self.service, metadata, stacks)
@@ -0,0 +1,233 @@
+"""
+Motor de Reproducción y Generación de Carga
+
+Este módulo reproduce las ventanas de un archivo de atornillados contra el servicio
+de datos con un ritmo controlado y mide la latencia de cada envío. Sirve tanto para
+reproducir la cadencia real de la línea como para estresar los servicios antes de
+añadir estaciones.
+
+Modos de ritmo:
+    - max: envía lo más rápido posible.
+    - fijo: envía a una tasa constante de ventanas por segundo (entre todos los carriles).
+    - real: respeta la separación entre atornillados según la columna fecha, acelerada
+      por un factor de velocidad; las ventanas de un mismo atornillado se envían seguidas.
+
+Con concurrencia mayor que 1, los atornillados se reparten entre varios carriles, cada
+uno con su propia sesión HTTP persistente y su propia estación (`<estacion>-<carril>`),
+de modo que el orden de las ventanas y el reinicio de cada proceso se conservan.
+
+Imports:
+    - threading: Librería para manejar hilos.
+    - time: Librería para manejo de tiempo.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - pandas: Librería para interpretar las fechas.
+    - requests: Librería para realizar solicitudes HTTP.
+    - payload: Formato en que se envían las ventanas.
+
+Clases:
+    - ReplayStats: Latencias, errores y retrasos de una reproducción.
+
+Funciones:
+    - build_schedule: Calcula el instante de envío de cada ventana.
+    - run_replay: Reproduce las ventanas contra el servicio de datos.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+from payload import encode_request
+
+PACING_MODES = ("max", "fijo", "real")
+
+
+class ReplayStats:
+    """
+    Latencias, errores y retrasos de una reproducción.
+
+    Atributos:
+        latencies (list): Latencia de cada envío correcto, en segundos.
+        lags (list): Retraso de cada envío respecto a su instante programado, en segundos.
+        errors (int): Número de envíos fallidos.
+        status_codes (dict): Número de respuestas por código HTTP.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.lags = []
+        self.errors = 0
+        self.status_codes = {}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record(self, latency, lag, status_code=None):
+        """
+        Registra el resultado de un envío.
+
+        Args:
+            latency (float): Latencia del envío en segundos, o `None` si falló.
+            lag (float): Retraso respecto al instante programado en segundos.
+            status_code (int): Código HTTP de la respuesta, o `None` si no hubo respuesta.
+        """
+        with self._lock:
+            self.lags.append(lag)
+            key = str(status_code) if status_code is not None else "sin respuesta"
+            self.status_codes[key] = self.status_codes.get(key, 0) + 1
+            if latency is None:
+                self.errors += 1
+            else:
+                self.latencies.append(latency)
+
+    def summary(self):
+        """
+        Resume la reproducción.
+
+        Returns:
+            dict: Envíos, errores, duración, rendimiento y percentiles de latencia y retraso en ms.
+        """
+        duration = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        sent = len(self.latencies) + self.errors
+        latencies = np.asarray(self.latencies) * 1000
+        lags = np.asarray(self.lags) * 1000
+        result = {
+            "enviadas": sent,
+            "errores": self.errors,
+            "codigos": dict(self.status_codes),
+            "duracion_s": round(duration, 3),
+            "ventanas_por_s": round(sent / duration, 2) if duration > 0 else 0.0,
+        }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            result.update(latencia_p50_ms=round(p50, 2), latencia_p95_ms=round(p95, 2),
+                          latencia_p99_ms=round(p99, 2), latencia_max_ms=round(latencies.max(), 2))
+        if len(lags):
+            result.update(retraso_p99_ms=round(float(np.percentile(lags, 99)), 2))
+        return result
+
+
+def build_schedule(procesos, fechas=None, mode="fijo", rate=1.0, speed=1.0):
+    """
+    Calcula el instante de envío de cada ventana, relativo al inicio de la reproducción.
+
+    Args:
+        procesos (np.ndarray): Índice del proceso de cada ventana.
+        fechas (list): Fecha de cada proceso (solo para el modo real).
+        mode (str): Modo de ritmo (max, fijo o real).
+        rate (float): Ventanas por segundo en el modo fijo.
+        speed (float): Factor de aceleración del modo real (2 = el doble de rápido).
+
+    Returns:
+        np.ndarray: Segundos desde el inicio en que debe enviarse cada ventana.
+
+    Raises:
+        ValueError: Si el modo o sus parámetros no son válidos.
+    """
+    n_windows = len(procesos)
+    if mode == "max":
+        return np.zeros(n_windows)
+    if mode == "fijo":
+        if rate <= 0:
+            raise ValueError("La tasa del modo fijo debe ser positiva.")
+        return np.arange(n_windows) / rate
+    if mode == "real":
+        if speed <= 0:
+            raise ValueError("La velocidad del modo real debe ser positiva.")
+        times = pd.to_datetime(pd.Series(fechas), errors='coerce')
+        # Las fechas ilegibles heredan la del atornillado anterior
+        seconds = (times - times.dropna().min()).dt.total_seconds().ffill().fillna(0).to_numpy()
+        return np.maximum.accumulate(seconds[procesos]) / speed
+    raise ValueError(f"Modo de ritmo desconocido: {mode}. Use uno de {', '.join(PACING_MODES)}.")
+
+
+def _lane_processes(procesos, concurrency):
+    """
+    Reparte los atornillados entre los carriles, por turnos.
+
+    Args:
+        procesos (np.ndarray): Índice del proceso de cada ventana.
+        concurrency (int): Número de carriles.
+
+    Returns:
+        list: Índices de las ventanas de cada carril, en orden.
+    """
+    _, order = np.unique(procesos, return_inverse=True)
+    return [np.flatnonzero(order % concurrency == lane) for lane in range(concurrency)]
+
+
+def run_replay(X, procesos, identificadores, fechas, window_size, base_url="http://localhost:8001",
+               mode="fijo", rate=1.0, speed=1.0, concurrency=1, estacion="", timeout=60, payload_format="json",
+               verbose=False):
+    """
+    Reproduce las ventanas contra el servicio de datos.
+
+    Args:
+        X (np.ndarray): Matriz de ventanas [ángulo..., par...].
+        procesos (np.ndarray): Índice del proceso de cada ventana.
+        identificadores (list): Identificador de cada proceso.
+        fechas (list): Fecha de cada proceso.
+        window_size (int): Tamaño de la ventana de datos.
+        base_url (str): URL del servicio de datos.
+        mode (str): Modo de ritmo (max, fijo o real).
+        rate (float): Ventanas por segundo en el modo fijo.
+        speed (float): Factor de aceleración del modo real.
+        concurrency (int): Número de carriles concurrentes.
+        estacion (str): Estación con la que se envían los datos.
+        timeout (float): Tiempo máximo de cada envío en segundos.
+        payload_format (str): Formato de las ventanas (json, base64 o binario).
+        verbose (bool): Si se imprime cada envío.
+
+    Returns:
+        ReplayStats: Resultados de la reproducción.
+    """
+    schedule = build_schedule(procesos, fechas, mode, rate, speed)
+    concurrency = max(1, int(concurrency))
+    lanes = _lane_processes(procesos, concurrency)
+    stats = ReplayStats()
+
+    def run_lane(lane, indices):
+        lane_estacion = f"{estacion or 'replay'}-{lane}" if concurrency > 1 else estacion
+        current_process = -1
+        with requests.Session() as session:
+            for i in indices:
+                process_index = int(procesos[i])
+                reset = process_index != current_process
+                current_process = process_index
+
+                delay = stats.started_at + schedule[i] - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                fields = {
+                    "reset": reset,
+                    "identificador": identificadores[process_index] if process_index < len(identificadores) else "",
+                    "fecha": fechas[process_index] if process_index < len(fechas) else "",
+                    "estacion": lane_estacion,
+                }
+                params, headers, body = encode_request(X[i, :window_size], X[i, window_size:], fields, payload_format)
+                sent_at = time.perf_counter()
+                lag = sent_at - (stats.started_at + schedule[i])
+                try:
+                    response = session.post(f"{base_url}/data", params=params, data=body, headers=headers,
+                                            timeout=timeout)
+                    latency = time.perf_counter() - sent_at
+                    stats.record(latency if response.ok else None, lag, response.status_code)
+                    if verbose:
+                        print(f"[{lane_estacion}] proceso {process_index + 1} reset={reset} "
+                              f"{response.status_code} en {latency * 1000:.1f} ms")
+                except requests.exceptions.RequestException as e:
+                    stats.record(None, lag)
+                    if verbose:
+                        print(f"[{lane_estacion}] Error al enviar datos: {e}")
+
+    threads = [threading.Thread(target=run_lane, args=(lane, indices), daemon=True)
+               for lane, indices in enumerate(lanes) if len(indices)]
+    # El calendario es global: en el modo fijo la tasa total se reparte entre los carriles
+    stats.started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.finished_at = time.perf_counter()
+    return stats
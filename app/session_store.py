@@ -0,0 +1,273 @@
+"""
+Almacén de Sesiones por Estación
+
+Este módulo guarda los datos del proceso de atornillado en curso de cada estación,
+de modo que varias estaciones puedan enviar ventanas intercaladas al mismo servicio
+sin mezclar sus curvas ni sus predicciones.
+
+Imports:
+    - threading: Librería para sincronizar el acceso concurrente.
+    - time: Librería para manejo de tiempo.
+    - collections.OrderedDict: Diccionario ordenado usado para desalojar sesiones.
+    - curve_buffer: Búfer circular float32 de las curvas de ángulo y par.
+
+Clases:
+    - Session: Datos del proceso en curso de una estación.
+    - SessionStore: Colección de sesiones con desalojo por inactividad y límite de memoria.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from curve_buffer import CurveBuffer, validate_window
+
+DEFAULT_STATION = "default"
+
+
+class Session:
+    """
+    Datos del proceso en curso de una estación.
+
+    Atributos:
+        estacion (str): Estación a la que pertenece la sesión.
+        buffer (CurveBuffer): Curvas de ángulo y par acumuladas del proceso.
+        prediction (str): Última predicción recibida.
+        reset (bool): Indicador de reinicio de la última ventana.
+        identificador (str): Identificador del proceso.
+        fecha (str): Fecha asociada al proceso.
+        applied_seq (int): Secuencia de la ventana cuya predicción se guardó por última vez.
+        start_seq (int): Secuencia del primer punto del proceso.
+        updated_at (float): Último momento en que la sesión recibió datos.
+    """
+
+    def __init__(self, estacion, buffer):
+        self.estacion = estacion
+        self.buffer = buffer
+        self.prediction = ""
+        self.reset = False
+        self.identificador = ""
+        self.fecha = ""
+        self.applied_seq = 0
+        self.start_seq = buffer.total
+        self.updated_at = time.monotonic()
+
+    def to_dict(self):
+        """
+        Devuelve una copia de los datos de la sesión.
+
+        Returns:
+            dict: Datos de ángulo, par, predicción, identificador, fecha y estación.
+        """
+        angulo, par = self.buffer.arrays()
+        return {
+            "angulo": angulo.tolist(),
+            "par": par.tolist(),
+            "prediction": self.prediction,
+            "reset": self.reset,
+            "identificador": self.identificador,
+            "fecha": self.fecha,
+            "estacion": self.estacion,
+            "seq": self.buffer.total,
+        }
+
+    def changes_since(self, since, force_reset=False):
+        """
+        Devuelve solo los puntos posteriores a un cursor.
+
+        Si el proceso comenzó en el cursor o después, se devuelve el proceso completo
+        con `reset=True` para que el cliente reemplace su copia en lugar de extenderla.
+        Un cursor igual a `start_seq` es el final del proceso anterior: un cliente del
+        proceso actual siempre tiene un cursor mayor, porque cada ventana agrega puntos.
+
+        Args:
+            since (int): Cursor devuelto por la consulta anterior.
+            force_reset (bool): Devuelve el proceso completo aunque el cursor sea válido,
+                por ejemplo si el cursor pertenece a otra estación.
+
+        Returns:
+            dict: Puntos nuevos, predicción actual y nuevo cursor en `seq`.
+        """
+        reset = force_reset or since <= self.start_seq or since > self.buffer.total
+        angulo, par, truncated = self.buffer.since(self.start_seq if reset else since)
+        return {
+            "angulo": angulo.tolist(),
+            "par": par.tolist(),
+            "prediction": self.prediction,
+            "reset": reset,
+            "truncated": truncated,
+            "identificador": self.identificador,
+            "fecha": self.fecha,
+            "estacion": self.estacion,
+            "seq": self.buffer.total,
+        }
+
+
+class SessionStore:
+    """
+    Colección de sesiones indexadas por estación.
+
+    Las actualizaciones están protegidas por un candado, las sesiones sin datos durante
+    `idle_timeout` segundos se eliminan y cada sesión guarda sus curvas en un búfer
+    circular de `max_points` puntos que se reutiliza entre procesos de la estación.
+
+    Args:
+        max_sessions (int): Número máximo de sesiones simultáneas.
+        idle_timeout (float): Segundos de inactividad tras los cuales se elimina una sesión.
+        max_points (int): Número máximo de puntos por curva y sesión.
+        overflow (str): Política de desbordamiento del búfer (overwrite, drop o error).
+    """
+
+    def __init__(self, max_sessions=64, idle_timeout=3600.0, max_points=20000, overflow="overwrite"):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_points = max_points
+        self.overflow = overflow
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        # Máximo cursor emitido; las estaciones nuevas empiezan después para no reutilizarlo
+        self._max_seq = 0
+
+    def append(self, estacion, angulo, par, reset, identificador, fecha):
+        """
+        Agrega una ventana a la sesión de una estación.
+
+        Args:
+            estacion (str): Estación que envía la ventana.
+            angulo (list): Valores de ángulo de la ventana.
+            par (list): Valores de par de la ventana.
+            reset (bool): Si la ventana inicia un nuevo proceso.
+            identificador (str): Identificador del proceso.
+            fecha (str): Fecha asociada al proceso.
+
+        Returns:
+            Session: Sesión que recibió la ventana.
+
+        Raises:
+            OverflowError: Si la política es `error` y la curva supera la capacidad del búfer.
+        """
+        estacion = estacion or DEFAULT_STATION
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+            session = self._sessions.get(estacion)
+            # Validar antes de crear o vaciar la sesión: una ventana rechazada no borra la curva en curso
+            free = self.max_points if session is None or reset else self.max_points - len(session.buffer)
+            angulo, par = validate_window(angulo, par, free, self.overflow)
+            if session is None:
+                session = Session(estacion, CurveBuffer(self.max_points, self.overflow, start_seq=self._max_seq))
+                self._sessions[estacion] = session
+            elif reset:
+                # Una sesión nueva descarta las predicciones pendientes del proceso anterior
+                session = Session(estacion, session.buffer.clear())
+                self._sessions[estacion] = session
+            self._sessions.move_to_end(estacion)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+            session.buffer.append(angulo, par)
+            self._max_seq = max(self._max_seq, session.buffer.total)
+            session.reset = reset
+            session.identificador = identificador
+            session.fecha = fecha
+            session.updated_at = now
+            return session
+
+    def set_prediction(self, session, seq, prediction):
+        """
+        Guarda la predicción de una ventana si es la más reciente de la sesión.
+
+        Las respuestas que llegan fuera de orden no sobrescriben una predicción más nueva.
+
+        Args:
+            session (Session): Sesión a la que pertenece la ventana.
+            seq (int): Número de secuencia de la ventana.
+            prediction (str): Predicción recibida.
+
+        Returns:
+            bool: `True` si la predicción se guardó.
+        """
+        with self._lock:
+            if seq > session.applied_seq:
+                session.applied_seq = seq
+                session.prediction = prediction
+                return True
+            return False
+
+    def get(self, estacion):
+        """
+        Devuelve los datos de una estación.
+
+        Args:
+            estacion (str): Estación a consultar.
+
+        Returns:
+            dict: Datos de la sesión o `None` si no existe.
+        """
+        with self._lock:
+            session = self._sessions.get(estacion or DEFAULT_STATION)
+            return session.to_dict() if session is not None else None
+
+    def latest(self):
+        """
+        Devuelve los datos de la estación que recibió datos más recientemente.
+
+        Returns:
+            dict: Datos de la sesión o `None` si no hay sesiones.
+        """
+        with self._lock:
+            if not self._sessions:
+                return None
+            return next(reversed(self._sessions.values())).to_dict()
+
+    def changes_since(self, estacion, since, since_estacion=None):
+        """
+        Devuelve los cambios de una estación posteriores a un cursor.
+
+        Los cursores de estaciones distintas se solapan, así que un cursor solo se
+        aplica a la estación que lo emitió. Si pertenece a otra estación, o si se
+        consulta la más reciente sin indicar de cuál es el cursor, se devuelve el
+        proceso completo con `reset=True`.
+
+        Args:
+            estacion (str): Estación a consultar, o `None` para la más reciente.
+            since (int): Cursor devuelto por la consulta anterior.
+            since_estacion (str): Estación que emitió el cursor; por defecto `estacion`.
+
+        Returns:
+            dict: Puntos nuevos y nuevo cursor, o `None` si la estación no existe.
+        """
+        with self._lock:
+            if estacion is None:
+                session = next(reversed(self._sessions.values()), None)
+            else:
+                session = self._sessions.get(estacion or DEFAULT_STATION)
+            if session is None:
+                return None
+            if since_estacion is None:
+                foreign = estacion is None
+            else:
+                foreign = (since_estacion or DEFAULT_STATION) != session.estacion
+            return session.changes_since(since, force_reset=foreign)
+
+    def all(self):
+        """
+        Devuelve los datos de todas las estaciones.
+
+        Returns:
+            dict: Datos de cada sesión indexados por estación.
+        """
+        with self._lock:
+            return {estacion: session.to_dict() for estacion, session in self._sessions.items()}
+
+    def _evict_idle(self, now):
+        """
+        Elimina las sesiones inactivas. Debe llamarse con el candado adquirido.
+
+        Args:
+            now (float): Momento actual.
+        """
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.updated_at < self.idle_timeout:
+                break
+            self._sessions.popitem(last=False)
@@ -0,0 +1,190 @@
+"""
+Cliente del Canal de Streaming
+
+Este módulo consume en segundo plano el flujo `/stream` del servicio de datos y
+acumula los cambios para que la aplicación de visualización los lea sin consultar
+periódicamente el servicio.
+
+Imports:
+    - json: Librería para interpretar los eventos.
+    - threading: Librería para manejar hilos.
+    - time: Librería para manejo de tiempo.
+    - requests: Librería para realizar solicitudes HTTP.
+
+Clases:
+    - StreamConsumer: Hilo que mantiene la conexión al flujo y acumula los cambios.
+"""
+
+import json
+import threading
+import time
+
+import requests
+
+
+class StreamConsumer:
+    """
+    Hilo que mantiene la conexión al flujo de eventos y acumula los cambios.
+
+    `drain` devuelve los cambios con la misma forma que `/get_data?since=...`, por lo
+    que la aplicación puede procesarlos igual que una consulta incremental. Al
+    conectarse (o reconectarse tras una desconexión) se pide una instantánea completa
+    y se entrega con `reset=True` y `resync=True`.
+
+    El consumidor sigue una sola estación, para no mezclar las curvas de varias: la
+    indicada o, sin ella, la que recibió datos más recientemente al conectarse. El
+    flujo se abre antes de pedir la instantánea para no perder eventos, y se descartan
+    los eventos que la instantánea ya incluye según su número de secuencia.
+
+    Args:
+        base_url (str): URL del servicio de datos.
+        estacion (str): Estación de interés, o `None` para seguir la más reciente.
+        reconnect_delay (float): Segundos de espera antes de reconectarse.
+    """
+
+    def __init__(self, base_url="http://localhost:8001", estacion=None, reconnect_delay=1.0):
+        self.base_url = base_url
+        self.estacion = estacion
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self.following = None
+        self._covered_seq = 0
+        self._lock = threading.Lock()
+        self._pending = self._empty()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """
+        Inicia el hilo de consumo.
+
+        Returns:
+            StreamConsumer: El mismo consumidor.
+        """
+        self._thread.start()
+        return self
+
+    def drain(self):
+        """
+        Devuelve y reinicia los cambios acumulados desde la última llamada.
+
+        Returns:
+            dict: Puntos nuevos, predicción actual, identificador, fecha e indicador de reinicio.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = self._empty(pending)
+            return pending
+
+    @staticmethod
+    def _empty(previous=None):
+        """
+        Crea un registro de cambios vacío que conserva la predicción y el proceso actuales.
+
+        Args:
+            previous (dict): Registro anterior.
+
+        Returns:
+            dict: Registro de cambios vacío.
+        """
+        previous = previous or {}
+        return {
+            "angulo": [], "par": [], "reset": False, "resync": False,
+            "prediction": previous.get("prediction", ""),
+            "identificador": previous.get("identificador", ""),
+            "fecha": previous.get("fecha", ""),
+        }
+
+    def _run(self):
+        """
+        Mantiene la conexión al flujo, reconectándose cuando se pierde.
+        """
+        while True:
+            try:
+                estacion = self.estacion or self._latest_station()
+                # Sin estaciones con datos todavía no hay nada que seguir
+                if estacion:
+                    with requests.get(f"{self.base_url}/stream", params={"estacion": estacion}, stream=True,
+                                      timeout=(5, 60)) as response:
+                        response.raise_for_status()
+                        self._resync(estacion)
+                        self.connected = True
+                        self._consume(response)
+            except requests.RequestException:
+                pass
+            self.connected = False
+            time.sleep(self.reconnect_delay)
+
+    def _latest_station(self):
+        """
+        Devuelve la estación que recibió datos más recientemente.
+
+        Returns:
+            str: Nombre de la estación, o cadena vacía si todavía no hay datos.
+        """
+        response = requests.get(f"{self.base_url}/get_data", timeout=5)
+        response.raise_for_status()
+        return response.json().get("estacion", "")
+
+    def _resync(self, estacion):
+        """
+        Reemplaza los cambios acumulados por una instantánea completa del proceso.
+
+        Args:
+            estacion (str): Estación seguida.
+        """
+        response = requests.get(f"{self.base_url}/get_data", params={"estacion": estacion}, timeout=5)
+        response.raise_for_status()
+        snapshot = response.json()
+        with self._lock:
+            self.following = estacion
+            self._covered_seq = snapshot.get("seq", 0)
+            self._pending = {
+                "angulo": snapshot.get("angulo", []), "par": snapshot.get("par", []),
+                "reset": True, "resync": True,
+                "prediction": snapshot.get("prediction", ""),
+                "identificador": snapshot.get("identificador", ""),
+                "fecha": snapshot.get("fecha", ""),
+            }
+
+    def _consume(self, response):
+        """
+        Lee los eventos del flujo hasta que se cierra.
+
+        Args:
+            response (requests.Response): Respuesta abierta en modo streaming.
+        """
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:") and event is not None:
+                if event == "dropped":
+                    return
+                self._apply(event, json.loads(line[5:]))
+                event = None
+
+    def _apply(self, event, payload):
+        """
+        Acumula un evento en los cambios pendientes.
+
+        Args:
+            event (str): Tipo de evento.
+            payload (dict): Datos del evento.
+        """
+        with self._lock:
+            pending = self._pending
+            # Los eventos encolados antes de la instantánea ya están incluidos en ella
+            if event == "reset" and payload.get("seq", self._covered_seq) < self._covered_seq:
+                return
+            if event == "ventana" and payload.get("seq", self._covered_seq + 1) <= self._covered_seq:
+                return
+            if event == "reset":
+                pending.update(angulo=[], par=[], reset=True, prediction="",
+                               identificador=payload["identificador"], fecha=payload["fecha"])
+            elif event == "ventana":
+                pending["angulo"].extend(payload["angulo"])
+                pending["par"].extend(payload["par"])
+                pending["identificador"] = payload["identificador"]
+                pending["fecha"] = payload["fecha"]
+            elif event == "prediccion":
+                pending["prediction"] = payload["prediction"]
@@ -0,0 +1,169 @@
+"""
+Tiempos por Etapa de las Solicitudes
+
+Este módulo mide cuánto tarda cada etapa de una solicitud (decodificación del JSON,
+búsqueda del modelo, escalado, predicción, reenvío y respuesta) y los devuelve en la
+cabecera estándar `Server-Timing`, de modo que un cliente o un benchmark puede
+desglosar la latencia sin instrumentación adicional.
+
+El temporizador de la solicitud en curso se guarda en una variable de contexto; las
+funciones instrumentadas llaman a `stage` y, si la medición está desactivada o no hay
+solicitud en curso, la llamada no hace nada.
+
+Imports:
+    - contextvars: Librería para asociar el temporizador a la solicitud en curso.
+    - time: Librería para manejo de tiempo.
+
+Clases:
+    - StageTimer: Duración acumulada de cada etapa de una solicitud.
+
+Funciones:
+    - stage: Cierra la etapa en curso de la solicitud actual.
+    - merge_server_timing: Añade las etapas de otro servicio a la solicitud actual.
+    - parse_server_timing: Interpreta una cabecera Server-Timing.
+    - add_timing_middleware: Mide las solicitudes de una aplicación y añade la cabecera.
+"""
+
+import contextvars
+import time
+
+_current_timer = contextvars.ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """
+    Duración acumulada de cada etapa de una solicitud.
+
+    Cada llamada a `mark` cierra la etapa que empezó con la marca anterior (o con el
+    inicio de la solicitud), así que las etapas son consecutivas y su suma es el
+    tiempo total. Las etapas de otro servicio se añaden con `nest`, que las descuenta
+    de la etapa local que las contiene para que la suma siga siendo el total.
+
+    Atributos:
+        started_at (float): Momento en que comenzó la solicitud.
+        stages (dict): Segundos acumulados de cada etapa, en orden de aparición.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages = {}
+        self._last_mark = self.started_at
+
+    def mark(self, name):
+        """
+        Cierra la etapa en curso con el nombre indicado.
+
+        Args:
+            name (str): Nombre de la etapa.
+        """
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._last_mark
+        self._last_mark = now
+
+    def nest(self, parent, name, seconds):
+        """
+        Añade una duración medida fuera de este proceso dentro de una etapa local.
+
+        La duración se descuenta de `parent`, que queda con el tiempo que no se
+        atribuye a ninguna etapa anidada (por ejemplo, la red).
+
+        Args:
+            parent (str): Etapa local que contiene a la anidada.
+            name (str): Nombre de la etapa.
+            seconds (float): Duración en segundos.
+        """
+        seconds = min(seconds, self.stages.get(parent, 0.0))
+        self.stages[parent] = self.stages.get(parent, 0.0) - seconds
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def header(self):
+        """
+        Devuelve las etapas con el formato de la cabecera Server-Timing.
+
+        Returns:
+            str: Etapas en milisegundos más el total de la solicitud.
+        """
+        total = time.perf_counter() - self.started_at
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(parts)
+
+
+def stage(name):
+    """
+    Cierra la etapa en curso de la solicitud actual.
+
+    Args:
+        name (str): Nombre de la etapa.
+    """
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.mark(name)
+
+
+def parse_server_timing(value):
+    """
+    Interpreta una cabecera Server-Timing.
+
+    Args:
+        value (str): Valor de la cabecera.
+
+    Returns:
+        dict: Milisegundos de cada etapa.
+    """
+    stages = {}
+    for part in (value or "").split(","):
+        name, _, params = part.strip().partition(";")
+        for param in params.split(";"):
+            key, _, duration = param.strip().partition("=")
+            if name and key == "dur":
+                try:
+                    stages[name] = float(duration)
+                except ValueError:
+                    pass
+    return stages
+
+
+def merge_server_timing(parent, prefix, value):
+    """
+    Añade a la solicitud actual las etapas que reportó otro servicio.
+
+    Las etapas se anidan en `parent`, la etapa local que cubre la llamada al otro
+    servicio, así que no se cuentan dos veces; el `total` del otro servicio se omite
+    por la misma razón.
+
+    Args:
+        parent (str): Etapa local que contiene la llamada.
+        prefix (str): Prefijo para distinguir las etapas del otro servicio.
+        value (str): Cabecera Server-Timing de su respuesta.
+    """
+    timer = _current_timer.get()
+    if timer is None or not value:
+        return
+    for name, duration in parse_server_timing(value).items():
+        if name != "total":
+            timer.nest(parent, f"{prefix}-{name}", duration / 1000)
+
+
+def add_timing_middleware(app):
+    """
+    Mide las solicitudes de una aplicación y añade la cabecera Server-Timing.
+
+    La etapa `response` es lo que transcurre desde la última marca del manejador hasta
+    que la respuesta está lista (incluye su serialización).
+
+    Args:
+        app (FastAPI): Aplicación a instrumentar.
+    """
+    @app.middleware("http")
+    async def server_timing(request, call_next):
+        timer = StageTimer()
+        token = _current_timer.set(timer)
+        try:
+            response = await call_next(request)
+        finally:
+            _current_timer.reset(token)
+        if timer.stages:
+            timer.mark("response")
+            response.headers["Server-Timing"] = timer.header()
+        return response
@@ -13,11 +13,16 @@ Imports:
     - datetime: Librería para manejar fechas y horas.
     - matplotlib.pyplot: Librería para crear gráficas.
     - streamlit_autorefresh: Plugin de Streamlit para auto refrescar la página.
+    - stream_client: Consumidor del canal de streaming del servicio de datos.
+    - model_bundle: Lectura del manifiesto de los paquetes de inferencia.
 
 Funciones:
     - get_model_folders: Obtiene las carpetas de los modelos.
     - get_models: Obtiene los nombres de los modelos dentro de una carpeta.
+    - get_window_size: Obtiene el tamaño de ventana de un modelo.
     - update_prediction_service: Actualiza el modelo en el servicio de predicción.
+    - rollback_prediction_service: Vuelve al modelo anterior en el servicio de predicción.
+    - get_stream_consumer: Obtiene el consumidor del canal de streaming de la sesión.
     - fetch_data: Obtiene datos del servicio de datos.
     - update_data: Actualiza el estado de los datos en la aplicación.
 """
@@ -34,21 +39,27 @@ import pygame
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 from streamlit_autorefresh import st_autorefresh
+from stream_client import StreamConsumer
+from model_bundle import read_manifest
 
 pygame.init()
 
+# Carpeta de los modelos entrenados
+MODELS_DIR = os.environ.get("MODELS_DIR", r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos')
+
 # Título de la aplicación
 st.title("Visualización de Datos en Tiempo Real")
 
-# Auto refrescar la página cada 5 segundos
-count = st_autorefresh(interval=5000, limit=None, key="autorefresh")
-
 # Inicializar los datos en la sesión
 if 'data' not in st.session_state:
-    st.session_state.data = {"angulo": [], "par": [], "prediction": "", "process_count": 0, "identificador": "", "fecha": ""}
+    st.session_state.data = {"angulo": [], "par": [], "prediction": "", "process_count": 0, "identificador": "", "fecha": "",
+                             "estacion": None}
+    st.session_state.station_processes = {}  # Último identificador visto de cada estación
     st.session_state.last_update_time = datetime.now()
     st.session_state.is_active = True
     st.session_state.save_graphs = True  # Nuevo: inicializar la opción de guardar gráficas
+    st.session_state.cursor = None  # Cursor de /get_data; None pide una instantánea completa
+    st.session_state.cursor_estacion = None  # Estación que emitió el cursor
 
 # Cargar sonido de alerta
 alert_sound_path = "alert_sound.mp3"
@@ -61,8 +72,7 @@ def get_model_folders():
     Returns:
         list: Lista de nombres de carpetas de modelos.
     """
-    models_dir = r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos'
-    return [f for f in os.listdir(models_dir) if os.path.isdir(os.path.join(models_dir, f))]
+    return [f for f in os.listdir(MODELS_DIR) if os.path.isdir(os.path.join(MODELS_DIR, f))]
 
 def get_models(folder):
     """
@@ -70,10 +80,27 @@ def get_models(folder):
     Args:
         folder (str): Nombre de la carpeta que contiene los modelos.
     Returns:
-        list: Lista de nombres de modelos (sin extensión .pkl).
+        list: Lista de nombres de modelos (sin extensión .pkl ni .bundle).
+    """
+    models_dir = os.path.join(MODELS_DIR, folder)
+    return sorted({f.split('.')[0] for f in os.listdir(models_dir)
+                   if f.endswith(('.pkl', '.bundle')) and not f.startswith('scaler')})
+
+def get_window_size(folder, model_name):
+    """
+    Obtiene el tamaño de ventana de un modelo.
+    Se lee del manifiesto del paquete .bundle; los modelos antiguos sin paquete lo
+    indican al final de su nombre (ensemble_{w}).
+    Args:
+        folder (str): Nombre de la carpeta que contiene el modelo.
+        model_name (str): Nombre del modelo.
+    Returns:
+        int: Tamaño de la ventana de datos.
     """
-    models_dir = os.path.join(r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos', folder)
-    return [f.split('.')[0] for f in os.listdir(models_dir) if f.endswith('.pkl') and not f.startswith('scaler')]
+    bundle_path = os.path.join(MODELS_DIR, folder, f'{model_name}.bundle')
+    if os.path.exists(bundle_path):
+        return read_manifest(bundle_path)["window_size"]
+    return int(model_name.split('_')[-1])
 
 # Configuración de la aplicación
 st.sidebar.title("Configuración")
@@ -85,6 +112,11 @@ selected_model = st.sidebar.selectbox("Seleccione el modelo", models)
 # Guardar gráficos: menú desplegable
 st.session_state.save_graphs = st.sidebar.selectbox("¿Guardar gráficas?", ["Sí", "No"]) == "Sí"
 
+# Modo de actualización: el streaming recibe los eventos en cuanto ocurren y la página
+# solo relee el estado local; la consulta periódica pide los datos cada 5 segundos
+use_stream = st.sidebar.selectbox("Modo de actualización", ["Streaming", "Consulta periódica"]) == "Streaming"
+count = st_autorefresh(interval=1000 if use_stream else 5000, limit=None, key="autorefresh")
+
 # Función para actualizar el servicio de predicción
 def update_prediction_service():
     """
@@ -92,15 +124,17 @@ def update_prediction_service():
     Envía una solicitud POST al servicio de predicción para actualizar el modelo.
     """
     try:
-        # Extraer tamaño de ventana del nombre del modelo
-        window_size = int(selected_model.split('_')[-1])
+        # Tamaño de ventana del manifiesto del modelo
+        window_size = get_window_size(selected_folder, selected_model)
         response = requests.post("http://localhost:8001/update_model", json={
             "model_folder": selected_folder,
             "model_name": selected_model,
             "window_size": window_size,
         })
         if response.status_code == 200:
-            st.success("Modelo actualizado con éxito en el servicio de predicción.")
+            timings = response.json().get("timings", {})
+            st.success(f"Modelo actualizado con éxito en el servicio de predicción "
+                       f"(carga {timings.get('load_ms', 0):.0f} ms, calentamiento {timings.get('warmup_ms', 0):.0f} ms).")
         else:
             st.error(f"Error al actualizar el modelo: {response.text}")
     except requests.exceptions.RequestException as e:
@@ -108,21 +142,64 @@ def update_prediction_service():
     except ValueError as ve:
         st.error(f"Error al extraer tamaño de ventana: {str(ve)}")
 
-# Botón para actualizar el modelo
+def rollback_prediction_service():
+    """
+    Vuelve al modelo anterior en el servicio de predicción.
+    El modelo anterior sigue cargado, por lo que el cambio es inmediato.
+    """
+    try:
+        response = requests.post("http://localhost:8001/rollback_model")
+        if response.status_code == 200:
+            model = response.json()["model"]
+            st.success(f"Se volvió al modelo {model['model_folder']}/{model['model_name']}.")
+        else:
+            st.error(f"No se pudo volver al modelo anterior: {response.text}")
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error de conexión: {str(e)}")
+
+# Botones para actualizar el modelo y para volver al anterior
 if st.sidebar.button('Actualizar servicio de predicción'):
     update_prediction_service()
+if st.sidebar.button('Volver al modelo anterior'):
+    rollback_prediction_service()
+
+def get_stream_consumer():
+    """
+    Obtiene el consumidor del canal de streaming de esta sesión de Streamlit.
+    Cada sesión tiene su propia conexión para que ninguna consuma los cambios de otra.
+    Returns:
+        StreamConsumer: Consumidor iniciado la primera vez que se usa en la sesión.
+    """
+    if 'stream_consumer' not in st.session_state:
+        st.session_state.stream_consumer = StreamConsumer("http://localhost:8001").start()
+    return st.session_state.stream_consumer
 
 # Función para obtener datos del servicio
 def fetch_data():
     """
     Obtiene datos del servicio de datos.
+    La primera consulta pide una instantánea completa; las siguientes envían el cursor
+    recibido, con la estación que lo emitió, para obtener solo los puntos nuevos. Si se
+    perdieron puntos posteriores al cursor se pide de nuevo una instantánea completa.
     Returns:
         dict: Diccionario con los datos obtenidos del servicio de datos.
     """
+    params = {}
+    if st.session_state.cursor is not None:
+        params = {"since": st.session_state.cursor, "since_estacion": st.session_state.cursor_estacion}
     try:
-        response = requests.get("http://localhost:8001/get_data")
+        response = requests.get("http://localhost:8001/get_data", params=params)
         if response.status_code == 200:
-            return response.json()
+            new_data = response.json()
+            if new_data.get("truncated"):
+                # La copia local tiene un hueco: reemplazarla por la curva completa
+                snapshot = requests.get("http://localhost:8001/get_data", params={"estacion": new_data.get("estacion")})
+                if snapshot.status_code == 200:
+                    new_data = snapshot.json()
+                    new_data.update(reset=True, resync=True)
+            st.session_state.cursor = new_data.get("seq")
+            st.session_state.cursor_estacion = new_data.get("estacion")
+            return new_data
         else:
             return {"angulo": [], "par": [], "prediction": "Error", "reset": False, "identificador": "", "fecha": ""}
     except requests.RequestException as e:
@@ -139,7 +216,16 @@ def update_data(new_data):
         st.session_state.last_update_time = datetime.now()
         st.session_state.is_active = True
         if new_data["reset"]:
-            st.session_state.data["process_count"] += 1
+            # Al seguir la estación más reciente, un cambio de estación también llega como
+            # reinicio: solo cuenta como proceso nuevo si cambia el identificador de esa
+            # estación o si el servidor reinicia la misma estación que se estaba mostrando
+            estacion = new_data.get("estacion")
+            same_station = estacion == st.session_state.data["estacion"]
+            new_process = same_station or st.session_state.station_processes.get(estacion) != new_data["identificador"]
+            if new_process and not new_data.get("resync"):
+                st.session_state.data["process_count"] += 1
+            st.session_state.station_processes[estacion] = new_data["identificador"]
+            st.session_state.data["estacion"] = estacion
             st.session_state.data["angulo"] = new_data["angulo"]
             st.session_state.data["par"] = new_data["par"]
             st.session_state.data["identificador"] = new_data["identificador"]
@@ -152,13 +238,18 @@ def update_data(new_data):
         # Reproducir sonido si la predicción es "NOT OK"
         if new_data["prediction"] == "NOT OK":
             alert_sound.play()
+    elif new_data["prediction"] != st.session_state.data["prediction"]:
+        # La predicción de la última ventana puede llegar en una consulta posterior a sus puntos
+        st.session_state.data["prediction"] = new_data["prediction"]
+        if new_data["prediction"] == "NOT OK":
+            alert_sound.play()
     else:
         # Si no hay nuevos datos, verificar si han pasado 10 segundos
         if datetime.now() - st.session_state.last_update_time > timedelta(seconds=10):
             st.session_state.is_active = False
 
 # Obtener y actualizar los datos
-new_data = fetch_data()
+new_data = get_stream_consumer().drain() if use_stream else fetch_data()
 update_data(new_data)
 
 # Mostrar información del proceso y datos
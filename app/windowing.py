@@ -0,0 +1,85 @@
+"""
+Ventaneo Vectorizado de Curvas
+
+Este módulo divide todas las curvas de ángulo y par de un archivo en ventanas de
+tamaño fijo con operaciones vectorizadas de NumPy, sin bucles de Python por proceso
+ni por ventana. Lo usan tanto el despachador de datos como el entrenamiento.
+
+Imports:
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+
+Funciones:
+    - compact_curves: Mueve los valores válidos de cada curva al inicio de su fila.
+    - window_curves: Genera la matriz de ventanas de todas las curvas.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def compact_curves(curvas):
+    """
+    Mueve los valores válidos de cada curva al inicio de su fila.
+
+    Equivale a aplicar `dropna()` a cada curva. Si los NaN solo aparecen al final de
+    las filas (el caso habitual) se devuelve la misma matriz sin copiarla.
+
+    Args:
+        curvas (np.ndarray): Matriz de forma (n_curvas, n_puntos) con NaN como faltantes.
+
+    Returns:
+        tuple: Matriz compactada y número de valores válidos de cada curva.
+    """
+    valid = ~np.isnan(curvas)
+    lengths = valid.sum(axis=1)
+    if np.array_equal(valid, np.arange(curvas.shape[1]) < lengths[:, None]):
+        return curvas, lengths
+    order = np.argsort(~valid, axis=1, kind='stable')
+    return np.take_along_axis(curvas, order, axis=1), lengths
+
+
+def window_curves(curvas, window_size, stride=None, etiquetas=None):
+    """
+    Genera la matriz de ventanas de todas las curvas.
+
+    Las filas pares de `curvas` son el ángulo y las impares el par de cada proceso.
+    Cada ventana se aplana como [ángulo..., par...], igual que en model_service. Solo
+    se usan procesos con más de `window_size` puntos, y las ventanas comienzan cada
+    `stride` puntos (por defecto `window_size`, sin solapamiento; un `stride` menor
+    produce ventanas solapadas en `window_size - stride` puntos).
+
+    Args:
+        curvas (np.ndarray): Matriz de forma (n_curvas, n_puntos) con NaN como faltantes.
+        window_size (int): Tamaño de la ventana de datos.
+        stride (int): Separación entre el inicio de ventanas consecutivas.
+        etiquetas (np.ndarray): Etiqueta de cada curva, opcional.
+
+    Returns:
+        tuple: Matriz float32 de forma (n_ventanas, 2 * window_size), índice del proceso
+        de cada ventana y etiqueta de cada ventana (o `None` si no hay etiquetas).
+    """
+    stride = stride or window_size
+    if stride <= 0:
+        raise ValueError("El paso entre ventanas debe ser positivo.")
+
+    n_processes = len(curvas) // 2
+    compacted, lengths = compact_curves(np.asarray(curvas)[:2 * n_processes])
+    angulo, par = compacted[0::2], compacted[1::2]
+    min_len = np.minimum(lengths[0::2], lengths[1::2])
+
+    counts = np.where(min_len > window_size, (min_len - window_size) // stride + 1, 0)
+    n_windows = int(counts.sum())
+    X = np.empty((n_windows, 2 * window_size), dtype=np.float32)
+    procesos = np.repeat(np.arange(n_processes), counts)
+    labels = None if etiquetas is None else np.asarray(etiquetas)[0::2][procesos]
+    if n_windows == 0:
+        return X, procesos, labels
+
+    # Posición de inicio de cada ventana dentro de su proceso
+    first = np.cumsum(counts) - counts
+    starts = (np.arange(n_windows) - np.repeat(first, counts)) * stride
+
+    # Vistas sin copia de todas las ventanas posibles; la única copia es la de X
+    X[:, :window_size] = sliding_window_view(angulo, window_size, axis=1)[procesos, starts]
+    X[:, window_size:] = sliding_window_view(par, window_size, axis=1)[procesos, starts]
+    return X, procesos, labels
@@ -0,0 +1,437 @@
+"""
+Benchmark de Latencia de Extremo a Extremo
+
+Este script mide cuánto tarda una ventana desde que se envía a `/data` hasta que su
+predicción es visible en `/get_data`, que es el recorrido completo despachador →
+prediction_service → model_service → tablero.
+
+Para cada tamaño de ventana se entrena un modelo pequeño de prueba con curvas
+sintéticas de `curvas_sinteticas` (o se reutiliza el de una ejecución anterior), se inician
+prediction_service y model_service en puertos locales y se envían ventanas con
+varios niveles de concurrencia. Ambos servicios se inician con `SERVER_TIMING=1`,
+de modo que cada respuesta de `/data` trae la duración de sus etapas (decode,
+session, model-decode, model-lookup, model-scale, model-predict, model-response y
+forward, que es el resto de la llamada a model_service: red y cliente HTTP). Las
+etapas no se solapan, así que su suma es la latencia del servidor.
+
+El resultado es un JSON con la configuración, el entorno y los percentiles de cada
+combinación. Con `--comparar` se contrasta con un resultado anterior y el script
+termina con código 1 si alguna latencia empeora más que la tolerancia.
+
+Uso:
+    python benchmarks/benchmark_latencia.py --salida resultados.json
+    python benchmarks/benchmark_latencia.py --ventanas 50 100 --concurrencias 1 8 --comparar base.json
+    python benchmarks/benchmark_latencia.py --formato binario --comparar base.json
+
+Imports:
+    - argparse: Librería para leer los argumentos de la línea de comandos.
+    - json: Librería para escribir los resultados.
+    - os: Librería para interactuar con el sistema operativo.
+    - platform: Librería para describir el entorno.
+    - subprocess: Librería para iniciar los servicios.
+    - sys: Librería para acceder al intérprete.
+    - tempfile: Librería para crear la carpeta de modelos temporal.
+    - threading: Librería para manejar hilos.
+    - time: Librería para manejo de tiempo.
+    - datetime: Librería para registrar la fecha de la ejecución.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - requests: Librería para realizar solicitudes HTTP.
+    - ensemble, tree_engine, model_bundle, timing, curvas_sinteticas, windowing, payload: Módulos de la aplicación.
+
+Funciones:
+    - synthetic_windows: Genera ventanas sintéticas etiquetadas.
+    - build_fixture_models: Entrena los modelos de prueba de cada tamaño de ventana.
+    - start_services: Inicia prediction_service y model_service.
+    - run_level: Mide una combinación de tamaño de ventana y concurrencia.
+    - compare_results: Compara dos resultados y devuelve las regresiones.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import requests
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+sys.path.append(APP_DIR)
+from ensemble import PrefitSoftVotingEnsemble
+from tree_engine import compile_ensemble
+from model_bundle import write_bundle
+from timing import parse_server_timing
+from curvas_sinteticas import LABEL_NOK, generate_curves
+from windowing import window_curves
+from payload import PAYLOAD_FORMATS, encode_request
+
+RESULTS_VERSION = 1
+FIXTURE_FOLDER = "benchmark"
+# Métricas que se comparan entre ejecuciones (mayor es peor)
+COMPARED_METRICS = ("e2e_ms.p50", "e2e_ms.p95", "post_ms.p50", "post_ms.p95")
+
+
+def synthetic_windows(n_windows, window_size, seed=0):
+    """
+    Genera ventanas sintéticas etiquetadas a partir de curvas de atornillado sintéticas.
+
+    Args:
+        n_windows (int): Número de ventanas.
+        window_size (int): Tamaño de la ventana de datos.
+        seed (int): Semilla del generador.
+
+    Returns:
+        tuple: Matriz de ventanas [ángulo..., par...] y etiqueta binaria de cada una.
+    """
+    # Con al menos 3 * window_size + 1 puntos, cada proceso aporta al menos 3 ventanas
+    min_points = 3 * window_size + 1
+    curve_set = generate_curves(n_windows // 3 + 1, seed=seed, nok_ratio=0.3,
+                                min_points=min_points, max_points=2 * min_points)
+    X, _, labels = window_curves(curve_set.curvas, window_size, etiquetas=curve_set.etiquetas)
+    return X[:n_windows], (labels[:n_windows] == LABEL_NOK).astype(int)
+
+
+def build_fixture_models(models_dir, window_sizes, n_windows=400):
+    """
+    Entrena los modelos de prueba de cada tamaño de ventana.
+
+    Los modelos son pequeños (pocos árboles poco profundos) para que el benchmark mida
+    sobre todo el recorrido de los servicios; los que ya existen se reutilizan.
+
+    Args:
+        models_dir (str): Carpeta de modelos (se usa la subcarpeta `benchmark`).
+        window_sizes (list): Tamaños de ventana.
+        n_windows (int): Ventanas de entrenamiento de cada modelo.
+    """
+    import lightgbm as lgb
+    import xgboost as xgb
+    from sklearn.preprocessing import StandardScaler
+
+    folder = os.path.join(models_dir, FIXTURE_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    for window_size in window_sizes:
+        path = os.path.join(folder, f"ensemble_{window_size}.bundle")
+        if os.path.exists(path):
+            continue
+        X, y = synthetic_windows(n_windows, window_size, seed=window_size)
+        scaler = StandardScaler().fit(X)
+        X_scaled = scaler.transform(X)
+        members = [
+            ('xgb', xgb.XGBClassifier(n_estimators=25, max_depth=3, n_jobs=1).fit(X_scaled, y)),
+            ('lgb', lgb.LGBMClassifier(n_estimators=25, num_leaves=8, n_jobs=1, verbose=-1).fit(X_scaled, y)),
+        ]
+        model = PrefitSoftVotingEnsemble(members)
+        write_bundle(path, model, scaler, window_size, engine=compile_ensemble(model, scaler))
+        print(f"Modelo de prueba: {path}")
+
+
+def _wait_until_ready(url, process, timeout=60):
+    """
+    Espera a que un servicio responda.
+
+    Args:
+        url (str): URL a consultar.
+        process (subprocess.Popen): Proceso del servicio.
+        timeout (float): Segundos máximos de espera.
+
+    Raises:
+        RuntimeError: Si el servicio termina o no responde a tiempo.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"El servicio terminó con código {process.returncode} antes de responder en {url}.")
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"El servicio no respondió en {url}.")
+
+
+def start_services(models_dir, data_port, model_port, embedded=False, async_prediction=False, log_path=None):
+    """
+    Inicia prediction_service y, si no es el modo embebido, model_service.
+
+    Args:
+        models_dir (str): Carpeta de modelos.
+        data_port (int): Puerto de prediction_service.
+        model_port (int): Puerto de model_service.
+        embedded (bool): Si las predicciones se calculan dentro de prediction_service.
+        async_prediction (bool): Si `/data` responde antes de adjuntar la predicción.
+        log_path (str): Archivo donde se guarda la salida de los servicios.
+
+    Returns:
+        list: Procesos iniciados.
+    """
+    env = dict(os.environ, MODELS_DIR=models_dir, SERVER_TIMING="1",
+               MODEL_SERVICE_URL=f"http://127.0.0.1:{model_port}",
+               EMBEDDED_MODEL="1" if embedded else "0",
+               ASYNC_PREDICTION="1" if async_prediction else "0")
+    log = open(log_path, 'ab') if log_path else subprocess.DEVNULL
+    processes = []
+    try:
+        if not embedded:
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "model_service:app", "--port", str(model_port), "--log-level", "warning"],
+                cwd=APP_DIR, env=env, stdout=log, stderr=log))
+            _wait_until_ready(f"http://127.0.0.1:{model_port}/", processes[-1])
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "prediction_service:app", "--port", str(data_port), "--log-level", "warning"],
+            cwd=APP_DIR, env=env, stdout=log, stderr=log))
+        _wait_until_ready(f"http://127.0.0.1:{data_port}/health", processes[-1])
+    except Exception:
+        stop_services(processes)
+        raise
+    return processes
+
+
+def stop_services(processes):
+    """
+    Detiene los servicios iniciados.
+
+    Args:
+        processes (list): Procesos de los servicios.
+    """
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _percentiles(values):
+    """
+    Resume una lista de duraciones en milisegundos.
+
+    Args:
+        values (list): Duraciones en milisegundos.
+
+    Returns:
+        dict: Media, percentiles 50, 95 y 99 y máximo.
+    """
+    if not values:
+        return {}
+    values = np.asarray(values)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"mean": round(float(values.mean()), 3), "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3), "max": round(float(values.max()), 3)}
+
+
+def run_level(base_url, window_size, concurrency, n_windows, warmup=5, poll_timeout=10, payload_format="json"):
+    """
+    Mide una combinación de tamaño de ventana y concurrencia.
+
+    Cada hilo simula una estación: envía una ventana con `reset=True` y consulta
+    `/get_data` de su estación hasta ver la predicción, y repite.
+
+    Args:
+        base_url (str): URL de prediction_service.
+        window_size (int): Tamaño de la ventana de datos.
+        concurrency (int): Número de estaciones simultáneas.
+        n_windows (int): Ventanas medidas por estación.
+        warmup (int): Ventanas por estación que se envían antes de medir.
+        poll_timeout (float): Segundos máximos de espera de cada predicción.
+        payload_format (str): Formato de las ventanas (json, base64 o binario).
+
+    Returns:
+        dict: Percentiles de extremo a extremo, del envío y de cada etapa.
+    """
+    X, _ = synthetic_windows(warmup + n_windows, window_size, seed=1)
+    lock = threading.Lock()
+    e2e, post, stages, errors = [], [], {}, [0]
+    barrier = threading.Barrier(concurrency + 1)
+
+    def station(index):
+        estacion = f"bench-{window_size}-{concurrency}-{index}"
+        with requests.Session() as session:
+            for i in range(warmup + n_windows):
+                if i == warmup:
+                    barrier.wait()
+                params, headers, body = encode_request(X[i, :window_size], X[i, window_size:], {
+                    "reset": True, "identificador": f"{estacion}-{i}", "fecha": "", "estacion": estacion,
+                }, payload_format)
+                started = time.perf_counter()
+                response, prediction = None, ""
+                try:
+                    response = session.post(f"{base_url}/data", params=params, data=body, headers=headers,
+                                            timeout=poll_timeout)
+                    posted = time.perf_counter()
+                    while response.ok and prediction in ("", None) and time.perf_counter() - started < poll_timeout:
+                        prediction = session.get(f"{base_url}/get_data", params={"estacion": estacion},
+                                                 timeout=poll_timeout).json().get("prediction")
+                except requests.exceptions.RequestException:
+                    response = None
+                finished = time.perf_counter()
+                if i < warmup:
+                    continue
+                with lock:
+                    if response is None or not response.ok or prediction in ("", None, "Error"):
+                        errors[0] += 1
+                        continue
+                    post.append((posted - started) * 1000)
+                    e2e.append((finished - started) * 1000)
+                    for name, duration in parse_server_timing(response.headers.get("server-timing")).items():
+                        stages.setdefault(name, []).append(duration)
+
+    threads = [threading.Thread(target=station, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    return {
+        "window_size": window_size,
+        "concurrency": concurrency,
+        "windows": len(e2e),
+        "errors": errors[0],
+        "throughput_per_s": round(len(e2e) / duration, 2) if duration > 0 else 0.0,
+        "e2e_ms": _percentiles(e2e),
+        "post_ms": _percentiles(post),
+        "stages_ms": {name: _percentiles(values) for name, values in stages.items()},
+    }
+
+
+def _environment():
+    """
+    Describe el entorno de la ejecución.
+
+    Returns:
+        dict: Commit, versiones de Python y de las librerías, y núcleos disponibles.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=APP_DIR, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {}
+    for name in ("numpy", "sklearn", "xgboost", "lightgbm", "fastapi", "uvicorn", "httpx"):
+        try:
+            versions[name] = __import__(name).__version__
+        except (ImportError, AttributeError):
+            versions[name] = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "packages": versions}
+
+
+def _metric(result, path):
+    """
+    Lee una métrica anidada de un resultado, por ejemplo `e2e_ms.p95`.
+
+    Args:
+        result (dict): Resultado de una combinación.
+        path (str): Ruta de la métrica separada por puntos.
+
+    Returns:
+        float: Valor de la métrica, o `None` si no existe.
+    """
+    value = result
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare_results(baseline, current, tolerance=0.2):
+    """
+    Compara dos resultados y devuelve las regresiones.
+
+    Args:
+        baseline (dict): Resultado de referencia.
+        current (dict): Resultado actual.
+        tolerance (float): Empeoramiento relativo tolerado (0.2 = 20 %).
+
+    Returns:
+        list: Métricas de cada combinación que empeoraron más que la tolerancia.
+    """
+    reference = {(r["window_size"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        base = reference.get((result["window_size"], result["concurrency"]))
+        if base is None:
+            continue
+        for path in COMPARED_METRICS:
+            before, after = _metric(base, path), _metric(result, path)
+            if before and after and after > before * (1 + tolerance):
+                regressions.append({"window_size": result["window_size"], "concurrency": result["concurrency"],
+                                    "metric": path, "baseline": before, "current": after,
+                                    "change": round(after / before - 1, 3)})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide la latencia de extremo a extremo de /data a /get_data.")
+    parser.add_argument("--ventanas", type=int, nargs="+", default=[50, 100, 500], help="Tamaños de ventana.")
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[1, 4, 16], help="Estaciones simultáneas.")
+    parser.add_argument("--muestras", type=int, default=50, help="Ventanas medidas por estación.")
+    parser.add_argument("--calentamiento", type=int, default=5, help="Ventanas por estación antes de medir.")
+    parser.add_argument("--modelos", help="Carpeta de modelos; por defecto una carpeta temporal.")
+    parser.add_argument("--puerto-datos", type=int, default=18001, help="Puerto de prediction_service.")
+    parser.add_argument("--puerto-modelo", type=int, default=18000, help="Puerto de model_service.")
+    parser.add_argument("--embebido", action="store_true", help="Calcula las predicciones dentro de prediction_service.")
+    parser.add_argument("--asincrono", action="store_true", help="Activa ASYNC_PREDICTION en prediction_service.")
+    parser.add_argument("--formato", choices=PAYLOAD_FORMATS, default="json", help="Formato de las ventanas enviadas.")
+    parser.add_argument("--salida", help="Archivo JSON donde se guardan los resultados.")
+    parser.add_argument("--comparar", help="Resultado anterior con el que comparar.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento relativo tolerado.")
+    parser.add_argument("--log", help="Archivo donde se guarda la salida de los servicios.")
+    args = parser.parse_args()
+
+    models_dir = args.modelos or tempfile.mkdtemp(prefix="benchmark_modelos_")
+    build_fixture_models(models_dir, args.ventanas)
+
+    base_url = f"http://127.0.0.1:{args.puerto_datos}"
+    processes = start_services(models_dir, args.puerto_datos, args.puerto_modelo, embedded=args.embebido,
+                               async_prediction=args.asincrono, log_path=args.log)
+    results = []
+    try:
+        for window_size in args.ventanas:
+            response = requests.post(f"{base_url}/update_model", json={
+                "model_folder": FIXTURE_FOLDER, "model_name": f"ensemble_{window_size}", "window_size": window_size,
+            }, timeout=120)
+            response.raise_for_status()
+            for concurrency in args.concurrencias:
+                result = run_level(base_url, window_size, concurrency, args.muestras, warmup=args.calentamiento,
+                                   payload_format=args.formato)
+                results.append(result)
+                print(f"ventana={window_size} concurrencia={concurrency} "
+                      f"e2e p50={result['e2e_ms'].get('p50')} ms p95={result['e2e_ms'].get('p95')} ms "
+                      f"{result['throughput_per_s']} ventanas/s errores={result['errors']}")
+    finally:
+        stop_services(processes)
+
+    output = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "config": {"window_sizes": args.ventanas, "concurrency": args.concurrencias, "samples": args.muestras,
+                   "warmup": args.calentamiento, "embedded": args.embebido, "async_prediction": args.asincrono,
+                   "payload_format": args.formato},
+        "results": results,
+    }
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            regressions = compare_results(json.load(f), output, args.tolerancia)
+        for regression in regressions:
+            print(f"Regresión: ventana={regression['window_size']} concurrencia={regression['concurrency']} "
+                  f"{regression['metric']} {regression['baseline']} -> {regression['current']} ms")
+        if regressions:
+            sys.exit(1)
+        print("Sin regresiones respecto al resultado anterior.")
@@ -1,23 +1,30 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import joblib
 import gc
-from glob import glob
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, roc_auc_score
 import xgboost as xgb
 import lightgbm as lgb
 from imblearn.over_sampling import SMOTE
-from sklearn.ensemble import VotingClassifier
 from collections import Counter
 
-# Carpeta principal que contiene las subcarpetas con archivos .xlsx
+# Módulos compartidos con la aplicación (caché de Excel, ventaneo, ensamble, motor de inferencia y paquetes)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'app'))
+from excel_cache import load_curves, source_files
+from windowing import window_curves
+from ensemble import PrefitSoftVotingEnsemble
+from tree_engine import compile_ensemble
+from model_bundle import write_bundle
+
+# Carpeta principal que contiene las subcarpetas con archivos .xlsx (o carpetas .curvas ya convertidas)
 main_folder_path = r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\src\data'
 
-# Obtener lista de subcarpetas en la carpeta principal
-subfolders = [f.path for f in os.scandir(main_folder_path) if f.is_dir()]
+# Carpeta donde se guardan los modelos entrenados
+models_dir = os.environ.get("MODELS_DIR", r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos')
 
 # Lista de tamaños de ventanas
 window_sizes = [50, 100, 500]
@@ -25,62 +32,42 @@ window_sizes = [50, 100, 500]
 # Inicializar lista para almacenar métricas
 metrics = []
 
-def prepare_data(df, window_size):
-    X = []
-    y = []
-    for i in range(0, df.shape[1], 2):
-        if i + 1 >= df.shape[1]:
-            break
-        angulo = df.iloc[1:, i].dropna().astype(float).values
-        par = df.iloc[1:, i+1].dropna().astype(float).values
-        label = df.iloc[0, i]
-        min_len = min(len(angulo), len(par))
-        if min_len > window_size:
-            for j in range(0, min_len - window_size + 1, window_size):
-                X.append([angulo[j:j + window_size], par[j:j + window_size]])
-                y.append(label)
-    X = np.array(X).reshape(-1, 2 * window_size)  # Aplanar las ventanas
-    return X, np.array(y)
-
-def process_folder(folder_path, window_size):
-    # Obtener lista de archivos .xlsx en la carpeta
-    file_paths = glob(os.path.join(folder_path, '*.xlsx'))
+def prepare_data(curvas, etiquetas, window_size, stride=None):
+    # Ventanas aplanadas [ángulo..., par...] de todas las curvas en una sola operación vectorizada
+    X, _, y = window_curves(curvas, window_size, stride, etiquetas=etiquetas)
+    return X, y
+
+def load_folder(folder_path):
+    # Cargar una sola vez las curvas limpias de todos los archivos .xlsx y carpetas .curvas de la carpeta
+    curve_sets = []
+    for file_path in source_files(folder_path):
+        # La caché evita volver a interpretar el Excel en ejecuciones posteriores
+        print(f"Procesando archivo: {file_path}")
+        curve_set = load_curves(file_path, "entrenamiento", mmap=False)
+        print("Forma de las curvas:", curve_set.curvas.shape)
+        print("Valores únicos de las etiquetas:", np.unique(curve_set.etiquetas))
+        curve_sets.append(curve_set)
+    return curve_sets
+
+def dump_atomic(obj, path):
+    # Escribir primero en un archivo temporal para no dejar artefactos incompletos si el proceso se interrumpe
+    tmp_path = f"{path}.tmp"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+def process_folder(folder_path, window_size, curve_sets=None, n_threads=None, save_dir=None):
+    # Las curvas cargadas se reutilizan para todos los tamaños de ventana de la carpeta.
+    # n_threads limita los hilos de XGBoost y LightGBM cuando se entrenan varios trabajos en paralelo.
+    if curve_sets is None:
+        curve_sets = load_folder(folder_path)
 
     # Inicializar listas para almacenar datos combinados
     X_combined = []
     y_combined = []
 
-    for file_path in file_paths:
-        # Cargar y preparar los datos
-        df = pd.read_excel(file_path, sheet_name='Sheet1', header=None)
-        df.columns = [f'Col_{i}' for i in range(len(df.columns))]
-        print(f"Procesando archivo: {file_path}")
-        print("Forma inicial del DataFrame:", df.shape)
-        print("Primeras 5 filas del DataFrame original:")
-        print(df.head())
-        
-        # Eliminar la primera y tercera columna
-        df = df.drop(df.columns[[0, 2]], axis=1)
-
-        df = df.dropna(axis=1, how='all').dropna(how='all')
-
-        print("\nForma del DataFrame después de eliminar filas y columnas vacías:", df.shape)
-
-        df_transposed = df.transpose().reset_index(drop=True)
-        df_transposed.columns = [f'Col_{i}' for i in range(len(df_transposed.columns))]
-
-        print("\nPrimeras 5 filas del DataFrame transpuesto:")
-        print(df_transposed.head())
-
-        # Convertir a numérico y limpiar
-        for col in df_transposed.columns:
-            df_transposed[col] = pd.to_numeric(df_transposed[col], errors='coerce')
-        df_transposed = df_transposed.dropna(how='all')
-
-        print("Valores únicos en la primera fila:", df_transposed.iloc[0].unique())
-
+    for curve_set in curve_sets:
         # Preparar los datos
-        X, y = prepare_data(df_transposed, window_size)
+        X, y = prepare_data(curve_set.curvas, curve_set.etiquetas, window_size)
 
         # Verificar si tenemos datos suficientes
         if len(X) == 0:
@@ -130,6 +117,7 @@ def process_folder(folder_path, window_size):
         subsample=0.8,
         booster='gbtree',
         tree_method='hist',  # Cambiado para usar la CPU
+        n_jobs=n_threads,
         random_state=42
     )
     xgb_model.fit(X_train_balanced, y_train_balanced)
@@ -141,16 +129,13 @@ def process_folder(folder_path, window_size):
         learning_rate=0.1,
         num_leaves=50,
         device='cpu',  # Cambiado para usar la CPU
+        n_jobs=n_threads,
         random_state=42
     )
     lgb_model.fit(X_train_balanced, y_train_balanced)
 
-    # Crear el modelo de ensamblado
-    ensemble_model = VotingClassifier(
-        estimators=[('xgb', xgb_model), ('lgb', lgb_model)],
-        voting='soft'
-    )
-    ensemble_model.fit(X_train_balanced, y_train_balanced)
+    # Crear el modelo de ensamblado con los modelos ya entrenados (sin volver a entrenarlos)
+    ensemble_model = PrefitSoftVotingEnsemble([('xgb', xgb_model), ('lgb', lgb_model)])
 
     # Ensemble
     ensemble_probs = ensemble_model.predict_proba(X_test_scaled)[:, 1]
@@ -162,35 +147,61 @@ def process_folder(folder_path, window_size):
     print("ROC AUC:", roc_auc)
 
     # Guardar métrica
-    metrics.append({
+    metric = {
         'Modelos': f"{os.path.basename(folder_path)}/ensemble_{window_size}",
         'ROC AUC': roc_auc
-    })
+    }
+    metrics.append(metric)
 
     # Obtener la ruta para guardar el modelo ensemble
-    model_save_path = os.path.join(r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos', os.path.basename(folder_path))
+    model_save_path = os.path.join(save_dir or models_dir, os.path.basename(folder_path))
 
     # Crear la carpeta si no existe
     os.makedirs(model_save_path, exist_ok=True)
 
     # Guardar el modelo ensemble y el scaler
-    joblib.dump(ensemble_model, os.path.join(model_save_path, f'ensemble_{window_size}.pkl'))
-    joblib.dump(scaler, os.path.join(model_save_path, f'scaler_{window_size}.pkl'))
+    dump_atomic(scaler, os.path.join(model_save_path, f'scaler_{window_size}.pkl'))
+    dump_atomic(ensemble_model, os.path.join(model_save_path, f'ensemble_{window_size}.pkl'))
+
+    # Compilar el motor de inferencia (escalado incluido) y verificar que coincide con el ensemble
+    try:
+        engine = compile_ensemble(ensemble_model, scaler)
+    except ValueError as e:
+        print(f"No se pudo compilar el motor: {e}; no se incluye en el paquete.")
+        engine = None
+    if engine is not None:
+        engine_diff = np.abs(engine.predict_proba(X_test)[:, 1] - ensemble_probs).max()
+        if engine_diff >= 1e-4:
+            print(f"El motor compilado difiere del ensemble en {engine_diff}; no se incluye en el paquete.")
+            engine = None
+
+    # Guardar el paquete de inferencia con el scaler, el modelo, el motor y las métricas en un solo archivo
+    write_bundle(os.path.join(model_save_path, f'ensemble_{window_size}.bundle'), ensemble_model, scaler, window_size,
+                 metrics={'roc_auc': float(roc_auc), 'n_train': int(len(y_train)), 'n_test': int(len(y_test))},
+                 engine=engine)
 
     print(f"\nModelos guardados en: {model_save_path}")
 
     # Liberar memoria
-    del df, df_transposed, X_combined, y_combined, X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, X_train_balanced, y_train_balanced
-    del xgb_model, lgb_model, ensemble_model, scaler, ensemble_probs
+    del X_combined, y_combined, X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, X_train_balanced, y_train_balanced
+    del xgb_model, lgb_model, ensemble_model, scaler, ensemble_probs, engine
     gc.collect()
-
-# Procesar cada subcarpeta para cada tamaño de ventana
-for subfolder in subfolders:
-    for window_size in window_sizes:
-        print(f"\nProcesando carpeta: {subfolder} con ventana de tamaño {window_size}")
-        process_folder(subfolder, window_size)
-
-# Guardar métricas en un archivo CSV
-metrics_df = pd.DataFrame(metrics)
-metrics_df.to_csv(r'C:\Users\luisg\OneDrive\Documentos\Proyecto_Fiverr\modelos/roc_auc_metrics.csv', index=False)
-print("\nMétricas guardadas en: modelos/roc_auc_metrics.csv")
+    return metric
+
+if __name__ == "__main__":
+    # Obtener lista de subcarpetas en la carpeta principal
+    subfolders = [f.path for f in os.scandir(main_folder_path) if f.is_dir()]
+
+    # Procesar cada subcarpeta para cada tamaño de ventana, leyendo sus archivos una sola vez
+    for subfolder in subfolders:
+        curve_sets = load_folder(subfolder)
+        for window_size in window_sizes:
+            print(f"\nProcesando carpeta: {subfolder} con ventana de tamaño {window_size}")
+            process_folder(subfolder, window_size, curve_sets)
+        del curve_sets
+        gc.collect()
+
+    # Guardar métricas en un archivo CSV
+    metrics_df = pd.DataFrame(metrics)
+    metrics_df.to_csv(os.path.join(models_dir, 'roc_auc_metrics.csv'), index=False)
+    print("\nMétricas guardadas en: modelos/roc_auc_metrics.csv")
@@ -0,0 +1,241 @@
+"""
+Planificador de Entrenamiento en Paralelo
+
+Este script entrena todas las combinaciones (carpeta de estación, tamaño de ventana)
+en un pool de procesos, respetando un presupuesto global de memoria y limitando los
+hilos de XGBoost/LightGBM de cada trabajo para no sobresuscribir los núcleos.
+
+Los trabajos cuyos artefactos son más recientes que sus archivos de origen se omiten,
+de modo que una ejecución interrumpida se reanuda donde quedó. Cada trabajo terminado
+se agrega de inmediato al CSV de métricas junto con su tiempo de ejecución.
+
+Uso:
+    python Planificador_entrenamiento.py --datos <carpeta> --modelos <carpeta> --workers 4 --memoria-gb 24
+
+Funciones:
+    - list_jobs: Lista los trabajos de entrenamiento de todas las estaciones.
+    - artifacts_current: Indica si los artefactos de un trabajo están al día.
+    - estimate_memory: Estima la memoria máxima de cada tamaño de ventana de una carpeta.
+    - run_job: Entrena un trabajo dentro de un proceso del pool.
+    - schedule: Ejecuta los trabajos respetando el número de workers y el presupuesto de memoria.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'app'))
+from excel_cache import load_curves, source_files
+from windowing import window_curves
+
+# Copias simultáneas de la matriz de ventanas durante un entrenamiento (división, escalado,
+# SMOTE y estructuras internas de XGBoost/LightGBM), medidas en float64
+MEMORY_FACTOR = 6
+METRICS_FILE = 'roc_auc_metrics.csv'
+
+
+def list_jobs(data_dir, window_sizes):
+    """
+    Lista los trabajos de entrenamiento de todas las estaciones.
+
+    Args:
+        data_dir (str): Carpeta con una subcarpeta de archivos .xlsx o carpetas .curvas por estación.
+        window_sizes (list): Tamaños de ventana a entrenar.
+
+    Returns:
+        list: Pares (carpeta de la estación, tamaño de ventana).
+    """
+    subfolders = sorted(f.path for f in os.scandir(data_dir) if f.is_dir())
+    return [(folder, window_size) for folder in subfolders for window_size in window_sizes]
+
+
+def artifacts_current(folder_path, window_size, models_dir):
+    """
+    Indica si los artefactos de un trabajo existen y son posteriores a sus datos.
+
+    Args:
+        folder_path (str): Carpeta de la estación.
+        window_size (int): Tamaño de ventana.
+        models_dir (str): Carpeta donde se guardan los modelos.
+
+    Returns:
+        bool: `True` si el trabajo puede omitirse.
+    """
+    save_path = os.path.join(models_dir, os.path.basename(folder_path))
+    artifacts = [os.path.join(save_path, name) for name in
+                 (f'ensemble_{window_size}.pkl', f'scaler_{window_size}.pkl', f'ensemble_{window_size}.bundle')]
+    if not all(os.path.exists(path) for path in artifacts):
+        return False
+    sources = source_files(folder_path)
+    newest_source = max((os.path.getmtime(path) for path in sources), default=0)
+    return min(os.path.getmtime(path) for path in artifacts) >= newest_source
+
+
+def estimate_memory(folder_path, window_sizes):
+    """
+    Estima la memoria máxima de cada tamaño de ventana de una carpeta.
+
+    Se ejecuta en el pool antes de entrenar; de paso convierte los Excel a la caché
+    columnar, por lo que los trabajos posteriores ya no interpretan ningún Excel.
+
+    Args:
+        folder_path (str): Carpeta de la estación.
+        window_sizes (list): Tamaños de ventana.
+
+    Returns:
+        dict: Bytes estimados por tamaño de ventana.
+    """
+    curve_sets = [load_curves(path, "entrenamiento") for path in source_files(folder_path)]
+    curves_bytes = sum(curve_set.curvas.nbytes for curve_set in curve_sets)
+    estimates = {}
+    for window_size in window_sizes:
+        n_windows = sum(len(window_curves(cs.curvas, window_size)[1]) for cs in curve_sets)
+        estimates[window_size] = curves_bytes + n_windows * 2 * window_size * 8 * MEMORY_FACTOR
+    return estimates
+
+
+def _init_worker(n_threads):
+    """
+    Limita los hilos de las librerías numéricas en cada proceso del pool.
+
+    Las variables como OMP_NUM_THREADS no sirven aquí: el proceso hijo hereda BLAS y
+    OpenMP ya inicializados. Se cargan primero las librerías del entrenamiento
+    (NumPy, scikit-learn, XGBoost, LightGBM) y se limitan sus pools en tiempo de
+    ejecución con threadpoolctl, que instala scikit-learn.
+
+    Args:
+        n_threads (int): Hilos por trabajo.
+    """
+    from threadpoolctl import threadpool_limits
+    import Entrenamiento_modelos  # noqa: F401
+
+    threadpool_limits(limits=n_threads)
+
+
+def run_job(folder_path, window_size, n_threads, models_dir):
+    """
+    Entrena un trabajo dentro de un proceso del pool.
+
+    Args:
+        folder_path (str): Carpeta de la estación.
+        window_size (int): Tamaño de ventana.
+        n_threads (int): Hilos de XGBoost y LightGBM.
+        models_dir (str): Carpeta donde se guardan los modelos.
+
+    Returns:
+        dict: Métrica del trabajo con su tiempo de ejecución, o `None` si no hubo datos suficientes.
+    """
+    import Entrenamiento_modelos
+
+    start = time.perf_counter()
+    metric = Entrenamiento_modelos.process_folder(folder_path, window_size, n_threads=n_threads, save_dir=models_dir)
+    if metric is None:
+        return None
+    return {**metric, 'Tiempo (s)': round(time.perf_counter() - start, 2)}
+
+
+def _append_metric(metrics_path, row):
+    """
+    Agrega una fila al CSV de métricas, reemplazando la anterior del mismo modelo.
+
+    Args:
+        metrics_path (str): Ruta del CSV.
+        row (dict): Fila a agregar.
+    """
+    metrics_df = pd.read_csv(metrics_path) if os.path.exists(metrics_path) else pd.DataFrame()
+    if not metrics_df.empty:
+        metrics_df = metrics_df[metrics_df['Modelos'] != row['Modelos']]
+    metrics_df = pd.concat([metrics_df, pd.DataFrame([row])], ignore_index=True)
+    metrics_df.to_csv(metrics_path, index=False)
+
+
+def schedule(jobs, models_dir, workers, memory_budget, n_threads, force=False):
+    """
+    Ejecuta los trabajos respetando el número de workers y el presupuesto de memoria.
+
+    Se lanzan primero los trabajos más grandes; un trabajo solo empieza si su memoria
+    estimada cabe en el presupuesto libre (si no hay nada en ejecución se lanza igual).
+
+    Args:
+        jobs (list): Pares (carpeta de la estación, tamaño de ventana).
+        models_dir (str): Carpeta donde se guardan los modelos.
+        workers (int): Número de procesos del pool.
+        memory_budget (int): Memoria total disponible para los trabajos, en bytes.
+        n_threads (int): Hilos de XGBoost y LightGBM por trabajo.
+        force (bool): Si se reentrenan también los trabajos con artefactos al día.
+
+    Returns:
+        list: Filas de métricas de los trabajos completados.
+    """
+    metrics_path = os.path.join(models_dir, METRICS_FILE)
+    os.makedirs(models_dir, exist_ok=True)
+
+    pending_jobs = [job for job in jobs if force or not artifacts_current(job[0], job[1], models_dir)]
+    print(f"Trabajos: {len(jobs)}, omitidos por estar al día: {len(jobs) - len(pending_jobs)}")
+    if not pending_jobs:
+        return []
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(n_threads,)) as pool:
+        # Estimar la memoria de cada carpeta en paralelo (y convertir sus Excel a la caché)
+        folders = sorted({folder for folder, _ in pending_jobs})
+        sizes = sorted({window_size for _, window_size in pending_jobs})
+        estimates = dict(zip(folders, pool.map(estimate_memory, folders, [sizes] * len(folders))))
+        queue = sorted(pending_jobs, key=lambda job: estimates[job[0]][job[1]], reverse=True)
+
+        running = {}
+        used = 0
+        while queue or running:
+            for job in list(queue):
+                if len(running) >= workers:
+                    break
+                memory = estimates[job[0]][job[1]]
+                if running and used + memory > memory_budget:
+                    continue
+                running[pool.submit(run_job, job[0], job[1], n_threads, models_dir)] = (job, memory)
+                used += memory
+                queue.remove(job)
+                print(f"Iniciado: {os.path.basename(job[0])} ventana {job[1]} ({memory / 2**20:.0f} MB estimados)")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                (folder, window_size), memory = running.pop(future)
+                used -= memory
+                try:
+                    row = future.result()
+                except Exception as e:
+                    print(f"Error en {os.path.basename(folder)} ventana {window_size}: {e}")
+                    continue
+                if row is None:
+                    continue
+                row = {**row, 'Hilos': n_threads, 'Memoria estimada (MB)': round(memory / 2**20, 1)}
+                _append_metric(metrics_path, row)
+                results.append(row)
+                print(f"Terminado: {row['Modelos']} en {row['Tiempo (s)']} s (ROC AUC {row['ROC AUC']:.4f})")
+    return results
+
+
+if __name__ == "__main__":
+    import Entrenamiento_modelos
+
+    parser = argparse.ArgumentParser(description="Entrena en paralelo los modelos de todas las estaciones.")
+    parser.add_argument("--datos", default=Entrenamiento_modelos.main_folder_path, help="Carpeta con una subcarpeta por estación.")
+    parser.add_argument("--modelos", default=Entrenamiento_modelos.models_dir, help="Carpeta donde se guardan los modelos.")
+    parser.add_argument("--ventanas", type=int, nargs="+", default=Entrenamiento_modelos.window_sizes, help="Tamaños de ventana.")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4), help="Trabajos simultáneos.")
+    parser.add_argument("--hilos", type=int, default=None, help="Hilos de XGBoost/LightGBM por trabajo (por defecto núcleos / workers).")
+    parser.add_argument("--memoria-gb", type=float, default=8.0, help="Presupuesto total de memoria para los trabajos.")
+    parser.add_argument("--forzar", action="store_true", help="Reentrena también los trabajos con artefactos al día.")
+    args = parser.parse_args()
+
+    n_threads = args.hilos or max(1, (os.cpu_count() or 1) // args.workers)
+    start = time.perf_counter()
+    completed = schedule(list_jobs(args.datos, args.ventanas), args.modelos, args.workers,
+                         int(args.memoria_gb * 2**30), n_threads, force=args.forzar)
+    print(f"\n{len(completed)} trabajos completados en {time.perf_counter() - start:.1f} s. "
+          f"Métricas en: {os.path.join(args.modelos, METRICS_FILE)}")
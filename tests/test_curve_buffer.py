@@ -0,0 +1,90 @@
+"""
+Pruebas del Búfer Circular de Curvas
+
+Comprueba el orden de los puntos al dar la vuelta al búfer, las políticas de
+desbordamiento y la lectura desde un cursor.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - sys: Librería para agregar la carpeta de la aplicación a la ruta de importación.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - pytest: Framework de pruebas.
+    - curve_buffer: Módulo probado.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from curve_buffer import CurveBuffer  # noqa: E402
+
+
+def test_wraparound_keeps_latest_points_in_order():
+    buffer = CurveBuffer(capacity=5)
+    buffer.append([0, 1, 2], [10, 11, 12])
+    buffer.append([3, 4, 5, 6], [13, 14, 15, 16])
+    angulo, par = buffer.arrays()
+    assert angulo.tolist() == [2, 3, 4, 5, 6]
+    assert par.tolist() == [12, 13, 14, 15, 16]
+    assert len(buffer) == 5
+    assert buffer.total == 7
+
+
+def test_window_larger_than_capacity_keeps_last_points():
+    buffer = CurveBuffer(capacity=3)
+    buffer.append([0], [0])
+    buffer.append(np.arange(1, 8), np.arange(1, 8))
+    assert buffer.arrays()[0].tolist() == [5, 6, 7]
+    assert buffer.total == 8
+
+
+def test_drop_discards_new_points():
+    buffer = CurveBuffer(capacity=3, overflow="drop")
+    assert buffer.append([0, 1], [0, 1]) == 2
+    assert buffer.append([2, 3], [2, 3]) == 1
+    assert buffer.arrays()[0].tolist() == [0, 1, 2]
+    assert buffer.total == 3
+
+
+def test_error_leaves_buffer_unchanged():
+    buffer = CurveBuffer(capacity=3, overflow="error")
+    buffer.append([0, 1], [0, 1])
+    with pytest.raises(OverflowError):
+        buffer.append([2, 3], [2, 3])
+    assert buffer.arrays()[0].tolist() == [0, 1]
+
+
+def test_mismatched_lengths_are_rejected():
+    with pytest.raises(ValueError):
+        CurveBuffer(capacity=3).append([0, 1], [0])
+
+
+def test_since_after_wraparound():
+    buffer = CurveBuffer(capacity=4)
+    buffer.append(np.arange(6), np.arange(6))
+    angulo, _, truncated = buffer.since(4)
+    assert angulo.tolist() == [4, 5]
+    assert not truncated
+
+    # Los puntos 0 y 1 ya se sobrescribieron
+    angulo, _, truncated = buffer.since(0)
+    assert angulo.tolist() == [2, 3, 4, 5]
+    assert truncated
+
+    angulo, _, truncated = buffer.since(6)
+    assert angulo.tolist() == []
+    assert not truncated
+
+
+def test_clear_keeps_sequence():
+    buffer = CurveBuffer(capacity=4, start_seq=10)
+    buffer.append([1, 2], [1, 2])
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.total == 12
+    buffer.append([3], [3])
+    assert buffer.since(12)[0].tolist() == [3]
@@ -0,0 +1,132 @@
+"""
+Pruebas del Paquete de Inferencia en un Solo Archivo
+
+Comprueba que un paquete escrito con `write_bundle` se carga con `load_bundle` con el
+mismo modelo, scaler y motor compilado, y que los paquetes dañados o de otra ventana
+se rechazan.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - sys: Librería para agregar la carpeta de la aplicación a la ruta de importación.
+    - joblib: Librería para escribir los pickles de `bundle_from_pickles`.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - pytest: Framework de pruebas.
+    - sklearn: StandardScaler del entrenamiento.
+    - ensemble, model_bundle, tree_engine: Módulos probados.
+"""
+
+import os
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from ensemble import PrefitSoftVotingEnsemble  # noqa: E402
+from model_bundle import ALIGNMENT, bundle_from_pickles, load_bundle, read_manifest, write_bundle  # noqa: E402
+from tree_engine import ENGINE_FIELDS, compile_ensemble  # noqa: E402
+
+xgb = pytest.importorskip("xgboost")
+lgb = pytest.importorskip("lightgbm")
+
+WINDOW_SIZE = 6
+
+
+@pytest.fixture(scope="module")
+def trained():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 2 * WINDOW_SIZE)).astype(np.float32)
+    y = (X[:, 0] - X[:, WINDOW_SIZE] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    model = PrefitSoftVotingEnsemble([
+        ("xgb", xgb.XGBClassifier(n_estimators=10, max_depth=3, n_jobs=1).fit(X_scaled, y)),
+        ("lgb", lgb.LGBMClassifier(n_estimators=10, num_leaves=8, n_jobs=1, verbose=-1).fit(X_scaled, y)),
+    ])
+    return model, scaler, X
+
+
+@pytest.fixture
+def bundle_path(tmp_path, trained):
+    model, scaler, _ = trained
+    path = str(tmp_path / "ensemble_6.bundle")
+    write_bundle(path, model, scaler, WINDOW_SIZE, metrics={"roc_auc": 0.9}, engine=compile_ensemble(model, scaler))
+    return path
+
+
+def test_round_trip(bundle_path, trained):
+    model, scaler, X = trained
+    bundle = load_bundle(bundle_path, WINDOW_SIZE, verify=True)
+
+    assert bundle.window_size == WINDOW_SIZE
+    assert bundle.manifest["metrics"] == {"roc_auc": 0.9}
+    assert bundle.manifest["classes"] == [0, 1]
+    assert all(blob["offset"] % ALIGNMENT == 0 for blob in bundle.manifest["blobs"].values())
+    np.testing.assert_array_equal(bundle.arrays["scaler_mean"], scaler.mean_)
+
+    loaded_model, loaded_scaler = bundle.model
+    np.testing.assert_array_equal(loaded_scaler.transform(X), scaler.transform(X))
+    np.testing.assert_array_equal(loaded_model.predict_proba(scaler.transform(X)),
+                                  model.predict_proba(scaler.transform(X)))
+
+    engine = compile_ensemble(model, scaler)
+    for field in ENGINE_FIELDS:
+        expected = engine.classes_ if field == "classes" else getattr(engine, field)
+        actual = bundle.engine.classes_ if field == "classes" else getattr(bundle.engine, field)
+        np.testing.assert_array_equal(actual, expected)
+    np.testing.assert_array_equal(bundle.engine.predict_proba(X), engine.predict_proba(X))
+
+
+def test_bundle_without_engine(tmp_path, trained):
+    model, scaler, _ = trained
+    path = str(tmp_path / "ensemble_6.bundle")
+    manifest = write_bundle(path, model, scaler, WINDOW_SIZE)
+    assert not manifest["engine"]
+    assert load_bundle(path).engine is None
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_wrong_window_size_is_rejected(bundle_path):
+    with pytest.raises(ValueError, match="ventana"):
+        load_bundle(bundle_path, WINDOW_SIZE + 1)
+
+
+def test_truncated_bundle_is_rejected(bundle_path):
+    with open(bundle_path, "r+b") as f:
+        f.truncate(os.path.getsize(bundle_path) - 10)
+    with pytest.raises(ValueError, match="truncado"):
+        load_bundle(bundle_path)
+
+
+def test_corrupted_content_fails_verification(bundle_path):
+    manifest, data_start = read_manifest(bundle_path, with_data_start=True)
+    with open(bundle_path, "r+b") as f:
+        f.seek(data_start + manifest["blobs"]["model"]["offset"] + 100)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    load_bundle(bundle_path)
+    with pytest.raises(ValueError, match="hash"):
+        load_bundle(bundle_path, verify=True)
+
+
+def test_not_a_bundle_is_rejected(tmp_path):
+    path = tmp_path / "modelo.bundle"
+    path.write_bytes(b"no es un paquete")
+    with pytest.raises(ValueError):
+        load_bundle(str(path))
+
+
+def test_bundle_from_pickles(tmp_path, trained):
+    model, scaler, X = trained
+    model_path, scaler_path = str(tmp_path / "ensemble_6.pkl"), str(tmp_path / "scaler_6.pkl")
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    path = bundle_from_pickles(model_path, scaler_path, WINDOW_SIZE)
+    assert path == str(tmp_path / "ensemble_6.bundle")
+    bundle = load_bundle(path, WINDOW_SIZE, verify=True)
+    expected = model.predict_proba(scaler.transform(X.astype(np.float64)))
+    np.testing.assert_allclose(bundle.engine.predict_proba(X), expected, atol=1e-6)
@@ -0,0 +1,111 @@
+"""
+Pruebas del Registro de Modelos en Memoria
+
+Comprueba la política LRU, las entradas fijadas, la recarga cuando cambian los
+archivos y que las cargas concurrentes de una misma clave se hagan una sola vez.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - sys: Librería para agregar la carpeta de la aplicación a la ruta de importación.
+    - threading: Librería para las cargas concurrentes.
+    - time: Librería para simular cargas lentas.
+    - pytest: Framework de pruebas.
+    - model_registry: Módulo probado.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from model_registry import ModelRegistry  # noqa: E402
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.pkl").write_bytes(b"x" * 10)
+    return tmp_path
+
+
+def make_registry(models_dir, loads, delay=0.0, **kwargs):
+    """Crea un registro cuyo cargador devuelve el contenido del archivo y cuenta las cargas."""
+    def resolve_paths(folder, name, window):
+        return [str(models_dir / f"{name}.pkl")]
+
+    def loader(folder, name, window):
+        loads.append(name)
+        time.sleep(delay)
+        return (models_dir / f"{name}.pkl").read_bytes()
+
+    return ModelRegistry(loader, resolve_paths, **kwargs)
+
+
+def test_lru_evicts_least_recently_used(models_dir):
+    loads = []
+    registry = make_registry(models_dir, loads, max_entries=2)
+    registry.get("m", "a", 1)
+    registry.get("m", "b", 1)
+    registry.get("m", "a", 1)
+    registry.get("m", "c", 1)
+    assert ("m", "a", 1) in registry
+    assert ("m", "b", 1) not in registry
+    assert registry.stats()["evictions"] == 1
+    assert loads == ["a", "b", "c"]
+
+
+def test_max_bytes_evicts(models_dir):
+    registry = make_registry(models_dir, [], max_entries=10, max_bytes=25)
+    for name in ("a", "b", "c"):
+        registry.get("m", name, 1)
+    assert registry.stats()["bytes"] == 20
+    assert ("m", "a", 1) not in registry
+
+
+def test_pinned_entry_is_not_evicted(models_dir):
+    registry = make_registry(models_dir, [], max_entries=2)
+    registry.get("m", "a", 1)
+    registry.pin("m", "a", 1)
+    registry.get("m", "b", 1)
+    registry.get("m", "c", 1)
+    assert ("m", "a", 1) in registry
+    assert ("m", "b", 1) not in registry
+
+    registry.unpin("m", "a", 1)
+    registry.get("m", "b", 1)
+    assert ("m", "a", 1) not in registry
+
+
+def test_reload_when_signature_changes(models_dir):
+    loads = []
+    registry = make_registry(models_dir, loads, check_interval=0.0)
+    assert registry.get("m", "a", 1) == b"x" * 10
+    assert registry.get("m", "a", 1) == b"x" * 10
+    (models_dir / "a.pkl").write_bytes(b"y" * 12)
+    assert registry.get("m", "a", 1) == b"y" * 12
+    assert loads == ["a", "a"]
+    assert registry.stats()["reloads"] == 1
+
+
+def test_missing_file_is_not_cached(models_dir):
+    registry = make_registry(models_dir, [])
+    with pytest.raises(FileNotFoundError):
+        registry.get("m", "missing", 1)
+    assert ("m", "missing", 1) not in registry
+    assert registry._key_locks == {}
+
+
+def test_concurrent_loads_of_same_key_load_once(models_dir):
+    loads = []
+    registry = make_registry(models_dir, loads, delay=0.05)
+    threads = [threading.Thread(target=registry.get, args=("m", "a", 1)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["a"]
+    assert registry._key_locks == {}
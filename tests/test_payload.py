@@ -0,0 +1,91 @@
+"""
+Pruebas de los Formatos Compactos de las Ventanas
+
+Comprueba que `payload.body_parser` acepta los tres formatos y que las solicitudes
+mal formadas se rechazan con el 422 habitual de FastAPI en lugar de un error 500.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - sys: Librería para agregar la carpeta de la aplicación a la ruta de importación.
+    - pytest: Framework de pruebas.
+    - fastapi: Aplicación y cliente de prueba.
+    - pydantic: Modelo de la solicitud de prueba.
+    - payload: Módulo probado.
+"""
+
+import os
+import sys
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from payload import BINARY_CONTENT_TYPE, WindowArray, body_parser, encode_request, openapi_body  # noqa: E402
+
+
+class WindowRequest(BaseModel):
+    """Solicitud de prueba con una ventana y un campo obligatorio fuera de ella."""
+    window_size: int
+    angulo: WindowArray
+    par: WindowArray
+
+
+app = FastAPI()
+
+
+@app.post("/window", openapi_extra=openapi_body(WindowRequest))
+def receive_window(request: WindowRequest = Depends(body_parser(WindowRequest))):
+    return {"window_size": request.window_size, "angulo": request.angulo.tolist(), "par": request.par.tolist()}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize("payload_format", ["json", "base64", "binario"])
+def test_formats_round_trip(client, payload_format):
+    params, headers, body = encode_request([1.5, 2.5], [3.0, 4.0], {"window_size": 2}, payload_format)
+    response = client.post("/window", params=params, headers=headers, content=body)
+    assert response.status_code == 200
+    assert response.json() == {"window_size": 2, "angulo": [1.5, 2.5], "par": [3.0, 4.0]}
+
+
+def test_invalid_base64_is_422(client):
+    response = client.post("/window", json={"window_size": 2, "angulo": "@@@@", "par": "AAAAAAAAAAA="})
+    assert response.status_code == 422
+    errors = response.json()["detail"]
+    assert [error["loc"] for error in errors] == [["body", "angulo"]]
+    assert "base64" in errors[0]["msg"]
+
+
+def test_base64_length_not_float32_is_422(client):
+    response = client.post("/window", json={"window_size": 2, "angulo": "AAAA", "par": "AAAAAAAAAAA="})
+    assert response.status_code == 422
+    assert [error["loc"] for error in response.json()["detail"]] == [["body", "angulo"]]
+
+
+def test_binary_odd_length_is_422(client):
+    response = client.post("/window", params={"window_size": 2}, headers={"Content-Type": BINARY_CONTENT_TYPE},
+                           content=b"\x00" * 12)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body"]
+
+
+def test_binary_missing_query_field_is_422(client):
+    params, headers, body = encode_request([1.0, 2.0], [3.0, 4.0], {}, "binario")
+    response = client.post("/window", params=params, headers=headers, content=body)
+    assert response.status_code == 422
+    errors = response.json()["detail"]
+    assert [(error["type"], error["loc"]) for error in errors] == [("missing", ["body", "window_size"])]
+    assert "input" not in errors[0]
+
+
+def test_binary_invalid_query_field_is_422(client):
+    params, headers, body = encode_request([1.0, 2.0], [3.0, 4.0], {"window_size": "dos"}, "binario")
+    response = client.post("/window", params=params, headers=headers, content=body)
+    assert response.status_code == 422
+    assert [error["loc"] for error in response.json()["detail"]] == [["body", "window_size"]]
@@ -0,0 +1,108 @@
+"""
+Pruebas del Almacén de Sesiones por Estación
+
+Comprueba que las estaciones no mezclan sus curvas, que una ventana rechazada no
+borra la sesión y que `changes_since` devuelve el proceso completo cuando el cursor
+es de otra estación o ya no es válido.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - sys: Librería para agregar la carpeta de la aplicación a la ruta de importación.
+    - pytest: Framework de pruebas.
+    - session_store: Módulo probado.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from session_store import SessionStore  # noqa: E402
+
+
+def append(store, estacion, values, reset=False, identificador="p1"):
+    return store.append(estacion, values, values, reset, identificador, "2024-01-01")
+
+
+def test_stations_do_not_mix():
+    store = SessionStore()
+    append(store, "A", [1, 2], reset=True)
+    append(store, "B", [9], reset=True)
+    append(store, "A", [3])
+    assert store.get("A")["angulo"] == [1, 2, 3]
+    assert store.get("B")["angulo"] == [9]
+    assert store.latest()["estacion"] == "A"
+
+
+def test_delta_since_own_cursor():
+    store = SessionStore()
+    append(store, "A", [1, 2], reset=True)
+    cursor = store.changes_since("A", 0)["seq"]
+    append(store, "A", [3, 4])
+    changes = store.changes_since("A", cursor)
+    assert changes["angulo"] == [3, 4]
+    assert not changes["reset"]
+
+
+def test_foreign_cursor_forces_reset():
+    store = SessionStore()
+    append(store, "A", [1, 2, 3], reset=True)
+    append(store, "B", [7, 8], reset=True)
+    cursor_a = store.changes_since("A", 0)["seq"]
+    changes = store.changes_since("B", cursor_a, since_estacion="A")
+    assert changes["reset"]
+    assert changes["angulo"] == [7, 8]
+
+    # La estación más reciente sin indicar de quién es el cursor
+    changes = store.changes_since(None, cursor_a)
+    assert changes["reset"]
+    assert changes["estacion"] == "B"
+
+
+def test_stale_cursor_after_new_process_forces_reset():
+    store = SessionStore()
+    append(store, "A", [1, 2], reset=True)
+    cursor = store.changes_since("A", 0)["seq"]
+    append(store, "A", [5], reset=True, identificador="p2")
+    changes = store.changes_since("A", cursor)
+    assert changes["reset"]
+    assert changes["angulo"] == [5]
+    assert changes["identificador"] == "p2"
+
+
+def test_cursor_from_the_future_forces_reset():
+    store = SessionStore()
+    append(store, "A", [1, 2], reset=True)
+    changes = store.changes_since("A", 1000)
+    assert changes["reset"]
+    assert changes["angulo"] == [1, 2]
+
+
+def test_overwritten_cursor_is_truncated():
+    store = SessionStore(max_points=4)
+    append(store, "A", [1, 2], reset=True)
+    cursor = store.changes_since("A", 0)["seq"]
+    append(store, "A", [3, 4, 5, 6, 7])
+    changes = store.changes_since("A", cursor)
+    assert changes["truncated"]
+    assert changes["angulo"] == [4, 5, 6, 7]
+
+
+def test_rejected_window_keeps_session():
+    store = SessionStore(max_points=3, overflow="error")
+    append(store, "A", [1, 2], reset=True)
+    with pytest.raises(OverflowError):
+        append(store, "A", [1, 2, 3, 4], reset=True)
+    with pytest.raises(ValueError):
+        store.append("A", [1, 2], [1], True, "p2", "")
+    assert store.get("A")["angulo"] == [1, 2]
+
+
+def test_max_sessions_evicts_oldest():
+    store = SessionStore(max_sessions=2)
+    for estacion in ("A", "B", "C"):
+        append(store, estacion, [1], reset=True)
+    assert store.get("A") is None
+    assert set(store.all()) == {"B", "C"}
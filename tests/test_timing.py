@@ -0,0 +1,48 @@
+"""
+Pruebas de los Tiempos por Etapa
+
+Comprueba que las etapas de otro servicio se anidan en la etapa local que las
+contiene, de modo que la suma de las etapas no cuenta dos veces su duración.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - sys: Librería para agregar la carpeta de la aplicación a la ruta de importación.
+    - pytest: Framework de pruebas.
+    - timing: Módulo probado.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import timing  # noqa: E402
+
+
+@pytest.fixture
+def timer():
+    timer = timing.StageTimer()
+    token = timing._current_timer.set(timer)
+    yield timer
+    timing._current_timer.reset(token)
+
+
+def test_merged_stages_are_nested_in_parent(timer):
+    timer.stages = {"decode": 0.001, "forward": 0.010}
+    timing.merge_server_timing("forward", "model", "decode;dur=1, predict;dur=5, total;dur=6.5")
+    assert "model-total" not in timer.stages
+    assert timer.stages["model-predict"] == pytest.approx(0.005)
+    assert timer.stages["forward"] == pytest.approx(0.004)
+    assert sum(timer.stages.values()) == pytest.approx(0.011)
+
+
+def test_nested_stage_never_exceeds_parent(timer):
+    timer.stages = {"forward": 0.002}
+    timing.merge_server_timing("forward", "model", "predict;dur=5")
+    assert timer.stages == {"forward": 0.0, "model-predict": pytest.approx(0.002)}
+
+
+def test_parse_ignores_malformed_durations():
+    assert timing.parse_server_timing("a;dur=1.5, b;dur=x, c") == {"a": 1.5}
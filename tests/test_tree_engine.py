@@ -0,0 +1,96 @@
+"""
+Pruebas del Motor de Inferencia de Árboles en NumPy
+
+Comprueba que el TreeEngine compilado de un ensamble XGBoost + LightGBM con su
+StandardScaler devuelve las mismas probabilidades que `predict_proba`, también con
+valores faltantes, y que los modelos que no puede reproducir se rechazan.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - sys: Librería para agregar la carpeta de la aplicación a la ruta de importación.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - pytest: Framework de pruebas.
+    - sklearn: StandardScaler del entrenamiento.
+    - ensemble, tree_engine: Módulos probados.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from ensemble import PrefitSoftVotingEnsemble  # noqa: E402
+from tree_engine import compile_ensemble  # noqa: E402
+
+xgb = pytest.importorskip("xgboost")
+lgb = pytest.importorskip("lightgbm")
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(loc=5.0, scale=3.0, size=(400, 12)).astype(np.float32)
+    y = (X[:, 0] + 0.5 * X[:, 3] - X[:, 7] + rng.normal(size=400) > 5.0).astype(int)
+    return X, y
+
+
+def fit_ensemble(X, y, **lgb_params):
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    xgb_model = xgb.XGBClassifier(n_estimators=20, max_depth=3, n_jobs=1).fit(X_scaled, y)
+    lgb_model = lgb.LGBMClassifier(n_estimators=20, num_leaves=8, min_child_samples=5, n_jobs=1,
+                                   verbose=-1, **lgb_params).fit(X_scaled, y)
+    return PrefitSoftVotingEnsemble([("xgb", xgb_model), ("lgb", lgb_model)]), scaler
+
+
+def test_engine_matches_predict_proba(training_data):
+    X, y = training_data
+    model, scaler = fit_ensemble(X, y)
+    engine = compile_ensemble(model, scaler)
+
+    X_new = np.random.default_rng(1).normal(loc=5.0, scale=3.0, size=(200, 12)).astype(np.float32)
+    expected = model.predict_proba(scaler.transform(X_new))
+    np.testing.assert_allclose(engine.predict_proba(X_new), expected, atol=1e-4)
+    np.testing.assert_array_equal(engine.predict(X_new), model.classes_[np.argmax(expected, axis=1)])
+
+
+def test_engine_matches_predict_proba_with_missing_values(training_data):
+    X, y = training_data
+    X = X.copy()
+    X[::7, 2] = np.nan
+    model, scaler = fit_ensemble(X, y)
+    engine = compile_ensemble(model, scaler)
+
+    X_new = np.random.default_rng(2).normal(loc=5.0, scale=3.0, size=(100, 12)).astype(np.float32)
+    X_new[::3, 5] = np.nan
+    X_new[::5, 2] = np.nan
+    expected = model.predict_proba(scaler.transform(X_new))
+    np.testing.assert_allclose(engine.predict_proba(X_new), expected, atol=1e-4)
+
+
+def test_engine_matches_on_training_values(training_data):
+    # Con datos cuantizados muchas filas caen justo sobre los cortes de XGBoost
+    X, y = training_data
+    X = np.round(X, 1)
+    model, scaler = fit_ensemble(X, y)
+    engine = compile_ensemble(model, scaler)
+    expected = model.predict_proba(scaler.transform(X.astype(np.float64)))
+    np.testing.assert_allclose(engine.predict_proba(X), expected, atol=1e-6)
+
+
+def test_single_model_without_scaler(training_data):
+    X, y = training_data
+    model = xgb.XGBClassifier(n_estimators=10, max_depth=3, n_jobs=1).fit(X, y)
+    engine = compile_ensemble(model)
+    np.testing.assert_allclose(engine.predict_proba(X), model.predict_proba(X), atol=1e-4)
+
+
+def test_lightgbm_zero_as_missing_is_rejected(training_data):
+    X, y = training_data
+    model, scaler = fit_ensemble(X, y, zero_as_missing=True)
+    with pytest.raises(ValueError, match="zero_as_missing"):
+        compile_ensemble(model, scaler)
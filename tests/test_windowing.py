@@ -0,0 +1,99 @@
+"""
+Pruebas del Ventaneo Vectorizado de Curvas
+
+Comprueba que `window_curves` produce las mismas ventanas, índices de proceso y
+etiquetas que el ventaneo con bucles que usaban antes el despachador y el
+entrenamiento.
+
+Imports:
+    - os: Librería para interactuar con el sistema operativo.
+    - sys: Librería para agregar la carpeta de la aplicación a la ruta de importación.
+    - numpy: Librería para manejo de matrices y operaciones numéricas.
+    - pandas: Librería para el ventaneo de referencia con `dropna()`.
+    - pytest: Framework de pruebas.
+    - windowing: Módulo probado.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from windowing import compact_curves, window_curves  # noqa: E402
+
+
+def loop_windows(curvas, window_size, etiquetas):
+    """Ventaneo de referencia: el bucle por columnas del DataFrame transpuesto."""
+    df = pd.DataFrame(curvas.T)
+    X, procesos, y = [], [], []
+    for i in range(0, df.shape[1], 2):
+        if i + 1 >= df.shape[1]:
+            break
+        angulo = df.iloc[:, i].dropna().astype(float).values
+        par = df.iloc[:, i + 1].dropna().astype(float).values
+        min_len = min(len(angulo), len(par))
+        if min_len > window_size:
+            for j in range(0, min_len - window_size + 1, window_size):
+                X.append([angulo[j:j + window_size], par[j:j + window_size]])
+                procesos.append(i // 2)
+                y.append(etiquetas[i])
+    return np.array(X).reshape(-1, 2 * window_size), np.array(procesos), np.array(y)
+
+
+def random_curves(n_columns, n_points, seed):
+    """Curvas float32 de longitudes distintas, con NaN al final y algunos intermedios."""
+    rng = np.random.default_rng(seed)
+    curvas = rng.normal(size=(n_columns, n_points)).astype(np.float32)
+    for row, length in enumerate(rng.integers(0, n_points + 1, size=n_columns)):
+        curvas[row, length:] = np.nan
+    holes = rng.random(curvas.shape) < 0.02
+    curvas[holes] = np.nan
+    return curvas
+
+
+@pytest.mark.parametrize("n_columns", [10, 11])
+@pytest.mark.parametrize("window_size", [5, 50])
+def test_matches_loop_windowing(n_columns, window_size):
+    curvas = random_curves(n_columns, 300, seed=n_columns * window_size)
+    etiquetas = np.arange(n_columns) % 2
+    X, procesos, labels = window_curves(curvas, window_size, etiquetas=etiquetas)
+    X_ref, procesos_ref, labels_ref = loop_windows(curvas, window_size, etiquetas)
+
+    assert X.dtype == np.float32
+    assert X.shape == X_ref.shape
+    np.testing.assert_array_equal(X, X_ref.astype(np.float32))
+    np.testing.assert_array_equal(procesos, procesos_ref)
+    np.testing.assert_array_equal(labels, labels_ref)
+
+
+def test_short_curves_produce_no_windows():
+    curvas = np.full((4, 10), np.nan, dtype=np.float32)
+    curvas[:, :5] = 1.0
+    X, procesos, labels = window_curves(curvas, 5)
+    assert X.shape == (0, 10)
+    assert len(procesos) == 0
+    assert labels is None
+
+
+def test_overlapping_stride():
+    curvas = np.vstack([np.arange(10), np.arange(100, 110)]).astype(np.float32)
+    X, procesos, _ = window_curves(curvas, 4, stride=2)
+    assert X[:, 0].tolist() == [0, 2, 4, 6]
+    assert X[1].tolist() == [2, 3, 4, 5, 102, 103, 104, 105]
+    assert procesos.tolist() == [0, 0, 0, 0]
+
+
+def test_invalid_stride():
+    with pytest.raises(ValueError):
+        window_curves(np.zeros((2, 10), dtype=np.float32), 4, stride=-1)
+
+
+def test_compact_curves_without_holes_does_not_copy():
+    curvas = np.array([[1, 2, np.nan], [3, np.nan, np.nan]], dtype=np.float32)
+    compacted, lengths = compact_curves(curvas)
+    assert compacted is curvas
+    assert lengths.tolist() == [2, 1]